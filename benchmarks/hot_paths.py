@@ -0,0 +1,316 @@
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.fake_repository import FakeProjectsRepository, FaultPlan
+from services.projects_service import ProjectsService
+from services.repository import FileInfo, VectorStoreInfo
+from services.resilience import (
+    Resilience,
+    ResilientProjectsRepository,
+    RetryPolicy,
+    TokenBucket,
+)
+
+DEFAULT_SIZES = "100,1000,10000"
+DEFAULT_STORES = 20
+DEFAULT_RUNS = 3
+DEFAULT_LATENCY_MS = 1.0
+DEFAULT_JITTER_MS = 1.0
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_BULK_FILES = 50
+DEFAULT_FILE_BYTES = 4096
+DEFAULT_UPLOAD_WORKERS = 4
+# A metric regresses when it is this much slower than the baseline and the
+# difference is above the noise floor.
+DEFAULT_TOLERANCE = 0.25
+NOISE_FLOOR_MS = 5.0
+SEARCH_QUERIES = ("doc1", "doc12.pdf", "pdf", "nada-aqui")
+SCREEN_SIZE = (80, 24)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def _timed(fn: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def _median(samples: List[Dict[str, float]]) -> Dict[str, float]:
+    return {
+        key: round(statistics.median(s[key] for s in samples), 3) for key in samples[0]
+    }
+
+
+def _service(
+    faults: FaultPlan, stores: int, files: int, page_size: int, per_file: bool
+) -> ProjectsService:
+    repo = FakeProjectsRepository(
+        stores=stores,
+        files_per_store=files,
+        faults=faults,
+        page_size=page_size,
+        inline_filenames=not per_file,
+    )
+    # Faults are absorbed the way the app absorbs them; no client-side rate
+    # limit, so the numbers show the service's own throttling.
+    resilience = Resilience(
+        policy=RetryPolicy(base_delay=0.01, max_delay=1.0), bucket=TokenBucket(0)
+    )
+    service = ProjectsService()
+    service.set_repository(ResilientProjectsRepository(repo, resilience))
+    service.set_vector_store(VectorStoreInfo(id="vs0", name="Store 0"))
+    return service
+
+
+def measure_listing(
+    service: ProjectsService,
+) -> Tuple[Dict[str, float], List[FileInfo]]:
+    sample: Dict[str, float] = {}
+    sample["list_stores_ms"] = _ms(_timed(lambda: service.list_vector_stores(True)))
+    listed: Dict[str, FileInfo] = {}
+
+    def list_files() -> None:
+        listed.update(service.list_vector_store_files(True))
+
+    sample["list_files_ms"] = _ms(_timed(list_files))
+    sample["files_listed"] = len(listed)
+
+    async def stream() -> None:
+        started = time.perf_counter()
+        first: Optional[float] = None
+        async for _ in service.astream_vector_store_files(True):
+            if first is None:
+                first = time.perf_counter() - started
+        sample["stream_first_batch_ms"] = _ms(first or 0.0)
+        sample["stream_files_ms"] = _ms(time.perf_counter() - started)
+
+    asyncio.run(stream())
+    return sample, list(listed.values())
+
+
+def measure_search(service: ProjectsService) -> Dict[str, float]:
+    sample = {"index_build_ms": _ms(_timed(lambda: service.file_index(True)))}
+    for query in SEARCH_QUERIES:
+        search = functools.partial(service.search_files, query)
+        sample[f"search_{query}_ms"] = _ms(_timed(search))
+    return sample
+
+
+def measure_render(files: List[FileInfo]) -> Dict[str, float]:
+    import urwid
+
+    from ui.screens import VirtualList
+
+    def render_row(f: FileInfo) -> urwid.Widget:
+        return urwid.Text(f"{f.filename} (ID: {f.id})", wrap="ellipsis")
+
+    sample: Dict[str, float] = {}
+    started = time.perf_counter()
+    results = VirtualList(files, render_row)
+    results.render(SCREEN_SIZE, focus=True)
+    sample["render_first_ms"] = _ms(time.perf_counter() - started)
+
+    def jump() -> None:
+        results.jump_to(len(files) - 1)
+        results.render(SCREEN_SIZE, focus=True)
+
+    sample["render_jump_end_ms"] = _ms(_timed(jump))
+
+    def scroll() -> None:
+        for _ in range(SCREEN_SIZE[1]):
+            results.keypress(SCREEN_SIZE, "up")
+            results.render(SCREEN_SIZE, focus=True)
+
+    sample["render_scroll_page_ms"] = _ms(_timed(scroll))
+
+    def refilter() -> None:
+        results.set_rows([f for f in files if "1" in f.filename])
+        results.render(SCREEN_SIZE, focus=True)
+
+    sample["render_refilter_ms"] = _ms(_timed(refilter))
+    return sample
+
+
+def measure_uploads(
+    faults: FaultPlan, bulk_files: int, file_bytes: int, workers: int
+) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(max(1, bulk_files)):
+            path = os.path.join(tmp, f"upload{i}.bin")
+            with open(path, "wb") as f:
+                f.write(os.urandom(file_bytes))
+            paths.append(path)
+        service = _service(faults, 1, 0, DEFAULT_PAGE_SIZE, per_file=False)
+        sample: Dict[str, float] = {}
+        ok: List[bool] = []
+        sample["upload_single_ms"] = _ms(
+            _timed(lambda: ok.append(service.upload_and_attach_file(paths[0])[0]))
+        )
+        results: List[Any] = []
+        sample["upload_bulk_ms"] = _ms(
+            _timed(lambda: results.extend(service.upload_many(paths, workers)))
+        )
+        sample["upload_bulk_failed"] = sum(1 for r in results if not r.ok) + (
+            0 if ok[0] else 1
+        )
+        seconds = sample["upload_bulk_ms"] / 1000
+        sample["upload_bulk_mb_per_s"] = round(
+            len(paths) * file_bytes / (1024 * 1024) / seconds if seconds else 0.0, 3
+        )
+    return sample
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    faults = FaultPlan(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        rate_limit=args.rate_limit,
+        retry_after=0.05,
+        seed=args.seed,
+    )
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    runs = max(1, args.runs)
+    report: Dict[str, Any] = {
+        "config": {
+            "sizes": sizes,
+            "stores": args.stores,
+            "runs": runs,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "throttle_rate": args.throttle_rate,
+            "rate_limit": args.rate_limit,
+            "page_size": args.page_size,
+            "per_file_lookups": args.per_file_lookups,
+            "bulk_files": args.bulk_files,
+            "file_bytes": args.file_bytes,
+            "upload_workers": args.upload_workers,
+            "python": sys.version.split()[0],
+        },
+        "sizes": {},
+    }
+    for size in sizes:
+        samples = []
+        for _ in range(runs):
+            service = _service(
+                faults, args.stores, size, args.page_size, args.per_file_lookups
+            )
+            sample, files = measure_listing(service)
+            sample.update(measure_search(service))
+            sample.update(measure_render(files))
+            samples.append(sample)
+        report["sizes"][str(size)] = _median(samples)
+    report["uploads"] = _median(
+        [
+            measure_uploads(
+                faults, args.bulk_files, args.file_bytes, args.upload_workers
+            )
+            for _ in range(runs)
+        ]
+    )
+    failures = []
+    for size, sample in report["sizes"].items():
+        if sample["files_listed"] != int(size):
+            failures.append(
+                f"{size}: {int(size) - int(sample['files_listed'])} arquivo(s) perdido(s)"
+            )
+    if report["uploads"]["upload_bulk_failed"]:
+        failures.append("uploads com falha")
+    report["failures"] = failures
+    return report
+
+
+def compare(
+    report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    # Only timings are compared, and only for sizes present in both runs.
+    regressions = []
+    sections = [
+        (f"sizes.{size}", sample, baseline.get("sizes", {}).get(size))
+        for size, sample in report["sizes"].items()
+    ]
+    sections.append(("uploads", report["uploads"], baseline.get("uploads")))
+    for name, current, previous in sections:
+        if not previous:
+            continue
+        for key, value in current.items():
+            old = previous.get(key)
+            if not key.endswith("_ms") or old is None:
+                continue
+            if value > old * (1 + tolerance) and value - old > NOISE_FLOOR_MS:
+                regressions.append(f"{name}.{key}: {old:.1f} -> {value:.1f} ms")
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Mede listagem, busca, upload e renderização contra um repositório "
+            "simulado, sem rede."
+        )
+    )
+    parser.add_argument(
+        "--sizes",
+        default=DEFAULT_SIZES,
+        help="Arquivos por Vector Store, separados por vírgula.",
+    )
+    parser.add_argument("--stores", type=int, default=DEFAULT_STORES)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS)
+    parser.add_argument("--jitter-ms", type=float, default=DEFAULT_JITTER_MS)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=0.0,
+        help="Requisições por segundo aceitas pelo serviço simulado (0 = sem limite).",
+    )
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument(
+        "--per-file-lookups",
+        action="store_true",
+        help="Resolve cada arquivo com uma chamada, como listagens sem nome.",
+    )
+    parser.add_argument("--bulk-files", type=int, default=DEFAULT_BULK_FILES)
+    parser.add_argument("--file-bytes", type=int, default=DEFAULT_FILE_BYTES)
+    parser.add_argument("--upload-workers", type=int, default=DEFAULT_UPLOAD_WORKERS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Grava o relatório JSON neste arquivo.")
+    parser.add_argument(
+        "--baseline", help="Relatório anterior para detectar regressões."
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    # Retries under injected faults are expected; keep them out of the output.
+    logging.disable(logging.WARNING)
+    report = run(args)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["regressions"] = compare(report, json.load(f), args.tolerance)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    return 1 if report["failures"] or report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Regression budgets, in milliseconds (median over the runs).
+DEFAULT_IMPORT_BUDGET_MS = 600.0
+DEFAULT_FIRST_FRAME_BUDGET_MS = 900.0
+DEFAULT_RUNS = 5
+
+# Modules that must not be loaded before the first frame; they belong to the
+# background connection job.
+DEFERRED_MODULES = (
+    "azure.identity",
+    "azure.ai.projects",
+    "azure.ai.agents",
+    "azure.core.pipeline",
+    "requests",
+    "aiohttp",
+)
+
+FIRST_FRAME_SNIPPET = """
+import json, sys, time
+t0 = time.perf_counter()
+from ui.app import App
+t1 = time.perf_counter()
+app = App()
+app.show_main_menu()
+app.main.render((80, 24))
+t2 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "first_frame_ms": (t2 - t0) * 1000,
+    "deferred_loaded": [m for m in %r if m in sys.modules],
+}))
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    # A syntactically valid endpoint, so App takes the configured path.
+    env["PROJECT_ENDPOINT"] = (
+        "https://example.services.ai.azure.com/api/projects/benchmark"
+    )
+    return env
+
+
+def measure_importtime(module: str = "ui.app") -> List[Tuple[str, int, int]]:
+    # Returns (module, self_us, cumulative_us) from `python -X importtime`.
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=_env(),
+        cwd=ROOT,
+        check=True,
+    )
+    rows: List[Tuple[str, int, int]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure_first_frame() -> Dict[str, object]:
+    # Runs in a scratch directory: App creates logs/, .env and .cache/.
+    with tempfile.TemporaryDirectory() as cwd:
+        result = subprocess.run(
+            [sys.executable, "-c", FIRST_FRAME_SNIPPET % (DEFERRED_MODULES,)],
+            capture_output=True,
+            text=True,
+            env=_env(),
+            cwd=cwd,
+            check=True,
+        )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(runs: int, import_budget_ms: float, first_frame_budget_ms: float) -> Dict:
+    samples = [measure_first_frame() for _ in range(max(1, runs))]
+    imports = measure_importtime()
+    slowest = sorted(
+        (r for r in imports if r[0].count(".") == 0), key=lambda r: -r[2]
+    )[:10]
+    deferred = sorted({m for s in samples for m in s["deferred_loaded"]})
+    report = {
+        "runs": len(samples),
+        "import_ms": statistics.median(s["import_ms"] for s in samples),
+        "first_frame_ms": statistics.median(s["first_frame_ms"] for s in samples),
+        "import_budget_ms": import_budget_ms,
+        "first_frame_budget_ms": first_frame_budget_ms,
+        "deferred_loaded": deferred,
+        "slowest_imports_ms": {
+            name: round(cumulative / 1000, 2) for name, _, cumulative in slowest
+        },
+    }
+    failures = []
+    if report["import_ms"] > import_budget_ms:
+        failures.append("import_ms acima do orçamento")
+    if report["first_frame_ms"] > first_frame_budget_ms:
+        failures.append("first_frame_ms acima do orçamento")
+    if deferred:
+        failures.append(f"módulos carregados antes do primeiro frame: {deferred}")
+    report["failures"] = failures
+    return report
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Mede o tempo de importação e do primeiro frame da TUI."
+    )
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument(
+        "--import-budget-ms", type=float, default=DEFAULT_IMPORT_BUDGET_MS
+    )
+    parser.add_argument(
+        "--first-frame-budget-ms", type=float, default=DEFAULT_FIRST_FRAME_BUDGET_MS
+    )
+    parser.add_argument("--output", help="Grava o relatório JSON neste arquivo.")
+    args = parser.parse_args(argv)
+
+    report = run(args.runs, args.import_budget_ms, args.first_frame_budget_ms)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    return 1 if report["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,630 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import IO, Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from clients.project_client import ProjectClientFactory
+from services.bulk_upload import (
+    DEFAULT_UPLOAD_WORKERS,
+    BulkProgress,
+    UploadResult,
+    expand_source,
+)
+from services.content_index import ContentIndexes
+from services.directory_sync import DETACH, REMOVAL_MODES
+from services.env_service import env_flag, env_number
+from services.fake_inference import FakeStreamingBackend
+from services.filename_index import filter_files
+from services.inference_service import (
+    DEFAULT_API_VERSION,
+    DEFAULT_BATCH_CONCURRENCY,
+    AzureOpenAIBackend,
+    BatchResult,
+    InferenceService,
+    load_prompts,
+)
+from services.metadata_cache import DEFAULT_TTL_SECONDS, MetadataCache
+from services.projects_service import DEFAULT_CONTENT_HITS, ProjectsService
+from services.repository import DEFAULT_FETCH_WORKERS, VectorStoreInfo
+from services.response_cache import (
+    DEFAULT_RESPONSE_CACHE_ENTRIES,
+    DEFAULT_RESPONSE_CACHE_TTL,
+    RESPONSE_CACHE_PATH,
+    ResponseCache,
+)
+from services.resilience import (
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_RATE_LIMIT,
+    Resilience,
+    RetryPolicy,
+    TokenBucket,
+)
+from services.upload_manifest import UploadManifest
+
+# Exit codes, so pipelines can tell "nothing to do" from "retry later".
+EXIT_OK = 0
+EXIT_FAILURE = 1  # the command could not complete
+EXIT_USAGE = 2  # bad arguments (argparse)
+EXIT_CONFIG = 3  # endpoint missing, authentication or connection failed
+EXIT_NOT_FOUND = 4  # vector store or source path not found
+EXIT_PARTIAL = 5  # completed, but some files failed
+EXIT_INTERRUPTED = 130
+
+# Exception types raised by azure.identity/azure.core when the credential
+# chain fails; matched by name so the SDK is not imported up front.
+AUTH_ERRORS = ("ClientAuthenticationError", "CredentialUnavailableError")
+
+
+class CliError(Exception):
+    def __init__(self, message: str, code: int) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+class JsonLinesWriter:
+    # One JSON object per line, flushed right away so consumers see records
+    # as they are produced.
+    def __init__(self, stream: IO[str]) -> None:
+        self.stream = stream
+
+    def emit(self, kind: str, **fields: Any) -> None:
+        record = {"type": kind, **fields}
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+
+def _endpoint(args: argparse.Namespace) -> str:
+    endpoint = args.endpoint or os.environ.get("PROJECT_ENDPOINT")
+    if not endpoint:
+        raise CliError(
+            "PROJECT_ENDPOINT não está definido (use --endpoint ou o .env).",
+            EXIT_CONFIG,
+        )
+    return endpoint
+
+
+def _local_caches(
+    service: ProjectsService, args: argparse.Namespace, endpoint: str
+) -> None:
+    service.set_cache(
+        MetadataCache(
+            ttl_seconds=env_number("METADATA_CACHE_TTL", DEFAULT_TTL_SECONDS, float)
+        ),
+        endpoint,
+    )
+    service.set_manifest(UploadManifest())
+    if env_flag("CONTENT_INDEX", True):
+        # main() closes it, which writes out what is still buffered.
+        args.content_indexes = ContentIndexes()
+        service.set_content_indexes(args.content_indexes)
+
+
+def connect(args: argparse.Namespace) -> Tuple[ProjectClientFactory, ProjectsService]:
+    endpoint = _endpoint(args)
+    factory = ProjectClientFactory(
+        persistent_token_cache=env_flag("TOKEN_CACHE_PERSISTENT"),
+        allow_unencrypted_token_cache=env_flag("TOKEN_CACHE_ALLOW_UNENCRYPTED"),
+    )
+    factory.configure(endpoint)
+    service = ProjectsService()
+    service.set_resilience(
+        Resilience(
+            policy=RetryPolicy(
+                max_attempts=env_number("API_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS, int)
+            ),
+            bucket=TokenBucket(env_number("API_RATE_LIMIT", DEFAULT_RATE_LIMIT, float)),
+        )
+    )
+    if not args.no_cache:
+        _local_caches(service, args, endpoint)
+    try:
+        service.set_client(
+            factory.get(),
+            env_number("FILES_FETCH_WORKERS", DEFAULT_FETCH_WORKERS, int),
+        )
+    except Exception as e:  # noqa: BLE001
+        factory.close()
+        raise CliError(f"Falha ao conectar ao projeto: {e}", EXIT_CONFIG) from e
+    return factory, service
+
+
+def connect_inference(
+    args: argparse.Namespace,
+) -> Tuple[Optional[ProjectClientFactory], InferenceService]:
+    # Evaluation runs must not silently answer from the fake: without a
+    # model it is an error unless --fake (or INFERENCE_FAKE) asks for it.
+    inference = InferenceService()
+    if not args.no_cache:
+        # Persistent by default here: a one-shot process gains nothing from
+        # a memory-only cache, and reruns are the point.
+        inference.set_cache(
+            ResponseCache(
+                max_entries=env_number(
+                    "RESPONSE_CACHE_MAX_ENTRIES", DEFAULT_RESPONSE_CACHE_ENTRIES, int
+                ),
+                ttl_seconds=env_number(
+                    "RESPONSE_CACHE_TTL", DEFAULT_RESPONSE_CACHE_TTL, float
+                ),
+                path=RESPONSE_CACHE_PATH,
+            )
+        )
+    model = args.model or os.environ.get("INFERENCE_MODEL", "").strip()
+    if args.fake or env_flag("INFERENCE_FAKE"):
+        inference.configure(model=model or "fake", backend=FakeStreamingBackend())
+        return None, inference
+    if not model:
+        raise CliError(
+            "INFERENCE_MODEL não está definido (use --model, o .env ou --fake).",
+            EXIT_CONFIG,
+        )
+    endpoint = _endpoint(args)
+    factory = ProjectClientFactory(
+        persistent_token_cache=env_flag("TOKEN_CACHE_PERSISTENT"),
+        allow_unencrypted_token_cache=env_flag("TOKEN_CACHE_ALLOW_UNENCRYPTED"),
+    )
+    factory.configure(endpoint)
+    inference.configure(
+        model=model,
+        backend=AzureOpenAIBackend(
+            factory,
+            api_version=os.environ.get("INFERENCE_API_VERSION") or DEFAULT_API_VERSION,
+        ),
+        endpoint=endpoint,
+    )
+    return factory, inference
+
+
+def connect_local(args: argparse.Namespace) -> Tuple[None, ProjectsService]:
+    # Local caches only: no SDK client, no credential, no network.
+    if args.no_cache:
+        raise CliError("A busca usa o índice local; remova --no-cache.", EXIT_USAGE)
+    service = ProjectsService()
+    _local_caches(service, args, _endpoint(args))
+    return None, service
+
+
+def select_store(
+    service: ProjectsService, store: Optional[str], refresh: bool = False
+) -> VectorStoreInfo:
+    # Accepts an id or an exact name; a name shared by several stores is
+    # refused rather than guessed.
+    store = store or os.environ.get("VECTOR_STORE_NAME")
+    if not store:
+        raise CliError("Informe o Vector Store com --store (ID ou nome).", EXIT_USAGE)
+    stores = (
+        service.cached_vector_stores()
+        if not service.has_client()
+        else list(service.list_vector_stores(refresh))
+    )
+    matches = [vs for vs in stores if vs.id == store] or [
+        vs for vs in stores if vs.name == store
+    ]
+    if not matches:
+        raise CliError(f"Vector Store '{store}' não encontrado.", EXIT_NOT_FOUND)
+    if len(matches) > 1:
+        ids = ", ".join(vs.id for vs in matches)
+        raise CliError(
+            f"Mais de um Vector Store chamado '{store}' ({ids}); use o ID.",
+            EXIT_NOT_FOUND,
+        )
+    service.set_vector_store(matches[0])
+    return matches[0]
+
+
+def cmd_stores(
+    service: ProjectsService, args: argparse.Namespace, out: JsonLinesWriter
+) -> int:
+    count = 0
+    for batch in service.stream_vector_stores(args.refresh):
+        for vs in batch:
+            out.emit("vector_store", id=vs.id, name=vs.name)
+        count += len(batch)
+    out.emit("summary", command="stores", vector_stores=count)
+    return EXIT_OK
+
+
+def cmd_files(
+    service: ProjectsService, args: argparse.Namespace, out: JsonLinesWriter
+) -> int:
+    vs = select_store(service, args.store, args.refresh)
+    query = args.query or ""
+    listed = matched = 0
+    for batch in service.stream_vector_store_files(args.refresh):
+        listed += len(batch)
+        for f in filter_files(batch, query):
+            out.emit("file", id=f.id, filename=f.filename, bytes=f.bytes)
+            matched += 1
+    failed = service.failed_files()
+    for failure in failed:
+        out.emit("fetch_error", file_id=failure.file_id, error=failure.error)
+    out.emit(
+        "summary",
+        command="files",
+        vector_store_id=vs.id,
+        query=query,
+        listed=listed,
+        matched=matched,
+        failed=len(failed),
+    )
+    return EXIT_PARTIAL if failed else EXIT_OK
+
+
+def cmd_search(
+    service: ProjectsService, args: argparse.Namespace, out: JsonLinesWriter
+) -> int:
+    # Offline: ranks the locally indexed text of uploaded files. With a
+    # store (--store or VECTOR_STORE_NAME) only its cached files count.
+    vs = None
+    if args.store or os.environ.get("VECTOR_STORE_NAME"):
+        vs = select_store(service, args.store)
+    query = " ".join(args.query)
+    started = time.perf_counter()
+    hits = service.search_content(query, args.limit)
+    for hit in hits:
+        out.emit(
+            "hit",
+            file_id=hit.file_id,
+            filename=hit.filename,
+            score=round(hit.score, 4),
+            snippet=hit.snippet,
+        )
+    index = service.content_index()
+    out.emit(
+        "summary",
+        command="search",
+        vector_store_id=vs.id if vs else None,
+        query=query,
+        hits=len(hits),
+        documents=len(index) if index is not None else 0,
+        ms=round((time.perf_counter() - started) * 1000, 3),
+    )
+    return EXIT_OK if hits else EXIT_NOT_FOUND
+
+
+def cmd_upload(
+    service: ProjectsService, args: argparse.Namespace, out: JsonLinesWriter
+) -> int:
+    paths: List[str] = []
+    for source in args.sources:
+        expanded = expand_source(source)
+        if not expanded:
+            raise CliError(f"Nenhum arquivo encontrado em '{source}'.", EXIT_NOT_FOUND)
+        paths.extend(expanded)
+    vs = select_store(service, args.store, args.refresh)
+
+    def on_progress(progress: BulkProgress) -> None:
+        out.emit(
+            "progress",
+            phase=progress.phase,
+            done=progress.done,
+            total=progress.total,
+            failed=progress.failed,
+            bytes_done=progress.bytes_done,
+            elapsed_seconds=round(progress.elapsed(), 3),
+        )
+
+    results = service.upload_many(
+        paths,
+        max_workers=args.workers,
+        on_progress=on_progress if args.progress else None,
+    )
+    for result in results:
+        out.emit("upload", **_upload_record(result))
+    failed = sum(1 for r in results if not r.ok)
+    out.emit(
+        "summary",
+        command="upload",
+        vector_store_id=vs.id,
+        files=len(results),
+        uploaded=sum(1 for r in results if r.ok and r.action == "upload"),
+        failed=failed,
+        bytes=sum(r.bytes for r in results if r.ok and r.action == "upload"),
+    )
+    return EXIT_PARTIAL if failed else EXIT_OK
+
+
+def cmd_sync(
+    service: ProjectsService, args: argparse.Namespace, out: JsonLinesWriter
+) -> int:
+    if not os.path.isdir(args.directory):
+        raise CliError(f"Diretório não encontrado: {args.directory}", EXIT_NOT_FOUND)
+    if args.no_cache:
+        raise CliError(
+            "A sincronização usa o manifesto local; remova --no-cache.", EXIT_USAGE
+        )
+    vs = select_store(service, args.store, args.refresh)
+
+    def on_progress(progress: BulkProgress) -> None:
+        out.emit(
+            "progress",
+            phase=progress.phase,
+            done=progress.done,
+            total=progress.total,
+            failed=progress.failed,
+            bytes_done=progress.bytes_done,
+            elapsed_seconds=round(progress.elapsed(), 3),
+        )
+
+    report = service.sync_directory(
+        args.directory,
+        dry_run=args.dry_run,
+        removal=args.removal,
+        max_workers=args.workers,
+        on_progress=on_progress if args.progress else None,
+    )
+    plan = report.plan
+    if report.dry_run:
+        for action, files in (("new", plan.new), ("changed", plan.changed)):
+            for f in files:
+                out.emit("plan", action=action, path=f.rel_path, bytes=f.size)
+        for entry in plan.removed:
+            out.emit(
+                "plan", action="removed", path=entry.rel_path, file_id=entry.file_id
+            )
+    for result in report.results:
+        out.emit("upload", **_upload_record(result))
+    for error in report.errors:
+        out.emit("remove_error", error=error)
+    out.emit(
+        "summary",
+        command="sync",
+        vector_store_id=vs.id,
+        root=plan.root,
+        dry_run=report.dry_run,
+        removal=report.removal,
+        new=len(plan.new),
+        changed=len(plan.changed),
+        removed=len(plan.removed),
+        unchanged=plan.unchanged,
+        uploaded=sum(1 for r in report.results if r.ok and r.action == "upload"),
+        removed_remote=report.removed,
+        failed=report.failed(),
+        seconds=round(report.seconds, 3),
+    )
+    return EXIT_PARTIAL if report.failed() else EXIT_OK
+
+
+def cmd_infer(
+    inference: InferenceService, args: argparse.Namespace, out: JsonLinesWriter
+) -> int:
+    if args.prompts == "-":
+        prompts = [line.rstrip("\n") for line in sys.stdin if line.strip()]
+    elif not os.path.isfile(args.prompts):
+        raise CliError(f"Arquivo não encontrado: {args.prompts}", EXIT_NOT_FOUND)
+    else:
+        prompts = load_prompts(args.prompts)
+    if not prompts:
+        raise CliError("Nenhum prompt informado.", EXIT_USAGE)
+    params: Dict[str, Any] = {}
+    if args.temperature is not None:
+        params["temperature"] = args.temperature
+    if args.max_tokens is not None:
+        params["max_tokens"] = args.max_tokens
+    done = 0
+
+    def on_result(result: BatchResult) -> None:
+        nonlocal done
+        done += 1
+        out.emit("progress", done=done, total=len(prompts), index=result.index)
+
+    async def run() -> List[BatchResult]:
+        # The async clients belong to this event loop; close them in it.
+        try:
+            return await inference.arun_batch(
+                prompts,
+                max_concurrency=args.concurrency,
+                params=params or None,
+                on_result=on_result if args.progress else None,
+            )
+        finally:
+            await inference.aclose()
+            if args.factory is not None:
+                await args.factory.aclose()
+
+    results = asyncio.run(run())
+    for r in results:
+        out.emit(
+            "response",
+            index=r.index,
+            prompt=r.prompt,
+            ok=r.ok,
+            response=r.response if r.ok else None,
+            error=r.error,
+            cached=r.cached,
+            seconds=round(r.seconds, 3),
+        )
+    failed = sum(1 for r in results if not r.ok)
+    cache = inference.cache
+    out.emit(
+        "summary",
+        command="infer",
+        model=inference.model,
+        prompts=len(results),
+        failed=failed,
+        cached=sum(1 for r in results if r.cached),
+        cache=cache.stats() if cache is not None else None,
+    )
+    return EXIT_PARTIAL if failed else EXIT_OK
+
+
+def _upload_record(result: UploadResult) -> Dict[str, Any]:
+    return {
+        "path": result.path,
+        "ok": result.ok,
+        "action": result.action,
+        "file_id": result.file_id,
+        "bytes": result.bytes,
+        "seconds": round(result.seconds, 3),
+        "error": result.error,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    # Shared options are accepted after the subcommand too, which is where
+    # scripts tend to put them.
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--endpoint", help="Sobrepõe o PROJECT_ENDPOINT do .env.")
+    common.add_argument(
+        "--refresh", action="store_true", help="Ignora o cache de metadados."
+    )
+    common.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=(
+            "Não lê nem grava os caches locais (metadados, manifesto de uploads "
+            "e respostas do modelo)."
+        ),
+    )
+    common.add_argument(
+        "-v", "--verbose", action="store_true", help="Log detalhado em stderr."
+    )
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description=(
+            "Operações em lote sem interface: cada resultado é uma linha JSON "
+            "na saída padrão."
+        ),
+    )
+    parser.set_defaults(connect=connect)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stores = commands.add_parser(
+        "stores", parents=[common], help="Lista os Vector Stores."
+    )
+    stores.set_defaults(handler=cmd_stores)
+
+    files = commands.add_parser(
+        "files", parents=[common], help="Lista ou busca arquivos de um Vector Store."
+    )
+    files.add_argument("--store", help="ID ou nome (padrão: VECTOR_STORE_NAME).")
+    files.add_argument("--query", help="Filtra pelo nome do arquivo.")
+    files.set_defaults(handler=cmd_files)
+
+    search = commands.add_parser(
+        "search",
+        parents=[common],
+        help="Busca no conteúdo dos arquivos enviados (índice local, sem rede).",
+    )
+    search.add_argument("query", nargs="+", help="Termos; prefixo* também vale.")
+    search.add_argument("--store", help="ID ou nome (padrão: VECTOR_STORE_NAME).")
+    search.add_argument("--limit", type=int, default=DEFAULT_CONTENT_HITS)
+    search.set_defaults(handler=cmd_search, connect=connect_local)
+
+    upload = commands.add_parser(
+        "upload",
+        parents=[common],
+        help="Envia arquivos, diretórios ou globs e anexa ao Vector Store.",
+    )
+    upload.add_argument("sources", nargs="+")
+    upload.add_argument("--store", help="ID ou nome (padrão: VECTOR_STORE_NAME).")
+    upload.add_argument(
+        "--workers",
+        type=int,
+        default=env_number("BULK_UPLOAD_WORKERS", DEFAULT_UPLOAD_WORKERS, int),
+    )
+    upload.add_argument(
+        "--progress", action="store_true", help="Emite registros de progresso."
+    )
+    upload.set_defaults(handler=cmd_upload)
+
+    sync = commands.add_parser(
+        "sync",
+        parents=[common],
+        help="Espelha um diretório no Vector Store (só envia o que mudou).",
+    )
+    sync.add_argument("directory")
+    sync.add_argument("--store", help="ID ou nome (padrão: VECTOR_STORE_NAME).")
+    sync.add_argument(
+        "--dry-run", action="store_true", help="Só mostra o que seria feito."
+    )
+    sync.add_argument(
+        "--removal",
+        choices=REMOVAL_MODES,
+        default=DETACH,
+        help="O que fazer com arquivos removidos ou substituídos localmente.",
+    )
+    sync.add_argument(
+        "--workers",
+        type=int,
+        default=env_number("BULK_UPLOAD_WORKERS", DEFAULT_UPLOAD_WORKERS, int),
+    )
+    sync.add_argument(
+        "--progress", action="store_true", help="Emite registros de progresso."
+    )
+    sync.set_defaults(handler=cmd_sync)
+
+    infer = commands.add_parser(
+        "infer",
+        parents=[common],
+        help="Envia um lote de prompts ao modelo, com cache de respostas.",
+    )
+    infer.add_argument(
+        "prompts",
+        nargs="?",
+        default="-",
+        help="Arquivo com um prompt por linha, ou .jsonl (padrão: stdin).",
+    )
+    infer.add_argument("--model", help="Sobrepõe o INFERENCE_MODEL do .env.")
+    infer.add_argument(
+        "--fake", action="store_true", help="Usa o backend simulado, sem rede."
+    )
+    infer.add_argument(
+        "--concurrency",
+        type=int,
+        default=env_number("INFERENCE_CONCURRENCY", DEFAULT_BATCH_CONCURRENCY, int),
+        help="Requisições simultâneas ao modelo.",
+    )
+    infer.add_argument("--temperature", type=float)
+    infer.add_argument("--max-tokens", type=int)
+    infer.add_argument(
+        "--progress", action="store_true", help="Emite registros de progresso."
+    )
+    infer.set_defaults(handler=cmd_infer, connect=connect_inference)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    load_dotenv()
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        stream=sys.stderr,
+    )
+    logging.getLogger("azure").setLevel(logging.WARNING)
+    out = JsonLinesWriter(sys.stdout)
+    factory: Optional[ProjectClientFactory] = None
+    try:
+        factory, target = args.connect(args)
+        args.factory = factory
+        return args.handler(target, args, out)
+    except CliError as e:
+        out.emit("error", message=str(e), exit_code=e.code)
+        return e.code
+    except KeyboardInterrupt:
+        out.emit("error", message="Interrompido.", exit_code=EXIT_INTERRUPTED)
+        return EXIT_INTERRUPTED
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`); nothing left to report.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return EXIT_FAILURE
+    except Exception as e:  # noqa: BLE001
+        code = EXIT_CONFIG if type(e).__name__ in AUTH_ERRORS else EXIT_FAILURE
+        out.emit("error", message=str(e), exit_code=code)
+        return code
+    finally:
+        if factory is not None:
+            factory.close()
+        if getattr(args, "content_indexes", None) is not None:
+            args.content_indexes.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from services.metrics import METRICS
+
+if TYPE_CHECKING:
+    from azure.core.credentials import AccessToken
+    from azure.identity import DefaultAzureCredential
+
+TOKEN_CACHE_NAME = "foundrytoys"
+# Tokens closer than this to expiry are refreshed instead of reused.
+TOKEN_REFRESH_MARGIN_SECONDS = 300
+
+_TokenKey = Tuple[Tuple[str, ...], Optional[str], Optional[str], bool]
+
+
+def build_default_credential(
+    persistent_cache: bool = False, allow_unencrypted: bool = False
+) -> "DefaultAzureCredential":
+    # azure.identity is imported here so that importing this module (and the
+    # UI on top of it) stays cheap.
+    from azure.identity import DefaultAzureCredential
+
+    kwargs: Dict[str, Any] = {"exclude_interactive_browser_credential": False}
+    if persistent_cache:
+        from azure.identity import TokenCachePersistenceOptions
+
+        # Forwarded by the chain to the credentials that support it
+        # (interactive browser, shared cache, managed identity).
+        kwargs["cache_persistence_options"] = TokenCachePersistenceOptions(
+            name=TOKEN_CACHE_NAME, allow_unencrypted_storage=allow_unencrypted
+        )
+    return DefaultAzureCredential(**kwargs)
+
+
+class SharedCredential:
+    # One credential per endpoint, shared by the sync client, the async
+    # client and the Graph lookup. Tokens are reused per scope until close
+    # to expiry, so the credential chain is only probed once.
+    def __init__(self, credential: Any) -> None:
+        self._credential = credential
+        self._tokens: Dict[_TokenKey, "AccessToken"] = {}
+        self._lock = threading.Lock()
+        self.created_at = time.monotonic()
+        self.first_token_at: Optional[float] = None
+        self.first_token_seconds: Optional[float] = None
+        self.token_requests = 0
+        self.token_hits = 0
+
+    def cached_token(self, *scopes: str, **kwargs: Any) -> Optional["AccessToken"]:
+        if kwargs.get("claims"):
+            # A claims challenge always needs a fresh token.
+            return None
+        token = self._tokens.get(_token_key(scopes, kwargs))
+        if (
+            token is None
+            or token.expires_on - time.time() < TOKEN_REFRESH_MARGIN_SECONDS
+        ):
+            return None
+        return token
+
+    def get_token(self, *scopes: str, **kwargs: Any) -> "AccessToken":
+        key = _token_key(scopes, kwargs)
+        with self._lock:
+            # Concurrent callers wait for the first acquisition instead of
+            # each running the whole chain.
+            self.token_requests += 1
+            token = self.cached_token(*scopes, **kwargs)
+            if token is not None:
+                self.token_hits += 1
+                METRICS.count("auth.token.cache_hits")
+                return token
+            started = time.monotonic()
+            with METRICS.timer("auth.token.get"):
+                token = self._credential.get_token(*scopes, **kwargs)
+            self._tokens[key] = token
+            if self.first_token_at is None:
+                self.first_token_at = time.monotonic()
+                self.first_token_seconds = self.first_token_at - started
+                logging.info(
+                    "Primeiro token obtido em "
+                    f"{self.first_token_seconds:.2f}s "
+                    f"({self.first_token_at - self.created_at:.2f}s após a criação da credencial)"
+                )
+            return token
+
+    def close(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+        close = getattr(self._credential, "close", None)
+        if close is not None:
+            close()
+
+    def __enter__(self) -> "SharedCredential":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class AsyncSharedCredential:
+    # Async view of a SharedCredential for the aio clients. Cached tokens are
+    # returned without leaving the event loop; misses go to a worker thread.
+    def __init__(self, shared: SharedCredential) -> None:
+        self._shared = shared
+
+    async def get_token(self, *scopes: str, **kwargs: Any) -> "AccessToken":
+        token = self._shared.cached_token(*scopes, **kwargs)
+        if token is not None:
+            self._shared.token_requests += 1
+            self._shared.token_hits += 1
+            METRICS.count("auth.token.cache_hits")
+            return token
+        return await asyncio.to_thread(self._shared.get_token, *scopes, **kwargs)
+
+    async def close(self) -> None:
+        # The underlying credential belongs to the factory.
+        pass
+
+    async def __aenter__(self) -> "AsyncSharedCredential":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+
+def _token_key(scopes: Tuple[str, ...], kwargs: Dict[str, Any]) -> _TokenKey:
+    return (
+        tuple(sorted(scopes)),
+        kwargs.get("claims"),
+        kwargs.get("tenant_id"),
+        bool(kwargs.get("enable_cae", False)),
+    )
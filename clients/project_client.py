@@ -1,102 +1,376 @@
+import json
 import logging
-from typing import Optional, Tuple
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-from azure.ai.projects import AIProjectClient
-from azure.identity import DefaultAzureCredential
+from clients.credentials import (
+    AsyncSharedCredential,
+    SharedCredential,
+    build_default_credential,
+)
+from services.metrics import METRICS
+
+if TYPE_CHECKING:
+    from azure.ai.projects import AIProjectClient
+
+    from clients.transport import SharedTransports
+
+USER_INFO_CACHE_PATH = os.path.join(".cache", "user_info.json")
+DEFAULT_USER_INFO_TTL_SECONDS = 24 * 60 * 60
+GRAPH_ME_URL = (
+    "https://graph.microsoft.com/v1.0/me"
+    "?$select=displayName,givenName,companyName,userPrincipalName"
+)
+GRAPH_ORG_URL = "https://graph.microsoft.com/v1.0/organization"
+GRAPH_SCOPE = "https://graph.microsoft.com/.default"
+PROJECT_SCOPE = "https://ai.azure.com/.default"
+# Clients of endpoints other than the current one are closed after this
+# long without use; 0 keeps them for the whole session.
+DEFAULT_POOL_IDLE_SECONDS = 30 * 60
+
+# (resolved_at, user_name, organization)
+_UserInfoEntry = Tuple[float, Optional[str], Optional[str]]
+
+
+def _graph_get(url: str, headers: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    import requests
+
+    response = requests.get(url, headers=headers, timeout=5)
+    if response.status_code != 200:
+        return None
+    return response.json()
+
+
+@dataclass
+class PooledClients:
+    endpoint: str
+    client: Optional["AIProjectClient"] = None
+    async_client: Any = None
+    async_credential: Any = None
+    last_used: float = field(default_factory=time.monotonic)
+    warmed: bool = False
 
 
 class ProjectClientFactory:
-    def __init__(self) -> None:
-        self._client: Optional[AIProjectClient] = None
+    # A pool of project clients keyed by endpoint. configure() only picks
+    # the current endpoint, so switching back and forth between projects
+    # reuses their clients, credentials and cached tokens, and all clients
+    # share one HTTP session per flavour (sync/async).
+    def __init__(
+        self,
+        user_info_path: str = USER_INFO_CACHE_PATH,
+        user_info_ttl: float = DEFAULT_USER_INFO_TTL_SECONDS,
+        persistent_token_cache: bool = False,
+        allow_unencrypted_token_cache: bool = False,
+    ) -> None:
+        self._user_info_path = user_info_path
+        self._user_info_ttl = user_info_ttl
+        self._persistent_token_cache = persistent_token_cache
+        self._allow_unencrypted_token_cache = allow_unencrypted_token_cache
+        self._user_info: Dict[str, _UserInfoEntry] = {}
+        self._credentials: Dict[str, SharedCredential] = {}
+        self._configured_at: Dict[str, float] = {}
+        self._pool: Dict[str, PooledClients] = {}
+        self._transports: Optional["SharedTransports"] = None
+        # Guards the pool and credentials: clients are built from job
+        # threads and the UI loop alike.
+        self._lock = threading.RLock()
         self._endpoint: Optional[str] = None
 
     def configure(self, endpoint: str) -> None:
         self._endpoint = endpoint
-        self._client = None
+        self._configured_at.setdefault(endpoint, time.monotonic())
 
-    def get(self) -> AIProjectClient:
-        if not self._endpoint:
+    def _current(self, endpoint: Optional[str] = None) -> str:
+        endpoint = endpoint or self._endpoint
+        if not endpoint:
             raise RuntimeError("PROJECT_ENDPOINT não está configurado.")
-        if self._client is None:
-            cred = DefaultAzureCredential(exclude_interactive_browser_credential=False)
-            self._client = AIProjectClient(endpoint=self._endpoint, credential=cred)
-        return self._client
+        return endpoint
+
+    def _entry(self, endpoint: str) -> PooledClients:
+        entry = self._pool.get(endpoint)
+        if entry is None:
+            entry = self._pool[endpoint] = PooledClients(endpoint)
+        entry.last_used = time.monotonic()
+        return entry
+
+    def _shared_transports(self) -> "SharedTransports":
+        if self._transports is None:
+            from clients.transport import SharedTransports
+
+            self._transports = SharedTransports()
+        return self._transports
+
+    def credential(self, endpoint: Optional[str] = None) -> SharedCredential:
+        # Kept across reconfigures, so switching back to an endpoint reuses
+        # its already-probed chain and cached tokens.
+        endpoint = self._current(endpoint)
+        with self._lock:
+            return self._credential(endpoint)
+
+    def _credential(self, endpoint: str) -> SharedCredential:
+        cred = self._credentials.get(endpoint)
+        if cred is None:
+            cred = SharedCredential(
+                build_default_credential(
+                    persistent_cache=self._persistent_token_cache,
+                    allow_unencrypted=self._allow_unencrypted_token_cache,
+                )
+            )
+            self._credentials[endpoint] = cred
+        return cred
+
+    def warm_up(self, endpoint: Optional[str] = None) -> None:
+        # Builds both clients and acquires the project token up front, so the
+        # first real call does not pay for the SDK imports or the chain probe.
+        endpoint = self._current(endpoint)
+        with METRICS.timer("auth.warm_up"):
+            self.get(endpoint)
+            self.get_async(endpoint)
+            self.credential(endpoint).get_token(PROJECT_SCOPE)
+        with self._lock:
+            self._entry(endpoint).warmed = True
+
+    def is_warm(self, endpoint: str) -> bool:
+        entry = self._pool.get(endpoint)
+        return entry is not None and entry.warmed
+
+    def pooled_endpoints(self) -> List[str]:
+        with self._lock:
+            return list(self._pool)
+
+    def auth_metrics(self) -> Dict[str, Optional[float]]:
+        # Time from configure() to the first token is the cold-start cost of
+        # the first authenticated call (chain probe + token acquisition).
+        metrics: Dict[str, Optional[float]] = {
+            "time_to_first_token_seconds": None,
+            "first_token_seconds": None,
+            "token_requests": 0,
+            "token_cache_hits": 0,
+        }
+        cred = self._credentials.get(self._endpoint or "")
+        if cred is None:
+            return metrics
+        configured_at = self._configured_at.get(self._endpoint or "", cred.created_at)
+        if cred.first_token_at is not None:
+            metrics["time_to_first_token_seconds"] = cred.first_token_at - configured_at
+        metrics["first_token_seconds"] = cred.first_token_seconds
+        metrics["token_requests"] = cred.token_requests
+        metrics["token_cache_hits"] = cred.token_hits
+        return metrics
+
+    def get(self, endpoint: Optional[str] = None) -> "AIProjectClient":
+        endpoint = self._current(endpoint)
+        with self._lock:
+            entry = self._entry(endpoint)
+            if entry.client is None:
+                with METRICS.timer("auth.client.create"):
+                    from azure.ai.projects import AIProjectClient
+
+                    entry.client = AIProjectClient(
+                        endpoint=endpoint,
+                        credential=self._credential(endpoint),
+                        transport=self._shared_transports().sync(),
+                    )
+            return entry.client
+
+    def get_async(self, endpoint: Optional[str] = None) -> Any:
+        endpoint = self._current(endpoint)
+        with self._lock:
+            entry = self._entry(endpoint)
+            if entry.async_client is None:
+                with METRICS.timer("auth.async_client.create"):
+                    from azure.ai.projects.aio import (
+                        AIProjectClient as AsyncAIProjectClient,
+                    )
+
+                    entry.async_credential = AsyncSharedCredential(
+                        self._credential(endpoint)
+                    )
+                    entry.async_client = AsyncAIProjectClient(
+                        endpoint=endpoint,
+                        credential=entry.async_credential,
+                        transport=self._shared_transports().async_(),
+                    )
+            return entry.async_client
 
-    def get_user_info(self) -> Tuple[Optional[str], Optional[str]]:
+    def _take_idle(self, max_idle_seconds: float) -> List[PooledClients]:
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                e
+                for e in self._pool.values()
+                if e.endpoint != self._endpoint
+                and now - e.last_used >= max_idle_seconds
+            ]
+            for entry in idle:
+                del self._pool[entry.endpoint]
+        return idle
+
+    async def aevict_idle(
+        self, max_idle_seconds: float = DEFAULT_POOL_IDLE_SECONDS
+    ) -> List[str]:
+        # Closes the clients of endpoints unused for max_idle_seconds (never
+        # the current one). Credentials and their tokens stay, so coming
+        # back only rebuilds the clients.
+        if max_idle_seconds <= 0:
+            return []
+        idle = self._take_idle(max_idle_seconds)
+        for entry in idle:
+            await _close_entry(entry)
+        if idle:
+            METRICS.count("auth.pool.evictions", len(idle))
+        return [e.endpoint for e in idle]
+
+    async def aclose(self) -> None:
+        with self._lock:
+            entries = list(self._pool.values())
+            self._pool.clear()
+        for entry in entries:
+            await _close_entry(entry)
+        if self._transports is not None:
+            await self._transports.aclose()
+
+    def close(self) -> None:
+        with self._lock:
+            credentials = list(self._credentials.values())
+            self._credentials.clear()
+            transports, self._transports = self._transports, None
+        for cred in credentials:
+            cred.close()
+        if transports is not None:
+            transports.close()
+
+    def cached_user_info(self) -> Tuple[Optional[str], Optional[str]]:
+        # Never touches the network: memory first, then the disk cache.
         if not self._endpoint:
             return None, None
+        cached = self._user_info.get(self._endpoint)
+        if cached is None:
+            cached = self._read_user_info_cache(self._endpoint)
+            if cached is not None:
+                self._user_info[self._endpoint] = cached
+        if cached is None:
+            return None, None
+        return cached[1], cached[2]
+
+    def user_info_fresh(self) -> bool:
+        if not self._endpoint:
+            return True
+        self.cached_user_info()
+        cached = self._user_info.get(self._endpoint)
+        return cached is not None and time.time() - cached[0] < self._user_info_ttl
 
+    def get_user_info(
+        self, refresh: bool = False
+    ) -> Tuple[Optional[str], Optional[str]]:
+        if not self._endpoint:
+            return None, None
+        if not refresh and self.user_info_fresh():
+            return self.cached_user_info()
+        endpoint = self._endpoint
         try:
-            cred = DefaultAzureCredential(exclude_interactive_browser_credential=False)
+            with METRICS.timer("auth.user_info.resolve"):
+                user_name, organization = self._resolve_user_info(endpoint)
+        except Exception as e:  # noqa: BLE001
+            logging.warning(f"Não foi possível obter informações do usuário: {e}")
+            return self.cached_user_info()
+        entry = (time.time(), user_name, organization)
+        self._user_info[endpoint] = entry
+        self._write_user_info_cache(endpoint, entry)
+        return user_name, organization
 
-            organization = None
-            user_name = None
+    def _resolve_user_info(self, endpoint: str) -> Tuple[Optional[str], Optional[str]]:
+        cred = self.credential(endpoint)
 
-            try:
-                access_token = cred.get_token("https://graph.microsoft.com/.default")
-                if access_token:
-                    import requests
+        organization = None
+        user_name = None
+
+        try:
+            access_token = cred.get_token(GRAPH_SCOPE)
+            if access_token:
+                headers = {"Authorization": f"Bearer {access_token.token}"}
+                # The profile and organization queries are independent, so
+                # they run side by side instead of one after the other.
+                with ThreadPoolExecutor(max_workers=2) as pool:
+                    me_future = pool.submit(_graph_get, GRAPH_ME_URL, headers)
+                    org_future = pool.submit(_graph_get, GRAPH_ORG_URL, headers)
+                    user_data = me_future.result() or {}
+                    org_data = org_future.result() or {}
 
-                    headers = {"Authorization": f"Bearer {access_token.token}"}
+                user_name = user_data.get("displayName") or user_data.get("givenName")
+                organization = user_data.get("companyName")
 
-                    user_response = requests.get(
-                        "https://graph.microsoft.com/v1.0/me",
-                        headers=headers,
-                        timeout=5,
+                if not organization and org_data.get("value"):
+                    org_info = org_data["value"][0]
+                    organization = (
+                        org_info.get("displayName")
+                        or org_info.get("name")
+                        or org_info.get("tenantDisplayName")
                     )
-                    if user_response.status_code == 200:
-                        user_data = user_response.json()
-                        user_name = user_data.get("displayName") or user_data.get(
-                            "givenName"
-                        )
-
-                        if user_data.get("companyName"):
-                            organization = user_data.get("companyName")
-
-                    if not organization:
-                        org_response = requests.get(
-                            "https://graph.microsoft.com/v1.0/organization",
-                            headers=headers,
-                            timeout=5,
-                        )
-                        if org_response.status_code == 200:
-                            org_data = org_response.json()
-                            if org_data.get("value") and len(org_data["value"]) > 0:
-                                org_info = org_data["value"][0]
-                                organization = (
-                                    org_info.get("displayName")
-                                    or org_info.get("name")
-                                    or org_info.get("tenantDisplayName")
-                                )
-
-                    if not organization:
-                        tenant_response = requests.get(
-                            "https://graph.microsoft.com/v1.0/me?$select=userPrincipalName",
-                            headers=headers,
-                            timeout=5,
-                        )
-                        if tenant_response.status_code == 200:
-                            tenant_data = tenant_response.json()
-                            upn = tenant_data.get("userPrincipalName", "")
-                            if "@" in upn:
-                                domain = upn.split("@")[1]
-                                if not domain.endswith(".onmicrosoft.com"):
-                                    organization = domain.split(".")[0].title()
-
-            except Exception:
-                pass
-
-            if not organization and "/resourceGroups/" in self._endpoint:
-                parts = self._endpoint.split("/")
-                if "subscriptions" in parts:
-                    subscription_id = parts[parts.index("subscriptions") + 1][:8]
-                    organization = f"Subscription {subscription_id}"
-
-            return user_name, organization
-
-        except Exception as e:
-            logging.warning(f"Não foi possível obter informações do usuário: {e}")
-            return None, None
+
+                if not organization:
+                    upn = user_data.get("userPrincipalName", "")
+                    if "@" in upn:
+                        domain = upn.split("@")[1]
+                        if not domain.endswith(".onmicrosoft.com"):
+                            organization = domain.split(".")[0].title()
+
+        except Exception:
+            pass
+
+        if not organization and "/resourceGroups/" in endpoint:
+            parts = endpoint.split("/")
+            if "subscriptions" in parts:
+                subscription_id = parts[parts.index("subscriptions") + 1][:8]
+                organization = f"Subscription {subscription_id}"
+
+        return user_name, organization
+
+    def _read_user_info_cache(self, endpoint: str) -> Optional[_UserInfoEntry]:
+        try:
+            with open(self._user_info_path, "r", encoding="utf-8") as f:
+                data = json.load(f).get(endpoint)
+        except (OSError, ValueError):
+            return None
+        if not data:
+            return None
+        return data["resolved_at"], data.get("user_name"), data.get("organization")
+
+    def _write_user_info_cache(self, endpoint: str, entry: _UserInfoEntry) -> None:
+        try:
+            try:
+                with open(self._user_info_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            data[endpoint] = {
+                "resolved_at": entry[0],
+                "user_name": entry[1],
+                "organization": entry[2],
+            }
+            parent = os.path.dirname(self._user_info_path)
+            if parent and not os.path.exists(parent):
+                os.makedirs(parent)
+            tmp_path = f"{self._user_info_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self._user_info_path)
+        except OSError as e:
+            logging.warning(f"Não foi possível gravar o cache do usuário: {e}")
 
     def endpoint(self) -> Optional[str]:
         return self._endpoint
+
+
+async def _close_entry(entry: PooledClients) -> None:
+    if entry.client is not None:
+        entry.client.close()
+    if entry.async_client is not None:
+        await entry.async_client.close()
+    if entry.async_credential is not None:
+        await entry.async_credential.close()
@@ -0,0 +1,62 @@
+from typing import Any, Optional
+
+from azure.core.pipeline.transport import (
+    AioHttpTransport,
+    AsyncHttpTransport,
+    RequestsTransport,
+)
+
+# Imported only when the first client is built, like the SDK itself.
+
+
+class SharedTransports:
+    # One HTTP session for every sync client and one for every async
+    # client, whatever their endpoint, so connections (and TLS sessions)
+    # to the same host are reused across projects. Clients never close
+    # them; the pool does, on shutdown.
+    def __init__(self) -> None:
+        import requests
+
+        self._session = requests.Session()
+        self._async: Optional[AioHttpTransport] = None
+
+    def sync(self) -> RequestsTransport:
+        return RequestsTransport(session=self._session, session_owner=False)
+
+    def async_(self) -> AsyncHttpTransport:
+        # The aiohttp session needs a running loop, so the shared transport
+        # creates it on its first request rather than here.
+        if self._async is None:
+            self._async = AioHttpTransport()
+        return _BorrowedAsyncTransport(self._async)
+
+    def close(self) -> None:
+        self._session.close()
+
+    async def aclose(self) -> None:
+        transport, self._async = self._async, None
+        if transport is not None:
+            await transport.close()
+
+
+class _BorrowedAsyncTransport(AsyncHttpTransport):
+    # Lends the shared transport to one client; closing the client leaves
+    # the shared session open for the others.
+    def __init__(self, inner: AioHttpTransport) -> None:
+        self._inner = inner
+
+    async def __aenter__(self) -> "_BorrowedAsyncTransport":
+        await self._inner.open()
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        pass
+
+    async def open(self) -> None:
+        await self._inner.open()
+
+    async def close(self) -> None:
+        pass
+
+    async def send(self, request: Any, **kwargs: Any) -> Any:
+        return await self._inner.send(request, **kwargs)
@@ -0,0 +1,148 @@
+import copy
+import glob
+import json
+import logging
+import os
+import queue
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Optional
+
+LOG_DIR = "logs"
+LOG_NAME = "rag_management"
+DEFAULT_LOG_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_LOG_BACKUPS = 5
+DEFAULT_LOG_ROTATE_HOURS = 24
+DEFAULT_LOG_RETENTION_DAYS = 14
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+
+class JsonLinesFormatter(logging.Formatter):
+    # One JSON object per record, for jq or a log shipper.
+    def format(self, record: logging.LogRecord) -> str:
+        data: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+
+class RotatingLogHandler(RotatingFileHandler):
+    # Rolls over when the file reaches max_bytes or when it has been
+    # written to for rotate_seconds, whichever comes first. Rotated files
+    # beyond backup_count or older than retention_seconds are deleted.
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = DEFAULT_LOG_MAX_BYTES,
+        backup_count: int = DEFAULT_LOG_BACKUPS,
+        rotate_seconds: float = DEFAULT_LOG_ROTATE_HOURS * 3600,
+        retention_seconds: float = DEFAULT_LOG_RETENTION_DAYS * 86400,
+    ) -> None:
+        super().__init__(
+            path,
+            maxBytes=max(0, max_bytes),
+            backupCount=max(1, backup_count),
+            encoding="utf-8",
+        )
+        self.rotate_seconds = rotate_seconds
+        self.retention_seconds = retention_seconds
+        self._opened_at = time.time()
+        # A file left by a session that ended long ago starts a new one.
+        if (
+            rotate_seconds > 0
+            and self.stream.tell() > 0
+            and time.time() - os.path.getmtime(self.baseFilename) >= rotate_seconds
+        ):
+            self.doRollover()
+        else:
+            self.prune()
+
+    def shouldRollover(self, record: logging.LogRecord) -> int:
+        if (
+            self.rotate_seconds > 0
+            and time.time() - self._opened_at >= self.rotate_seconds
+            and self.stream is not None
+            and self.stream.tell() > 0
+        ):
+            return 1
+        return super().shouldRollover(record)
+
+    def doRollover(self) -> None:
+        super().doRollover()
+        self._opened_at = time.time()
+        self.prune()
+
+    def prune(self) -> None:
+        # Also sweeps the per-launch files older versions left behind.
+        if self.retention_seconds <= 0:
+            return
+        directory = os.path.dirname(self.baseFilename)
+        name = os.path.splitext(os.path.basename(self.baseFilename))[0]
+        cutoff = time.time() - self.retention_seconds
+        for path in glob.glob(os.path.join(directory, f"{name}*")):
+            if path == self.baseFilename:
+                continue
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+class LogQueueHandler(QueueHandler):
+    # Merges the arguments and renders the traceback in the calling thread,
+    # while the objects are still alive, but leaves the layout to the file
+    # handler's formatter.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def start_logging(
+    directory: str = LOG_DIR,
+    level: int = logging.INFO,
+    json_lines: bool = False,
+    max_bytes: int = DEFAULT_LOG_MAX_BYTES,
+    backup_count: int = DEFAULT_LOG_BACKUPS,
+    rotate_hours: float = DEFAULT_LOG_ROTATE_HOURS,
+    retention_days: float = DEFAULT_LOG_RETENTION_DAYS,
+) -> QueueListener:
+    # The root logger only enqueues records; a listener thread formats and
+    # writes them, so callers on the UI loop never wait on the disk. The
+    # caller stops the returned listener on exit to flush what is queued.
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    suffix = ".jsonl" if json_lines else ".log"
+    handler = RotatingLogHandler(
+        os.path.join(directory, LOG_NAME + suffix),
+        max_bytes=max_bytes,
+        backup_count=backup_count,
+        rotate_seconds=rotate_hours * 3600,
+        retention_seconds=retention_days * 86400,
+    )
+    handler.setFormatter(
+        JsonLinesFormatter() if json_lines else logging.Formatter(TEXT_FORMAT)
+    )
+    records: "queue.SimpleQueue[Optional[logging.LogRecord]]" = queue.SimpleQueue()
+    root = logging.getLogger()
+    for h in root.handlers[:]:
+        root.removeHandler(h)
+    root.addHandler(LogQueueHandler(records))
+    root.setLevel(level)
+    listener = QueueListener(records, handler, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,300 @@
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import (
+    Any,
+    AsyncIterator,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+    TypeVar,
+)
+
+from services.metrics import METRICS
+from services.repository import (
+    DEFAULT_FETCH_WORKERS,
+    FileFetchError,
+    FileInfo,
+    ProjectsRepository,
+    VectorStoreInfo,
+    fetch_failures,
+    file_info_from_assoc,
+)
+
+T = TypeVar("T")
+
+# Items pulled per worker-thread hop when adapting a blocking iterator.
+THREAD_CHUNK_SIZE = 100
+
+
+class AsyncFileListing:
+    # Async counterpart of FileListing: files as they are resolved, and the
+    # lookups of this call that failed.
+    def __init__(
+        self,
+        files: AsyncIterator[FileInfo],
+        failed: Optional[List[FileFetchError]] = None,
+    ) -> None:
+        self._files = files
+        self.failed: List[FileFetchError] = [] if failed is None else failed
+
+    def __aiter__(self) -> AsyncIterator[FileInfo]:
+        return self._files.__aiter__()
+
+
+class AsyncProjectsRepository(Protocol):
+    def list_vector_stores(self) -> AsyncIterator[VectorStoreInfo]: ...
+
+    def list_vector_store_files(self, vector_store_id: str) -> AsyncFileListing: ...
+
+    def list_vector_store_file_ids(
+        self, vector_store_id: str
+    ) -> AsyncIterator[str]: ...
+
+    def get_files(self, file_ids: Iterable[str]) -> AsyncFileListing: ...
+
+    async def upload_file_to_vector_store(
+        self, vector_store_id: str, file_path: str
+    ) -> FileInfo: ...
+
+    async def upload_file(self, file_path: str) -> FileInfo: ...
+
+    async def attach_files(
+        self, vector_store_id: str, file_ids: List[str]
+    ) -> List[str]: ...
+
+    async def detach_file(self, vector_store_id: str, file_id: str) -> None: ...
+
+    async def delete_file(self, file_id: str) -> None: ...
+
+
+class AzureAsyncProjectsRepository:
+    def __init__(
+        self, project_client, max_concurrency: int = DEFAULT_FETCH_WORKERS
+    ) -> None:
+        self.client = project_client
+        self.max_concurrency = max(1, max_concurrency)
+
+    async def list_vector_stores(self) -> AsyncIterator[VectorStoreInfo]:
+        stores = self.client.agents.vector_stores.list()
+        async for vs in METRICS.ameasure("repo.stores.list", stores):
+            yield VectorStoreInfo(id=vs.id, name=getattr(vs, "name", None) or vs.id)
+
+    def list_vector_store_files(self, vector_store_id: str) -> AsyncFileListing:
+        async def refs() -> AsyncIterator[Tuple[str, Optional[FileInfo]]]:
+            assocs = self.client.agents.vector_store_files.list(
+                vector_store_id=vector_store_id
+            )
+            async for a in METRICS.ameasure("repo.store_files.list", assocs):
+                yield a.id, file_info_from_assoc(a)
+
+        failed: List[FileFetchError] = []
+        return AsyncFileListing(self._resolve(refs(), failed), failed)
+
+    async def list_vector_store_file_ids(
+        self, vector_store_id: str
+    ) -> AsyncIterator[str]:
+        assocs = self.client.agents.vector_store_files.list(
+            vector_store_id=vector_store_id
+        )
+        async for assoc in METRICS.ameasure("repo.store_files.list", assocs):
+            yield assoc.id
+
+    def get_files(self, file_ids: Iterable[str]) -> AsyncFileListing:
+        async def refs() -> AsyncIterator[Tuple[str, Optional[FileInfo]]]:
+            for file_id in file_ids:
+                yield file_id, None
+
+        failed: List[FileFetchError] = []
+        return AsyncFileListing(self._resolve(refs(), failed), failed)
+
+    async def _resolve(
+        self,
+        refs: AsyncIterator[Tuple[str, Optional[FileInfo]]],
+        failed: List[FileFetchError],
+    ) -> AsyncIterator[FileInfo]:
+        # Same bounded, order-preserving window as the threaded repository,
+        # with tasks instead of pool workers.
+        window = self.max_concurrency * 4
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        pending: Deque[Tuple[str, FileInfo | asyncio.Task]] = deque()
+
+        async def fetch(file_id: str) -> FileInfo:
+            async with semaphore:
+                return await self._get_file(file_id)
+
+        try:
+            async for file_id, info in refs:
+                if info is not None:
+                    pending.append((file_id, info))
+                else:
+                    task = asyncio.ensure_future(fetch(file_id))
+                    pending.append((file_id, task))
+                while len(pending) >= window:
+                    info = await self._drain(pending, failed)
+                    if info is not None:
+                        yield info
+            while pending:
+                info = await self._drain(pending, failed)
+                if info is not None:
+                    yield info
+        finally:
+            for _, item in pending:
+                if isinstance(item, asyncio.Task):
+                    item.cancel()
+
+    async def _drain(
+        self,
+        pending: Deque[Tuple[str, FileInfo | asyncio.Task]],
+        failed: List[FileFetchError],
+    ) -> Optional[FileInfo]:
+        file_id, item = pending.popleft()
+        if isinstance(item, FileInfo):
+            return item
+        try:
+            return await item
+        except Exception as e:  # noqa: BLE001
+            logging.warning(f"Falha ao obter metadados do arquivo {file_id}: {e}")
+            failed.append(FileFetchError(file_id=file_id, error=str(e), exception=e))
+            return None
+
+    async def _get_file(self, file_id: str) -> FileInfo:
+        with METRICS.timer("repo.files.get"):
+            f = await self.client.agents.files.get(file_id=file_id)
+        return FileInfo(id=f.id, filename=f.filename, bytes=getattr(f, "bytes", None))
+
+    async def upload_file_to_vector_store(
+        self, vector_store_id: str, file_path: str
+    ) -> FileInfo:
+        info = await self.upload_file(file_path)
+        with METRICS.timer("repo.store_files.attach") as span:
+            span.items = 1
+            await self.client.agents.vector_store_files.create_and_poll(
+                vector_store_id=vector_store_id, file_id=info.id
+            )
+        return info
+
+    async def upload_file(self, file_path: str) -> FileInfo:
+        try:
+            from azure.ai.agents.models import FilePurpose
+        except Exception as e:  # noqa: BLE001
+            raise RuntimeError(
+                "Dependência azure-ai-agents ausente. Adicione o pacote."
+            ) from e
+        with METRICS.timer("repo.files.upload") as span:
+            span.items = 1
+            span.bytes = os.path.getsize(file_path)
+            uploaded = await self.client.agents.files.upload_and_poll(
+                file_path=file_path, purpose=FilePurpose.AGENTS
+            )
+        return FileInfo(
+            id=uploaded.id,
+            filename=getattr(uploaded, "filename", None) or os.path.basename(file_path),
+            bytes=getattr(uploaded, "bytes", None),
+        )
+
+    async def attach_files(
+        self, vector_store_id: str, file_ids: List[str]
+    ) -> List[str]:
+        with METRICS.timer("repo.batches.attach") as span:
+            span.items = len(file_ids)
+            batches = self.client.agents.vector_store_file_batches
+            batch = await batches.create_and_poll(
+                vector_store_id=vector_store_id, file_ids=file_ids
+            )
+            counts = getattr(batch, "file_counts", None)
+            if not counts or not getattr(counts, "failed", 0):
+                return []
+            failed = batches.list_files(
+                vector_store_id=vector_store_id, batch_id=batch.id, filter="failed"
+            )
+            failed_ids = [f.id async for f in failed]
+            span.failed = bool(failed_ids)
+            return failed_ids
+
+    async def detach_file(self, vector_store_id: str, file_id: str) -> None:
+        with METRICS.timer("repo.store_files.detach"):
+            await self.client.agents.vector_store_files.delete(
+                vector_store_id=vector_store_id, file_id=file_id
+            )
+
+    async def delete_file(self, file_id: str) -> None:
+        with METRICS.timer("repo.files.delete"):
+            await self.client.agents.files.delete(file_id=file_id)
+
+
+class ThreadedProjectsRepository:
+    # Adapts a blocking ProjectsRepository (custom or fake) to the async
+    # protocol by running its calls on worker threads.
+    def __init__(self, repo: ProjectsRepository) -> None:
+        self.repo = repo
+
+    def list_vector_stores(self) -> AsyncIterator[VectorStoreInfo]:
+        return _iterate_in_thread(self.repo.list_vector_stores)
+
+    def list_vector_store_files(self, vector_store_id: str) -> AsyncFileListing:
+        return _listing_in_thread(self.repo.list_vector_store_files, vector_store_id)
+
+    def list_vector_store_file_ids(self, vector_store_id: str) -> AsyncIterator[str]:
+        return _iterate_in_thread(self.repo.list_vector_store_file_ids, vector_store_id)
+
+    def get_files(self, file_ids: Iterable[str]) -> AsyncFileListing:
+        return _listing_in_thread(self.repo.get_files, list(file_ids))
+
+    async def upload_file_to_vector_store(
+        self, vector_store_id: str, file_path: str
+    ) -> FileInfo:
+        return await asyncio.to_thread(
+            self.repo.upload_file_to_vector_store, vector_store_id, file_path
+        )
+
+    async def upload_file(self, file_path: str) -> FileInfo:
+        return await asyncio.to_thread(self.repo.upload_file, file_path)
+
+    async def attach_files(
+        self, vector_store_id: str, file_ids: List[str]
+    ) -> List[str]:
+        return await asyncio.to_thread(
+            self.repo.attach_files, vector_store_id, file_ids
+        )
+
+    async def detach_file(self, vector_store_id: str, file_id: str) -> None:
+        await asyncio.to_thread(self.repo.detach_file, vector_store_id, file_id)
+
+    async def delete_file(self, file_id: str) -> None:
+        await asyncio.to_thread(self.repo.delete_file, file_id)
+
+
+async def _iterate_in_thread(factory, *args: Any) -> AsyncIterator[T]:
+    iterator: Optional[Iterator[T]] = None
+
+    def next_chunk() -> List[T]:
+        nonlocal iterator
+        if iterator is None:
+            iterator = iter(factory(*args))
+        chunk: List[T] = []
+        for item in iterator:
+            chunk.append(item)
+            if len(chunk) >= THREAD_CHUNK_SIZE:
+                break
+        return chunk
+
+    while chunk := await asyncio.to_thread(next_chunk):
+        for item in chunk:
+            yield item
+
+
+def _listing_in_thread(call, *args: Any) -> AsyncFileListing:
+    failed: List[FileFetchError] = []
+
+    def files() -> Iterator[FileInfo]:
+        listing = call(*args)
+        yield from listing
+        failed.extend(fetch_failures(listing))
+
+    return AsyncFileListing(_iterate_in_thread(files), failed)
@@ -0,0 +1,69 @@
+import glob
+import os
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+DEFAULT_UPLOAD_WORKERS = 4
+# Vector store file batches accept a bounded number of ids per request.
+ATTACH_BATCH_SIZE = 500
+
+
+@dataclass
+class UploadResult:
+    path: str
+    ok: bool = False
+    file_id: Optional[str] = None
+    bytes: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+    # "upload", "attach" (content already uploaded, only re-attached),
+    # "skip" (already in the vector store) or "duplicate" (same content as
+    # another path in the same run).
+    action: str = "upload"
+    sha256: Optional[str] = None
+
+
+@dataclass
+class BulkProgress:
+    total: int
+    done: int = 0
+    failed: int = 0
+    bytes_done: int = 0
+    phase: str = "upload"
+    started_at: float = field(default_factory=time.monotonic)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def files_per_second(self) -> float:
+        elapsed = self.elapsed()
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def megabytes_per_second(self) -> float:
+        elapsed = self.elapsed()
+        return self.bytes_done / 1_000_000 / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"[{self.phase}] {self.done}/{self.total} arquivos, "
+            f"{self.failed} falha(s), {self.bytes_done / 1_000_000:.1f} MB em "
+            f"{self.elapsed():.1f}s ({self.files_per_second():.1f} arq/s, "
+            f"{self.megabytes_per_second():.2f} MB/s)"
+        )
+
+
+def expand_source(source: str) -> List[str]:
+    # A directory is walked recursively; anything else is treated as a glob.
+    source = os.path.expanduser(source.strip())
+    if os.path.isdir(source):
+        paths = []
+        for root, dirs, files in os.walk(source):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            paths.extend(
+                os.path.join(root, name)
+                for name in sorted(files)
+                if not name.startswith(".")
+            )
+        return paths
+    return sorted(p for p in glob.glob(source, recursive=True) if os.path.isfile(p))
@@ -0,0 +1,608 @@
+import hashlib
+import heapq
+import html
+import logging
+import math
+import mmap
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+import zipfile
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Container, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from services.metadata_cache import CACHE_DIR
+
+CONTENT_INDEX_DIR = os.path.join(CACHE_DIR, "content_index")
+# Buffered documents are written out as a new segment past this many;
+# segments are merged once there are more than MAX_SEGMENTS.
+FLUSH_DOCS = 256
+FLUSH_POSTINGS = 500_000
+MAX_SEGMENTS = 8
+# Text kept per document, for snippets, in compressed chunks so a snippet
+# only inflates the start of a long document.
+MAX_TEXT_CHARS = 5_000_000
+TEXT_CHUNK_CHARS = 32_768
+MAX_EXTRACT_BYTES = 50 * 1024 * 1024
+MAX_PREFIX_TERMS = 50
+SNIPPET_CHARS = 160
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TEXT_EXTENSIONS = {
+    ".txt", ".md", ".markdown", ".rst", ".csv", ".tsv", ".json", ".jsonl",
+    ".xml", ".yaml", ".yml", ".ini", ".cfg", ".toml", ".log", ".tex", ".py",
+    ".js", ".ts", ".java", ".c", ".cpp", ".h", ".cs", ".go", ".rb", ".php",
+    ".sh", ".sql", ".css",
+}  # fmt: skip
+HTML_EXTENSIONS = {".html", ".htm"}
+# Office Open XML parts that hold the text of each format.
+OFFICE_PARTS = {
+    ".docx": ("word/document.xml",),
+    ".pptx": ("ppt/slides/slide",),
+    ".xlsx": ("xl/sharedStrings.xml",),
+}
+STOPWORDS = frozenset(
+    "a o e de da do das dos em no na nos nas um uma para por com que se ao "
+    "as os ou the of and to in is it for on an be by at or as"
+    .split()
+)  # fmt: skip
+
+_WORD = re.compile(r"\w+")
+_TAG = re.compile(r"<[^>]+>")
+_BLOCK_END = re.compile(r"</(?:w:p|a:p|si|p|div|li|tr|h\d)>|<br\s*/?>", re.I)
+_SPACES = re.compile(r"\s+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc INTEGER PRIMARY KEY,
+    file_id TEXT NOT NULL UNIQUE,
+    filename TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    flushed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS doc_text (
+    doc INTEGER NOT NULL,
+    chunk INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (doc, chunk)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    docs INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT NOT NULL,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    PRIMARY KEY (term, segment)
+) WITHOUT ROWID;
+"""
+
+Posting = Tuple[int, int]
+
+
+@dataclass
+class ContentHit:
+    file_id: str
+    filename: str
+    score: float
+    snippet: str = ""
+
+
+def normalize(word: str) -> str:
+    # "Ação" and "acao" are the same term.
+    word = word.lower()
+    if word.isascii():
+        return word
+    decomposed = unicodedata.normalize("NFKD", word)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _indexable(term: str) -> bool:
+    return 2 <= len(term) <= 40 and term not in STOPWORDS
+
+
+def tokenize(text: str) -> Iterator[str]:
+    for match in _WORD.finditer(text):
+        term = normalize(match.group())
+        if _indexable(term):
+            yield term
+
+
+def term_counts(text: str) -> Counter:
+    # Same terms as tokenize(), but each distinct word is normalized once.
+    counts: Counter = Counter()
+    for word, tf in Counter(_WORD.findall(text.lower())).items():
+        term = normalize(word)
+        if _indexable(term):
+            counts[term] += tf
+    return counts
+
+
+def extract_text(path: str) -> Optional[str]:
+    # Best effort: plain text and markup are read directly, Office files
+    # through their XML parts and PDFs only when pypdf is installed. None
+    # means the content is not indexable (binary, unknown or unreadable).
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        if ext in OFFICE_PARTS:
+            return _office_text(path, OFFICE_PARTS[ext])
+        if ext == ".pdf":
+            return _pdf_text(path)
+        if os.path.getsize(path) > MAX_EXTRACT_BYTES:
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+    except (OSError, zipfile.BadZipFile, KeyError) as e:
+        logging.warning(f"Não foi possível extrair o texto de {path}: {e}")
+        return None
+    if ext not in TEXT_EXTENSIONS and ext not in HTML_EXTENSIONS:
+        # Unknown extension: indexed only if it looks like text.
+        if b"\0" in data[:8192]:
+            return None
+    text = data.decode("utf-8", errors="replace")
+    if ext in HTML_EXTENSIONS:
+        return _strip_markup(text)
+    return text
+
+
+def _strip_markup(markup: str) -> str:
+    return html.unescape(_TAG.sub(" ", _BLOCK_END.sub("\n", markup)))
+
+
+def _office_text(path: str, parts: Tuple[str, ...]) -> str:
+    with zipfile.ZipFile(path) as archive:
+        names = sorted(
+            n for n in archive.namelist() if n.endswith(".xml") and n.startswith(parts)
+        )
+        return "\n".join(
+            _strip_markup(archive.read(n).decode("utf-8", errors="replace"))
+            for n in names
+        )
+
+
+def _pdf_text(path: str) -> Optional[str]:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return None
+    try:
+        reader = PdfReader(path)
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+    except Exception as e:  # noqa: BLE001
+        logging.warning(f"Não foi possível extrair o texto de {path}: {e}")
+        return None
+
+
+def _encode(postings: Iterable[Posting]) -> bytes:
+    # Doc number deltas and term frequencies as LEB128 varints.
+    out = bytearray()
+    last = 0
+    for doc, tf in postings:
+        for value in (doc - last, tf):
+            while value >= 0x80:
+                out.append((value & 0x7F) | 0x80)
+                value >>= 7
+            out.append(value)
+        last = doc
+    return bytes(out)
+
+
+def _decode(data: bytes) -> List[Posting]:
+    values = []
+    value = shift = 0
+    for byte in data:
+        if byte < 0x80:
+            values.append(value | (byte << shift))
+            value = shift = 0
+        else:
+            value |= (byte & 0x7F) << shift
+            shift += 7
+    return list(zip(accumulate(values[0::2]), values[1::2]))
+
+
+class ContentIndex:
+    # Incremental inverted index over the text of uploaded files, keyed by
+    # remote file id. New documents go to an in-memory buffer that is
+    # written out as an immutable segment file of varint postings; the term
+    # dictionary, document lengths and stored text live in SQLite, and
+    # segments are read through mmap. Removed documents just disappear from
+    # the docs table and their postings are dropped at the next merge.
+    # Buffered documents are rebuilt from their stored text on open, so a
+    # crash loses nothing that add() returned for.
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            os.path.join(directory, "index.sqlite3"), check_same_thread=False
+        )
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+        self._segments: Dict[int, mmap.mmap] = {}
+        self._segment_docs: Dict[int, int] = {}
+        self._lengths: Dict[int, int] = {}
+        self._docs: Dict[int, Tuple[str, str]] = {}
+        self._by_file: Dict[str, int] = {}
+        self._total_length = 0
+        self._buffer: Dict[str, List[Posting]] = {}
+        self._buffered_docs: List[int] = []
+        self._buffered_postings = 0
+        self._load()
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment-{segment}.postings")
+
+    def _load(self) -> None:
+        missing = []
+        for segment, docs in self._conn.execute(
+            "SELECT id, docs FROM segments"
+        ).fetchall():
+            try:
+                self._open_segment(segment, docs)
+            except (OSError, ValueError) as e:
+                logging.warning(
+                    f"Segmento {segment} do índice de conteúdo ilegível: {e}"
+                )
+                missing.append(segment)
+        if missing:
+            # Segments do not record which documents they hold, so every
+            # document is indexed again from its stored text.
+            self._drop_segments()
+        # Files of a flush or merge that never committed.
+        known = {os.path.basename(self._segment_path(s)) for s in self._segment_docs}
+        for name in os.listdir(self.directory):
+            if name.endswith(".postings") and name not in known:
+                os.remove(os.path.join(self.directory, name))
+        self._next_doc = 1
+        unflushed = []
+        for doc, file_id, filename, length, flushed in self._conn.execute(
+            "SELECT doc, file_id, filename, length, flushed FROM docs ORDER BY doc"
+        ):
+            self._remember(doc, file_id, filename, length)
+            self._next_doc = max(self._next_doc, doc + 1)
+            if not flushed:
+                unflushed.append(doc)
+        for doc in unflushed:
+            self._buffer_terms(doc, term_counts(self._text(doc)))
+        if missing:
+            self.flush()
+
+    def _drop_segments(self) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM terms")
+            self._conn.execute("DELETE FROM segments")
+            self._conn.execute("UPDATE docs SET flushed = 0")
+        for segment in self._segments.values():
+            segment.close()
+        self._segments.clear()
+        self._segment_docs.clear()
+
+    def _open_segment(self, segment: int, docs: int) -> None:
+        with open(self._segment_path(segment), "rb") as f:
+            self._segments[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._segment_docs[segment] = docs
+
+    def _remember(self, doc: int, file_id: str, filename: str, length: int) -> None:
+        self._docs[doc] = (file_id, filename)
+        self._by_file[file_id] = doc
+        self._lengths[doc] = length
+        self._total_length += length
+
+    def _forget(self, doc: int) -> None:
+        file_id, _ = self._docs.pop(doc)
+        self._by_file.pop(file_id, None)
+        self._total_length -= self._lengths.pop(doc)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, file_id: object) -> bool:
+        return file_id in self._by_file
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            for segment in self._segments.values():
+                segment.close()
+            self._segments.clear()
+            self._conn.close()
+
+    def add(self, file_id: str, filename: str, text: str) -> None:
+        # Replaces whatever was indexed for file_id. Tokenizing happens
+        # before taking the lock, so upload workers index in parallel.
+        text = text[:MAX_TEXT_CHARS]
+        terms = term_counts(text)
+        chunks = [
+            zlib.compress(text[i : i + TEXT_CHUNK_CHARS].encode("utf-8"))
+            for i in range(0, len(text), TEXT_CHUNK_CHARS)
+        ]
+        length = sum(terms.values())
+        with self._lock, self._conn:
+            self._remove(file_id)
+            doc = self._next_doc
+            self._next_doc += 1
+            self._conn.execute(
+                "INSERT INTO docs (doc, file_id, filename, length) VALUES (?, ?, ?, ?)",
+                (doc, file_id, filename, length),
+            )
+            self._conn.executemany(
+                "INSERT INTO doc_text (doc, chunk, data) VALUES (?, ?, ?)",
+                [(doc, i, data) for i, data in enumerate(chunks)],
+            )
+            self._remember(doc, file_id, filename, length)
+            self._buffer_terms(doc, terms)
+        if (
+            len(self._buffered_docs) >= FLUSH_DOCS
+            or self._buffered_postings >= FLUSH_POSTINGS
+        ):
+            self.flush()
+
+    def add_file(self, file_id: str, filename: str, path: str) -> bool:
+        text = extract_text(path)
+        if text is None:
+            return False
+        self.add(file_id, filename, text)
+        return True
+
+    def remove(self, file_id: str) -> None:
+        with self._lock, self._conn:
+            self._remove(file_id)
+
+    def _remove(self, file_id: str) -> None:
+        doc = self._by_file.get(file_id)
+        if doc is None:
+            return
+        self._conn.execute("DELETE FROM docs WHERE doc = ?", (doc,))
+        self._conn.execute("DELETE FROM doc_text WHERE doc = ?", (doc,))
+        self._forget(doc)
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            for segment in list(self._segments):
+                self._segments.pop(segment).close()
+                os.remove(self._segment_path(segment))
+            for table in ("docs", "doc_text", "segments", "terms"):
+                self._conn.execute(f"DELETE FROM {table}")
+            self._segment_docs.clear()
+            self._docs.clear()
+            self._by_file.clear()
+            self._lengths.clear()
+            self._total_length = 0
+            self._buffer.clear()
+            self._buffered_docs.clear()
+            self._buffered_postings = 0
+
+    def _buffer_terms(self, doc: int, terms: Counter) -> None:
+        for term, tf in terms.items():
+            self._buffer.setdefault(term, []).append((doc, tf))
+        self._buffered_docs.append(doc)
+        self._buffered_postings += len(terms)
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._buffered_docs:
+                return
+            live = [d for d in self._buffered_docs if d in self._docs]
+            postings = {
+                term: [p for p in entries if p[0] in self._docs]
+                for term, entries in self._buffer.items()
+            }
+            self._write_segment(postings, len(live), [], live)
+            self._buffer = {}
+            self._buffered_docs = []
+            self._buffered_postings = 0
+            if len(self._segments) > MAX_SEGMENTS:
+                self._merge()
+
+    def _merge(self) -> None:
+        # Merges the smallest segments, so large ones are rewritten rarely.
+        by_size = sorted(self._segment_docs, key=self._segment_docs.__getitem__)
+        victims = by_size[: len(by_size) - MAX_SEGMENTS // 2 + 1]
+        postings: Dict[str, List[Posting]] = {}
+        for term, segment, offset, length in self._conn.execute(
+            "SELECT term, segment, offset, length FROM terms WHERE segment IN "
+            f"({','.join('?' * len(victims))})",
+            victims,
+        ):
+            data = self._segments[segment][offset : offset + length]
+            postings.setdefault(term, []).extend(
+                p for p in _decode(data) if p[0] in self._docs
+            )
+        for entries in postings.values():
+            entries.sort()
+        docs = len({doc for entries in postings.values() for doc, _ in entries})
+        self._write_segment(postings, docs, victims, [])
+
+    def _write_segment(
+        self,
+        postings: Dict[str, List[Posting]],
+        docs: int,
+        replaces: List[int],
+        flushed: List[int],
+    ) -> None:
+        # The file is complete and on disk before the transaction that
+        # publishes it commits; _load removes files left behind by a crash
+        # in between.
+        with self._conn:
+            segment = self._conn.execute(
+                "INSERT INTO segments (docs) VALUES (?)", (docs,)
+            ).lastrowid
+            rows = []
+            offset = 0
+            with open(self._segment_path(segment), "wb") as f:
+                for term in sorted(postings):
+                    if not postings[term]:
+                        continue
+                    data = _encode(postings[term])
+                    f.write(data)
+                    rows.append((term, segment, offset, len(data)))
+                    offset += len(data)
+                f.flush()
+                os.fsync(f.fileno())
+            if not rows:
+                self._conn.execute("DELETE FROM segments WHERE id = ?", (segment,))
+                os.remove(self._segment_path(segment))
+            else:
+                self._conn.executemany(
+                    "INSERT INTO terms (term, segment, offset, length) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+            for old in replaces:
+                self._conn.execute("DELETE FROM terms WHERE segment = ?", (old,))
+                self._conn.execute("DELETE FROM segments WHERE id = ?", (old,))
+            self._conn.executemany(
+                "UPDATE docs SET flushed = 1 WHERE doc = ?", [(d,) for d in flushed]
+            )
+        if rows:
+            self._open_segment(segment, docs)
+        for old in replaces:
+            self._segments.pop(old).close()
+            self._segment_docs.pop(old)
+            os.remove(self._segment_path(old))
+
+    def _terms(self, query: str) -> List[str]:
+        # "palavra*" expands to the indexed terms with that prefix.
+        terms: List[str] = []
+        for word in query.split():
+            prefix = word.endswith("*")
+            for term in tokenize(word):
+                if not prefix:
+                    terms.append(term)
+                    continue
+                rows = self._conn.execute(
+                    "SELECT DISTINCT term FROM terms WHERE term >= ? AND term < ? "
+                    "LIMIT ?",
+                    (term, term + "\uffff", MAX_PREFIX_TERMS),
+                )
+                expanded = {row[0] for row in rows}
+                expanded.update(t for t in self._buffer if t.startswith(term))
+                terms.extend(sorted(expanded)[:MAX_PREFIX_TERMS])
+        return list(dict.fromkeys(terms))
+
+    def _postings(self, term: str) -> List[Posting]:
+        postings: List[Posting] = []
+        for segment, offset, length in self._conn.execute(
+            "SELECT segment, offset, length FROM terms WHERE term = ?", (term,)
+        ):
+            postings.extend(_decode(self._segments[segment][offset : offset + length]))
+        postings.extend(self._buffer.get(term, ()))
+        return [p for p in postings if p[0] in self._docs]
+
+    def search(
+        self, query: str, limit: int = 50, file_ids: Optional[Container[str]] = None
+    ) -> List[ContentHit]:
+        # BM25 over every indexed document (so term rarity reflects the whole
+        # project), keeping only documents whose file id is in file_ids when
+        # given (any container: a set, a dict, a FilenameIndex).
+        with self._lock:
+            terms = self._terms(query)
+            if not terms or not self._docs:
+                return []
+            count = len(self._docs)
+            avg_length = self._total_length / count or 1.0
+            scores: Dict[int, float] = {}
+            for term in terms:
+                postings = self._postings(term)
+                if not postings:
+                    continue
+                idf = math.log(
+                    1 + (count - len(postings) + 0.5) / (len(postings) + 0.5)
+                )
+                for doc, tf in postings:
+                    if file_ids is not None and self._docs[doc][0] not in file_ids:
+                        continue
+                    norm = BM25_K1 * (
+                        1 - BM25_B + BM25_B * self._lengths[doc] / avg_length
+                    )
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (
+                        tf + norm
+                    )
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            wanted = set(terms)
+            return [
+                ContentHit(
+                    file_id=self._docs[doc][0],
+                    filename=self._docs[doc][1],
+                    score=score,
+                    snippet=self._snippet(doc, wanted),
+                )
+                for doc, score in top
+            ]
+
+    def _text(self, doc: int) -> str:
+        return "".join(self._chunks(doc))
+
+    def _chunks(self, doc: int) -> Iterator[str]:
+        for (data,) in self._conn.execute(
+            "SELECT data FROM doc_text WHERE doc = ? ORDER BY chunk", (doc,)
+        ):
+            yield zlib.decompress(data).decode("utf-8")
+
+    def _snippet(self, doc: int, terms: Set[str]) -> str:
+        # Text around the first match, with the matching words in brackets;
+        # prefix queries match any word that expanded into the query terms.
+        for chunk in self._chunks(doc):
+            for match in _WORD.finditer(chunk):
+                if normalize(match.group()) not in terms:
+                    continue
+                start = max(0, match.start() - SNIPPET_CHARS // 3)
+                end = min(len(chunk), start + SNIPPET_CHARS)
+                window = chunk[start:end]
+                marked = _WORD.sub(
+                    lambda m: (
+                        f"[{m.group()}]" if normalize(m.group()) in terms else m.group()
+                    ),
+                    window,
+                )
+                text = _SPACES.sub(" ", marked).strip()
+                prefix = "…" if start > 0 else ""
+                suffix = "…" if end < len(chunk) else ""
+                return f"{prefix}{text}{suffix}"
+        return ""
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "documents": len(self._docs),
+                "segments": len(self._segments),
+                "buffered": len(self._buffered_docs),
+                "bytes": sum(len(s) for s in self._segments.values()),
+            }
+
+
+class ContentIndexes:
+    # One index per project endpoint, opened on first use and kept open
+    # until close().
+    def __init__(self, root: str = CONTENT_INDEX_DIR) -> None:
+        self.root = root
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, ContentIndex] = {}
+
+    def get(self, endpoint: str) -> ContentIndex:
+        with self._lock:
+            index = self._indexes.get(endpoint)
+            if index is None:
+                name = hashlib.sha256(endpoint.encode("utf-8")).hexdigest()[:16]
+                index = self._indexes[endpoint] = ContentIndex(
+                    os.path.join(self.root, name)
+                )
+            return index
+
+    def close(self) -> None:
+        with self._lock:
+            for index in self._indexes.values():
+                try:
+                    index.close()
+                except Exception as e:  # noqa: BLE001
+                    logging.warning(f"Falha ao fechar o índice de conteúdo: {e}")
+            self._indexes.clear()
@@ -0,0 +1,120 @@
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from services.bulk_upload import UploadResult
+from services.upload_manifest import SyncedPath
+
+# What happens to a store file whose local copy was deleted or replaced.
+KEEP = "keep"
+DETACH = "detach"
+DELETE = "delete"
+REMOVAL_MODES = (KEEP, DETACH, DELETE)
+
+
+@dataclass(frozen=True)
+class LocalFile:
+    rel_path: str
+    path: str
+    size: int
+    mtime_ns: int
+
+
+@dataclass
+class SyncPlan:
+    root: str
+    vector_store_id: str
+    new: List[LocalFile] = field(default_factory=list)
+    changed: List[LocalFile] = field(default_factory=list)
+    removed: List[SyncedPath] = field(default_factory=list)
+    unchanged: int = 0
+
+    def is_empty(self) -> bool:
+        return not (self.new or self.changed or self.removed)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.new)} novo(s), {len(self.changed)} alterado(s), "
+            f"{len(self.removed)} removido(s), {self.unchanged} sem alteração"
+        )
+
+
+@dataclass
+class SyncReport:
+    plan: SyncPlan
+    dry_run: bool
+    removal: str
+    results: List[UploadResult] = field(default_factory=list)
+    # Store files detached or deleted, and the ones that could not be.
+    removed: int = 0
+    errors: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def failed(self) -> int:
+        return sum(1 for r in self.results if not r.ok) + len(self.errors)
+
+    def summary(self) -> str:
+        if self.dry_run:
+            return f"Prévia: {self.plan.summary()}."
+        sent = sum(1 for r in self.results if r.ok)
+        return (
+            f"{self.plan.summary()}. {sent} enviado(s)/anexado(s), "
+            f"{self.removed} retirado(s) do Vector Store, {self.failed()} falha(s) "
+            f"em {self.seconds:.1f}s."
+        )
+
+
+def scan_directory(root: str) -> Dict[str, LocalFile]:
+    # Same rules as expand_source (hidden files and directories skipped),
+    # keyed by a "/"-separated path relative to root. scandir gives the
+    # stat data without an extra call per file on most platforms.
+    files: Dict[str, LocalFile] = {}
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file(follow_symlinks=True):
+                    st = entry.stat(follow_symlinks=True)
+                    rel_path = os.path.relpath(entry.path, root).replace(os.sep, "/")
+                    files[rel_path] = LocalFile(
+                        rel_path=rel_path,
+                        path=entry.path,
+                        size=st.st_size,
+                        mtime_ns=st.st_mtime_ns,
+                    )
+    return files
+
+
+def plan_sync(
+    root: str,
+    vector_store_id: str,
+    local: Dict[str, LocalFile],
+    synced: Dict[str, SyncedPath],
+    remote_ids: Optional[Set[str]] = None,
+) -> SyncPlan:
+    # A file counts as unchanged when size and mtime match the last sync,
+    # so an untouched tree is planned without reading any content. Changed
+    # files are hashed later by the uploader, which skips identical content.
+    # With a fresh remote listing, files detached behind our back are
+    # planned again.
+    plan = SyncPlan(root=root, vector_store_id=vector_store_id)
+    for rel_path in sorted(local):
+        current = local[rel_path]
+        previous = synced.get(rel_path)
+        if previous is None:
+            plan.new.append(current)
+        elif (
+            previous.size != current.size
+            or previous.mtime_ns != current.mtime_ns
+            or (remote_ids is not None and previous.file_id not in remote_ids)
+        ):
+            plan.changed.append(current)
+        else:
+            plan.unchanged += 1
+    plan.removed = [synced[p] for p in sorted(synced) if p not in local]
+    return plan
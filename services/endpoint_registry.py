@@ -0,0 +1,74 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from services.metadata_cache import CACHE_DIR
+from services.repository import VectorStoreInfo
+
+ENDPOINTS_PATH = os.path.join(CACHE_DIR, "endpoints.json")
+
+
+class EndpointRegistry:
+    # Saved project endpoints, most recently used first, each with the
+    # vector store last selected on it. Small enough to rewrite whole.
+    def __init__(self, path: str = ENDPOINTS_PATH) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = self._read()
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {k: v for k, v in data.get("endpoints", {}).items() if k}
+
+    def _write(self) -> None:
+        try:
+            parent = os.path.dirname(self.path)
+            if parent and not os.path.exists(parent):
+                os.makedirs(parent)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"endpoints": self._entries}, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Não foi possível gravar os endpoints salvos: {e}")
+
+    def endpoints(self) -> List[str]:
+        with self._lock:
+            return sorted(
+                self._entries,
+                key=lambda e: self._entries[e].get("used_at", 0),
+                reverse=True,
+            )
+
+    def touch(self, endpoint: str) -> None:
+        with self._lock:
+            self._entries.setdefault(endpoint, {})["used_at"] = time.time()
+            self._write()
+
+    def remove(self, endpoint: str) -> None:
+        with self._lock:
+            if self._entries.pop(endpoint, None) is not None:
+                self._write()
+
+    def vector_store(self, endpoint: str) -> Optional[VectorStoreInfo]:
+        with self._lock:
+            entry = self._entries.get(endpoint, {})
+        if not entry.get("vector_store_id"):
+            return None
+        return VectorStoreInfo(
+            id=entry["vector_store_id"], name=entry.get("vector_store_name") or ""
+        )
+
+    def set_vector_store(self, endpoint: str, vs: Optional[VectorStoreInfo]) -> None:
+        with self._lock:
+            entry = self._entries.setdefault(endpoint, {"used_at": time.time()})
+            entry["vector_store_id"] = vs.id if vs else None
+            entry["vector_store_name"] = vs.name if vs else None
+            self._write()
@@ -1,54 +1,185 @@
+import io
 import os
-from typing import Dict, Tuple
+import shutil
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple, TypeVar
 
 from dotenv import dotenv_values
 
+N = TypeVar("N", int, float)
 
 ENV_PATH = ".env"
+DEFAULT_ENV_CONTENT = "PROJECT_ENDPOINT=\nAZURE_OPENAI_ENDPOINT=\nAZURE_OPENAI_API_KEY=\nAZURE_INFERENCE_CREDENTIAL=\n"
 
 
 def ensure_env_file() -> None:
     if not os.path.exists(ENV_PATH):
         with open(ENV_PATH, "w") as f:
-            f.write(
-                "PROJECT_ENDPOINT=\nAZURE_OPENAI_ENDPOINT=\nAZURE_OPENAI_API_KEY=\nAZURE_INFERENCE_CREDENTIAL=\n"
-            )
+            f.write(DEFAULT_ENV_CONTENT)
+
+
+def env_number(key: str, default: N, cast: Callable[[str], N]) -> N:
+    # Settings read from the process environment; a missing or malformed
+    # value falls back to the default.
+    try:
+        return cast(os.environ.get(key, default))
+    except ValueError:
+        return default
+
+
+def env_flag(key: str, default: bool = False) -> bool:
+    value = os.environ.get(key, "").strip().lower()
+    if not value:
+        return default
+    return value in ("1", "true", "yes", "sim")
+
+
+class EnvStore:
+    # Parsed copy of a .env file. Reads are served from memory and only
+    # reparsed when the file's mtime/size change; writes rewrite the file
+    # once per batch, atomically, keeping comments and key order.
+    def __init__(self, path: str = ENV_PATH) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._lines: List[str] = []
+        self._values: Dict[str, str] = {}
+        self._stamp: Optional[Tuple[int, int]] = None
+
+    def values(self) -> Dict[str, str]:
+        with self._lock:
+            self._load()
+            return dict(self._values)
+
+    def get(self, key: str, default: str = "") -> Tuple[str, bool]:
+        with self._lock:
+            self._load()
+            value = self._values.get(key)
+        if value is None:
+            return default, False
+        return value, True
+
+    def set(self, key: str, value: str) -> None:
+        self.set_many({key: value})
+
+    def set_many(self, pairs: Dict[str, str]) -> None:
+        if not pairs:
+            return
+        with self._lock:
+            self._load()
+            written: Set[str] = set()
+            lines: List[str] = []
+            for line in self._lines:
+                key = _line_key(line)
+                if key is None or key not in pairs:
+                    lines.append(line)
+                elif key not in written:
+                    # Later duplicates are dropped: dotenv reads the last
+                    # one, which would otherwise hide the new value.
+                    written.add(key)
+                    lines.append(f"{key}={_format_value(pairs[key])}\n")
+            if lines and not lines[-1].endswith("\n"):
+                lines[-1] += "\n"
+            for key, value in pairs.items():
+                if key not in written:
+                    lines.append(f"{key}={_format_value(value)}\n")
+            self._write("".join(lines))
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._stamp = None
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            self._write(DEFAULT_ENV_CONTENT)
+            return
+        stamp = _stat(self.path)
+        if stamp == self._stamp:
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            content = f.read()
+        self._parse(content, stamp)
+
+    def _write(self, content: str) -> None:
+        parent = os.path.dirname(self.path)
+        if parent and not os.path.exists(parent):
+            os.makedirs(parent)
+        # A unique temp file per write, so concurrent processes don't clash,
+        # carrying the original mode: the file holds credentials.
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=f"{os.path.basename(self.path)}.", suffix=".tmp", dir=parent or "."
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+            try:
+                shutil.copymode(self.path, tmp_path)
+            except OSError:
+                os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._parse(content, _stat(self.path))
+
+    def _parse(self, content: str, stamp: Tuple[int, int]) -> None:
+        self._lines = content.splitlines(keepends=True)
+        parsed = dotenv_values(stream=io.StringIO(content))
+        self._values = {k: v for k, v in parsed.items() if v is not None}
+        self._stamp = stamp
+
+
+_stores: Dict[str, EnvStore] = {}
+
+
+def env_store(path: Optional[str] = None) -> EnvStore:
+    path = path or ENV_PATH
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = EnvStore(path)
+    return store
 
 
 def read_env() -> Dict[str, str]:
-    ensure_env_file()
-    return {**dotenv_values(ENV_PATH)}  # type: ignore[return-value]
+    return env_store().values()
 
 
 def set_env_var(key: str, value: str) -> None:
-    ensure_env_file()
-    lines: list[str] = []
-    found = False
-    if os.path.exists(ENV_PATH):
-        with open(ENV_PATH, "r") as f:
-            for line in f:
-                if not line.strip() or line.strip().startswith("#"):
-                    lines.append(line)
-                    continue
-                k, sep, v = line.partition("=")
-                if k == key:
-                    lines.append(f"{key}={value}\n")
-                    found = True
-                else:
-                    lines.append(line)
-    if not found:
-        lines.append(f"{key}={value}\n")
-    with open(ENV_PATH, "w") as f:
-        f.writelines(lines)
+    env_store().set(key, value)
 
 
 def set_many(pairs: Dict[str, str]) -> None:
-    for k, v in pairs.items():
-        set_env_var(k, v)
+    env_store().set_many(pairs)
 
 
 def get_var(key: str, default: str = "") -> Tuple[str, bool]:
-    env = read_env()
-    if key in env and env[key] is not None:
-        return str(env[key]), True
-    return default, False
+    return env_store().get(key, default)
+
+
+def _stat(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _line_key(line: str) -> Optional[str]:
+    stripped = line.strip()
+    if not stripped or stripped.startswith("#") or "=" not in stripped:
+        return None
+    key = stripped.partition("=")[0].strip()
+    if key.startswith("export "):
+        key = key[len("export ") :].strip()
+    return key
+
+
+def _format_value(value: str) -> str:
+    # Plain values are written as-is, like before; anything dotenv would
+    # misread unquoted gets double quotes.
+    if value and not any(c in value for c in " \t#'\"\\\n"):
+        return value
+    if not value:
+        return ""
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
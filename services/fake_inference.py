@@ -0,0 +1,61 @@
+import asyncio
+import random
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from services.inference_service import Message
+
+TOKEN_PATTERN = re.compile(r"\s*\S+|\s+")
+
+
+class FakeStreamingBackend:
+    # Streams a canned or echoed reply word by word, with a delay before the
+    # first token and between tokens, so the chat screen and the metrics can
+    # be exercised without a model deployment.
+    def __init__(
+        self,
+        reply: Optional[str] = None,
+        first_token_delay: float = 0.3,
+        token_delay: float = 0.02,
+        jitter: float = 0.0,
+        fail_after: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.reply = reply
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.jitter = jitter
+        self.fail_after = fail_after
+        self.requests = 0
+        self._random = random.Random(seed)
+
+    def tokens(self, model: Optional[str], messages: List[Message]) -> List[str]:
+        reply = self.reply
+        if reply is None:
+            last = messages[-1]["content"] if messages else ""
+            reply = (
+                f"[fake:{model or 'default'}] Você disse: {last} "
+                f"({len(messages)} mensagem(ns) na conversa)"
+            )
+        return TOKEN_PATTERN.findall(reply)
+
+    async def _sleep(self, delay: float) -> None:
+        await asyncio.sleep(delay + self._random.uniform(0, self.jitter))
+
+    async def astream(
+        self,
+        model: Optional[str],
+        messages: List[Message],
+        params: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[str]:
+        self.requests += 1
+        await self._sleep(self.first_token_delay)
+        for i, token in enumerate(self.tokens(model, messages)):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise RuntimeError("Falha simulada no meio da resposta.")
+            if i:
+                await self._sleep(self.token_delay)
+            yield token
+
+    async def aclose(self) -> None:
+        pass
@@ -0,0 +1,214 @@
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Deque, Dict, Iterable, Iterator, List, Optional
+
+from services.repository import (
+    FileFetchError,
+    FileInfo,
+    FileListing,
+    VectorStoreInfo,
+)
+
+DEFAULT_PAGE_SIZE = 20
+
+
+class FakeHttpError(Exception):
+    # Shaped like azure.core's HttpResponseError (status_code and
+    # response.headers), which is all the resilience layer looks at.
+    def __init__(
+        self, status_code: int, message: str, retry_after: Optional[float] = None
+    ) -> None:
+        super().__init__(f"({status_code}) {message}")
+        self.status_code = status_code
+        headers = {} if retry_after is None else {"Retry-After": str(retry_after)}
+        self.response = SimpleNamespace(status_code=status_code, headers=headers)
+
+
+@dataclass(frozen=True)
+class FaultPlan:
+    # Probabilities are per request; the first `outage_requests` requests all
+    # fail with 503, simulating a service that is down and then recovers.
+    # Each request takes `latency` plus up to `jitter` seconds; above
+    # `rate_limit` requests per second (0 = unlimited) the service answers
+    # 429 until the one-second window has room again.
+    latency: float = 0.0
+    jitter: float = 0.0
+    rate_limit: float = 0.0
+    throttle_rate: float = 0.0
+    error_rate: float = 0.0
+    not_found_rate: float = 0.0
+    retry_after: float = 0.1
+    outage_requests: int = 0
+    seed: Optional[int] = None
+
+
+class FakeProjectsRepository:
+    # In-memory ProjectsRepository with paged listings, simulated latency
+    # and injected faults, for trying out the service stack without Azure.
+    def __init__(
+        self,
+        stores: int = 1,
+        files_per_store: int = 100,
+        faults: Optional[FaultPlan] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        inline_filenames: bool = False,
+    ) -> None:
+        self.faults = faults or FaultPlan()
+        self.page_size = max(1, page_size)
+        self.inline_filenames = inline_filenames
+        self.stats: Counter = Counter()
+        self._random = random.Random(self.faults.seed)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._uploads = 0
+        self._window: Deque[float] = deque()
+        self._stores = [
+            VectorStoreInfo(id=f"vs{i}", name=f"Store {i}") for i in range(stores)
+        ]
+        self._files: Dict[str, FileInfo] = {}
+        self._attached: Dict[str, List[str]] = {}
+        for vs in self._stores:
+            ids = []
+            for j in range(files_per_store):
+                info = FileInfo(
+                    id=f"{vs.id}-f{j}", filename=f"doc{j}.pdf", bytes=1024 + j
+                )
+                self._files[info.id] = info
+                ids.append(info.id)
+            self._attached[vs.id] = ids
+
+    def _request(self, operation: str) -> None:
+        faults = self.faults
+        if faults.jitter:
+            with self._lock:
+                delay = faults.latency + self._random.uniform(0, faults.jitter)
+        else:
+            delay = faults.latency
+        if delay:
+            time.sleep(delay)
+        with self._lock:
+            self._requests += 1
+            self.stats[operation] += 1
+            number = self._requests
+            roll = self._random.random()
+            wait = self._rate_limited()
+        error: Optional[FakeHttpError] = None
+        if number <= faults.outage_requests:
+            error = FakeHttpError(503, "Service Unavailable")
+        elif wait is not None:
+            error = FakeHttpError(429, "Rate limit exceeded", wait)
+        elif roll < faults.throttle_rate:
+            error = FakeHttpError(429, "Too Many Requests", faults.retry_after)
+        elif roll < faults.throttle_rate + faults.error_rate:
+            error = FakeHttpError(self._random.choice((500, 502, 503)), "Server Error")
+        elif roll < faults.throttle_rate + faults.error_rate + faults.not_found_rate:
+            error = FakeHttpError(404, "Not Found")
+        if error is not None:
+            with self._lock:
+                self.stats[f"{operation}:{error.status_code}"] += 1
+            raise error
+
+    def _rate_limited(self) -> Optional[float]:
+        # Sliding one-second window; returns the Retry-After for a request
+        # over the limit. Called with the lock held.
+        if self.faults.rate_limit <= 0:
+            return None
+        now = time.monotonic()
+        while self._window and now - self._window[0] >= 1.0:
+            self._window.popleft()
+        if len(self._window) >= self.faults.rate_limit:
+            return round(1.0 - (now - self._window[0]), 3)
+        self._window.append(now)
+        return None
+
+    def _pages(self, operation: str, items: List) -> Iterator:
+        for start in range(0, len(items), self.page_size):
+            self._request(operation)
+            yield from items[start : start + self.page_size]
+
+    def list_vector_stores(self) -> Iterable[VectorStoreInfo]:
+        return self._pages("vector_stores.list", list(self._stores))
+
+    def list_vector_store_files(self, vector_store_id: str) -> FileListing:
+        if self.inline_filenames:
+            ids = list(self._attached.get(vector_store_id, []))
+            pages = self._pages("vector_store_files.list", ids)
+            return FileListing(self._files[i] for i in pages)
+        return self.get_files(self.list_vector_store_file_ids(vector_store_id))
+
+    def list_vector_store_file_ids(self, vector_store_id: str) -> Iterable[str]:
+        ids = list(self._attached.get(vector_store_id, []))
+        return self._pages("vector_store_files.list", ids)
+
+    def get_files(self, file_ids: Iterable[str]) -> FileListing:
+        failed: List[FileFetchError] = []
+        return FileListing(self._get_files(file_ids, failed), failed)
+
+    def _get_files(
+        self, file_ids: Iterable[str], failed: List[FileFetchError]
+    ) -> Iterator[FileInfo]:
+        for file_id in file_ids:
+            try:
+                self._request("files.get")
+                info = self._files.get(file_id)
+                if info is None:
+                    raise FakeHttpError(404, f"Arquivo {file_id} não encontrado")
+            except Exception as e:  # noqa: BLE001
+                failed.append(
+                    FileFetchError(file_id=file_id, error=str(e), exception=e)
+                )
+                continue
+            yield info
+
+    def upload_file_to_vector_store(
+        self, vector_store_id: str, file_path: str
+    ) -> FileInfo:
+        info = self.upload_file(file_path)
+        if self.attach_files(vector_store_id, [info.id]):
+            raise RuntimeError(f"Falha ao anexar o arquivo {info.id} ao Vector Store.")
+        return info
+
+    def upload_file(self, file_path: str) -> FileInfo:
+        self._request("files.upload")
+        with self._lock:
+            self._uploads += 1
+            file_id = f"up{self._uploads}"
+        info = FileInfo(
+            id=file_id,
+            filename=os.path.basename(file_path),
+            bytes=os.path.getsize(file_path) if os.path.exists(file_path) else None,
+        )
+        self._files[file_id] = info
+        return info
+
+    def attach_files(self, vector_store_id: str, file_ids: List[str]) -> List[str]:
+        self._request("vector_store_file_batches.create")
+        attached = self._attached.setdefault(vector_store_id, [])
+        known = set(attached)
+        failed = []
+        for file_id in file_ids:
+            if file_id not in self._files:
+                failed.append(file_id)
+            elif file_id not in known:
+                attached.append(file_id)
+        return failed
+
+    def detach_file(self, vector_store_id: str, file_id: str) -> None:
+        self._request("vector_store_files.delete")
+        attached = self._attached.get(vector_store_id, [])
+        if file_id not in attached:
+            raise FakeHttpError(404, f"Arquivo {file_id} não está no Vector Store")
+        attached.remove(file_id)
+
+    def delete_file(self, file_id: str) -> None:
+        self._request("files.delete")
+        if self._files.pop(file_id, None) is None:
+            raise FakeHttpError(404, f"Arquivo {file_id} não encontrado")
+        for attached in self._attached.values():
+            if file_id in attached:
+                attached.remove(file_id)
@@ -0,0 +1,135 @@
+import bisect
+import os
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from services.repository import FileInfo
+
+
+def _trigrams(text: str) -> Iterator[str]:
+    for i in range(len(text) - 2):
+        yield text[i : i + 3]
+
+
+class FilenameIndex:
+    def __init__(self, files: Iterable[FileInfo] = ()) -> None:
+        self._docs: List[Optional[FileInfo]] = []
+        self._lower: List[str] = []
+        self._doc_by_id: Dict[str, int] = {}
+        # Postings are append-only arrays of doc numbers, so they stay sorted
+        # and compact; removed docs are tombstoned in _docs.
+        self._trigrams: Dict[str, array] = {}
+        self._extensions: Dict[str, array] = {}
+        for f in files:
+            self._append(f)
+        self._sorted: List[Tuple[str, int]] = sorted(
+            (lower, doc) for doc, lower in enumerate(self._lower)
+        )
+
+    def __len__(self) -> int:
+        return len(self._doc_by_id)
+
+    def __contains__(self, file_id: object) -> bool:
+        return file_id in self._doc_by_id
+
+    def files(self) -> List[FileInfo]:
+        return [f for f in self._docs if f is not None]
+
+    def add(self, file: FileInfo) -> None:
+        if file.id in self._doc_by_id:
+            self.remove(file.id)
+        doc = self._append(file)
+        bisect.insort(self._sorted, (self._lower[doc], doc))
+
+    def remove(self, file_id: str) -> None:
+        doc = self._doc_by_id.pop(file_id, None)
+        if doc is None:
+            return
+        self._docs[doc] = None
+        key = (self._lower[doc], doc)
+        i = bisect.bisect_left(self._sorted, key)
+        if i < len(self._sorted) and self._sorted[i] == key:
+            del self._sorted[i]
+
+    def _append(self, file: FileInfo) -> int:
+        doc = len(self._docs)
+        lower = file.filename.lower()
+        self._docs.append(file)
+        self._lower.append(lower)
+        self._doc_by_id[file.id] = doc
+        for gram in set(_trigrams(lower)):
+            posting = self._trigrams.get(gram)
+            if posting is None:
+                posting = self._trigrams[gram] = array("I")
+            posting.append(doc)
+        ext = os.path.splitext(lower)[1]
+        if ext:
+            posting = self._extensions.get(ext)
+            if posting is None:
+                posting = self._extensions[ext] = array("I")
+            posting.append(doc)
+        return doc
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[FileInfo]:
+        # "*.pdf" filters by extension, "rel*" by prefix, anything else is a
+        # substring match.
+        query = query.strip().lower()
+        if query.startswith("*.") and "*" not in query[2:]:
+            return self.extension(query[1:], limit)
+        if query.endswith("*") and "*" not in query[:-1]:
+            return self.prefix(query[:-1], limit)
+        return self.substring(query, limit)
+
+    def substring(self, term: str, limit: Optional[int] = None) -> List[FileInfo]:
+        term = term.lower()
+        if not term:
+            return self._take(range(len(self._docs)), limit)
+        if len(term) < 3:
+            # Too short for a trigram: a linear scan over every name (about
+            # 15 ms per 100k files), cut short by `limit`.
+            candidates: Iterable[int] = range(len(self._docs))
+        else:
+            postings = []
+            for gram in set(_trigrams(term)):
+                posting = self._trigrams.get(gram)
+                if posting is None:
+                    return []
+                postings.append(posting)
+            candidates = min(postings, key=len)
+        return self._take((d for d in candidates if term in self._lower[d]), limit)
+
+    def prefix(self, term: str, limit: Optional[int] = None) -> List[FileInfo]:
+        term = term.lower()
+        start = bisect.bisect_left(self._sorted, (term, -1))
+        out: List[FileInfo] = []
+        for i in range(start, len(self._sorted)):
+            lower, doc = self._sorted[i]
+            if not lower.startswith(term) or (limit is not None and len(out) >= limit):
+                break
+            out.append(self._docs[doc])
+        return out
+
+    def extension(self, ext: str, limit: Optional[int] = None) -> List[FileInfo]:
+        ext = ext.lower()
+        if not ext.startswith("."):
+            ext = f".{ext}"
+        return self._take(self._extensions.get(ext, ()), limit)
+
+    def _take(self, docs: Iterable[int], limit: Optional[int]) -> List[FileInfo]:
+        out: List[FileInfo] = []
+        for d in docs:
+            f = self._docs[d]
+            if f is None:
+                continue
+            out.append(f)
+            if limit is not None and len(out) >= limit:
+                break
+        return out
+
+
+def filter_files(files: Iterable[FileInfo], query: str) -> List[FileInfo]:
+    # One-off match with the same query syntax, for batches that are not
+    # (yet) part of an index.
+    if not query.strip():
+        return list(files)
+    return FilenameIndex(files).search(query)
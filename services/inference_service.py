@@ -1,21 +1,359 @@
-from typing import Optional, Tuple
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+)
+
+from services.metrics import METRICS
+from services.response_cache import ResponseCache, cache_key
+
+DEFAULT_API_VERSION = "2024-10-21"
+DEFAULT_BATCH_CONCURRENCY = 4
+# User and assistant turns sent back with each message; older turns are
+# dropped so request size stays bounded in long conversations.
+MAX_HISTORY_MESSAGES = 20
+
+Message = Dict[str, str]
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    index: int
+    prompt: str
+    ok: bool
+    response: str = ""
+    error: Optional[str] = None
+    # Answered from the response cache, or by an identical prompt earlier
+    # in the same batch.
+    cached: bool = False
+    seconds: float = 0.0
+
+
+class InferenceBackend(Protocol):
+    def astream(
+        self,
+        model: Optional[str],
+        messages: List[Message],
+        params: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[str]: ...
+
+    async def aclose(self) -> None: ...
+
+
+class AzureOpenAIBackend:
+    # Chat completions through the project's Azure OpenAI endpoint. The
+    # openai client is created on first use, from the same project client
+    # and credential as everything else.
+    def __init__(self, client_factory, api_version: str = DEFAULT_API_VERSION) -> None:
+        self._client_factory = client_factory
+        self._api_version = api_version
+        self._client: Any = None
+        self._endpoint: Optional[str] = None
+
+    async def _openai(self) -> Any:
+        endpoint = self._client_factory.endpoint()
+        if self._client is not None and endpoint != self._endpoint:
+            # The project changed; its deployments live behind another client.
+            await self.aclose()
+        if self._client is None:
+            with METRICS.timer("inference.client.create"):
+                project = self._client_factory.get_async()
+                self._client = await project.get_openai_client(
+                    api_version=self._api_version
+                )
+            self._endpoint = endpoint
+        return self._client
+
+    async def astream(
+        self,
+        model: Optional[str],
+        messages: List[Message],
+        params: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[str]:
+        if not model:
+            raise RuntimeError("INFERENCE_MODEL não está configurado.")
+        client = await self._openai()
+        stream = await client.chat.completions.create(
+            model=model, messages=messages, stream=True, **(params or {})
+        )
+        try:
+            async for chunk in stream:
+                # Azure sends a first chunk with only content filter results.
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+        finally:
+            await stream.close()
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.close()
 
 
 class InferenceService:
     def __init__(self) -> None:
         self._configured = False
         self._model: Optional[str] = None
+        self._endpoint: Optional[str] = None
+        self._backend: Optional[InferenceBackend] = None
+        self._history: List[Message] = []
+        self._cache: Optional[ResponseCache] = None
+
+    def configure(
+        self,
+        model: Optional[str] = None,
+        backend: Optional[InferenceBackend] = None,
+        endpoint: Optional[str] = None,
+    ) -> None:
+        if backend is None:
+            from services.fake_inference import FakeStreamingBackend
 
-    def configure(self, model: Optional[str] = None) -> None:
+            backend = FakeStreamingBackend()
         self._model = model
+        self._endpoint = endpoint
+        self._backend = backend
+        self._history = []
         self._configured = True
 
+    def set_endpoint(self, endpoint: Optional[str]) -> None:
+        self._endpoint = endpoint
+
     def is_configured(self) -> bool:
         return self._configured
 
-    def send_message(self, message: str) -> Tuple[bool, str]:
-        if not self._configured:
-            return False, "Serviço de inferência não configurado."
+    @property
+    def model(self) -> Optional[str]:
+        return self._model
+
+    def reset(self) -> None:
+        self._history = []
+
+    def set_cache(self, cache: Optional[ResponseCache]) -> None:
+        self._cache = cache
+
+    @property
+    def cache(self) -> Optional[ResponseCache]:
+        return self._cache
+
+    def _cached(self, key: str) -> Optional[str]:
+        if self._cache is None:
+            return None
+        response = self._cache.get(key)
+        METRICS.count(
+            "inference.cache.hits" if response is not None else "inference.cache.misses"
+        )
+        return response
+
+    def _check(self, message: str) -> None:
+        if not self._configured or self._backend is None:
+            raise RuntimeError("Serviço de inferência não configurado.")
         if not message.strip():
-            return False, "Mensagem vazia."
-        return True, f"[stub:{self._model or 'default'}] {message}"
+            raise RuntimeError("Mensagem vazia.")
+
+    async def _complete(
+        self, messages: List[Message], params: Optional[Dict[str, Any]]
+    ) -> str:
+        parts = [
+            delta
+            async for delta in METRICS.ameasure(
+                "inference.stream",
+                self._backend.astream(self._model, messages, params),
+                first=True,
+            )
+        ]
+        return "".join(parts)
+
+    async def astream_message(self, message: str) -> AsyncIterator[str]:
+        # Yields the reply as it arrives; a cached reply comes back as one
+        # delta. The turn is kept in the history only once the whole reply
+        # came back, so a failed or interrupted answer is not sent along
+        # with the next message.
+        self._check(message)
+        turn = {"role": "user", "content": message}
+        messages = self._history[-MAX_HISTORY_MESSAGES:] + [turn]
+        key = cache_key(self._endpoint, self._model, messages)
+        response = self._cached(key)
+        if response is not None:
+            yield response
+        else:
+            parts: List[str] = []
+            async for delta in METRICS.ameasure(
+                "inference.stream",
+                self._backend.astream(self._model, messages),
+                first=True,
+            ):
+                parts.append(delta)
+                yield delta
+            response = "".join(parts)
+            if self._cache is not None:
+                self._cache.put(key, response)
+        self._history = messages + [{"role": "assistant", "content": response}]
+
+    async def arun_batch(
+        self,
+        prompts: Iterable[str],
+        max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+        params: Optional[Dict[str, Any]] = None,
+        on_result: Optional[Callable[[BatchResult], None]] = None,
+    ) -> List[BatchResult]:
+        # Each prompt is a single-turn conversation, independent of the chat
+        # history. At most max_concurrency requests are in flight; identical
+        # prompts share one request. Results keep the input order whatever
+        # order they finish in, and a failed prompt does not stop the rest.
+        prompts = list(prompts)
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        inflight: Dict[str, "asyncio.Future[str]"] = {}
+
+        async def request(messages: List[Message], key: str) -> str:
+            async with semaphore:
+                response = await self._complete(messages, params)
+            if self._cache is not None:
+                self._cache.put(key, response)
+            return response
+
+        async def run(index: int, prompt: str) -> BatchResult:
+            started = time.perf_counter()
+            try:
+                self._check(prompt)
+                messages = [{"role": "user", "content": prompt}]
+                key = cache_key(self._endpoint, self._model, messages, params)
+                response = self._cached(key)
+                cached = response is not None
+                if response is None:
+                    shared = inflight.get(key)
+                    cached = shared is not None
+                    if shared is None:
+                        shared = inflight[key] = asyncio.ensure_future(
+                            request(messages, key)
+                        )
+                    response = await shared
+                result = BatchResult(
+                    index,
+                    prompt,
+                    True,
+                    response=response,
+                    cached=cached,
+                    seconds=time.perf_counter() - started,
+                )
+            except Exception as e:  # noqa: BLE001
+                result = BatchResult(
+                    index,
+                    prompt,
+                    False,
+                    error=str(e),
+                    seconds=time.perf_counter() - started,
+                )
+            if on_result is not None:
+                on_result(result)
+            return result
+
+        with METRICS.timer("inference.batch") as span:
+            results = await asyncio.gather(*(run(i, p) for i, p in enumerate(prompts)))
+            span.items = len(results)
+            span.failed = any(not r.ok for r in results)
+        return list(results)
+
+    def run_batch(
+        self,
+        prompts: Iterable[str],
+        max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+        params: Optional[Dict[str, Any]] = None,
+        on_result: Optional[Callable[[BatchResult], None]] = None,
+    ) -> List[BatchResult]:
+        async def batch() -> List[BatchResult]:
+            try:
+                return await self.arun_batch(
+                    prompts, max_concurrency, params, on_result
+                )
+            finally:
+                await self.aclose()
+
+        return asyncio.run(batch())
+
+    def send_message(self, message: str) -> Tuple[bool, str]:
+        # Blocking variant for callers without an event loop (scripts, the
+        # CLI, worker threads). Each call runs its own event loop, and the
+        # backend's clients are bound to the loop that opened them, so they
+        # are closed before it ends and reopened by the next call.
+        with METRICS.timer("inference.send_message") as span:
+            ok, response = self._send_message(message)
+            span.items = 1
+            span.bytes = len(message.encode("utf-8"))
+            span.failed = not ok
+        return ok, response
+
+    def _send_message(self, message: str) -> Tuple[bool, str]:
+        async def collect() -> str:
+            try:
+                return "".join([delta async for delta in self.astream_message(message)])
+            finally:
+                await self.aclose()
+
+        try:
+            return True, asyncio.run(collect())
+        except Exception as e:  # noqa: BLE001
+            return False, str(e)
+
+    async def aclose(self) -> None:
+        if self._backend is not None:
+            await self._backend.aclose()
+
+
+def load_prompts(path: str) -> List[str]:
+    # One prompt per non-empty line; .jsonl files hold {"prompt": ...}
+    # objects (or plain JSON strings) instead.
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.rstrip("\n") for line in f if line.strip()]
+    if not path.endswith(".jsonl"):
+        return lines
+    prompts = []
+    for number, line in enumerate(lines, 1):
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise RuntimeError(f"Linha {number} inválida em {path}: {e}") from e
+        prompts.append(record if isinstance(record, str) else str(record["prompt"]))
+    return prompts
+
+
+class StreamStats:
+    # Time to first token and throughput of one streamed reply, for the
+    # chat screen's status line.
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.first_token: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.deltas = 0
+        self.chars = 0
+
+    def add(self, delta: str) -> None:
+        if self.first_token is None:
+            self.first_token = time.perf_counter() - self.started
+        self.deltas += 1
+        self.chars += len(delta)
+
+    def finish(self) -> None:
+        self.finished = time.perf_counter() - self.started
+
+    def summary(self) -> str:
+        elapsed = self.finished or (time.perf_counter() - self.started)
+        first = "-" if self.first_token is None else f"{self.first_token:.2f}s"
+        streaming = elapsed - (self.first_token or 0.0)
+        rate = self.deltas / streaming if streaming > 0 else 0.0
+        return (
+            f"Primeiro token em {first}, {self.deltas} token(s) em "
+            f"{elapsed:.2f}s ({rate:.0f} tokens/s)."
+        )
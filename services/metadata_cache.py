@@ -0,0 +1,156 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from services.repository import FileInfo, VectorStoreInfo
+
+CACHE_DIR = ".cache"
+CACHE_PATH = os.path.join(CACHE_DIR, "metadata.sqlite3")
+DEFAULT_TTL_SECONDS = 15 * 60
+
+# Sync scope used for the vector store listing itself; file listings use the
+# vector store id as their scope.
+STORES_SCOPE = ""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vector_stores (
+    endpoint TEXT NOT NULL,
+    id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (endpoint, id)
+);
+CREATE TABLE IF NOT EXISTS files (
+    endpoint TEXT NOT NULL,
+    vector_store_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    bytes INTEGER,
+    PRIMARY KEY (endpoint, vector_store_id, id)
+);
+CREATE TABLE IF NOT EXISTS syncs (
+    endpoint TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (endpoint, scope)
+);
+"""
+
+
+class MetadataCache:
+    def __init__(
+        self, path: str = CACHE_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS
+    ) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        parent = os.path.dirname(path)
+        if parent and not os.path.exists(parent):
+            os.makedirs(parent)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def synced_at(self, endpoint: str, scope: str) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_at FROM syncs WHERE endpoint = ? AND scope = ?",
+                (endpoint, scope),
+            ).fetchone()
+        return row[0] if row else None
+
+    def is_fresh(self, endpoint: str, scope: str) -> bool:
+        synced_at = self.synced_at(endpoint, scope)
+        if synced_at is None:
+            return False
+        return time.time() - synced_at < self.ttl_seconds
+
+    def mark_synced(self, endpoint: str, scope: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO syncs (endpoint, scope, synced_at) "
+                "VALUES (?, ?, ?)",
+                (endpoint, scope, time.time()),
+            )
+
+    def invalidate(self, endpoint: str, vector_store_id: Optional[str] = None) -> None:
+        # Only drops the sync timestamps: rows stay available so the next
+        # refresh can reconcile incrementally instead of starting over.
+        with self._lock, self._conn:
+            if vector_store_id is None:
+                self._conn.execute("DELETE FROM syncs WHERE endpoint = ?", (endpoint,))
+            else:
+                self._conn.execute(
+                    "DELETE FROM syncs WHERE endpoint = ? AND scope = ?",
+                    (endpoint, vector_store_id),
+                )
+
+    def clear(self, endpoint: Optional[str] = None) -> None:
+        with self._lock, self._conn:
+            for table in ("vector_stores", "files", "syncs"):
+                if endpoint is None:
+                    self._conn.execute(f"DELETE FROM {table}")
+                else:
+                    self._conn.execute(
+                        f"DELETE FROM {table} WHERE endpoint = ?", (endpoint,)
+                    )
+
+    def get_vector_stores(self, endpoint: str) -> List[VectorStoreInfo]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, name FROM vector_stores WHERE endpoint = ? "
+                "ORDER BY position",
+                (endpoint,),
+            ).fetchall()
+        return [VectorStoreInfo(id=r[0], name=r[1]) for r in rows]
+
+    def put_vector_stores(
+        self, endpoint: str, stores: Iterable[VectorStoreInfo]
+    ) -> None:
+        # Unnamed stores are listed under their id, as the repositories do.
+        rows = [(endpoint, vs.id, vs.name or vs.id, i) for i, vs in enumerate(stores)]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM vector_stores WHERE endpoint = ?", (endpoint,)
+            )
+            self._conn.executemany(
+                "INSERT INTO vector_stores (endpoint, id, name, position) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        self.mark_synced(endpoint, STORES_SCOPE)
+
+    def get_files(self, endpoint: str, vector_store_id: str) -> Dict[str, FileInfo]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, filename, bytes FROM files "
+                "WHERE endpoint = ? AND vector_store_id = ? ORDER BY rowid",
+                (endpoint, vector_store_id),
+            ).fetchall()
+        return {r[0]: FileInfo(id=r[0], filename=r[1], bytes=r[2]) for r in rows}
+
+    def reconcile_files(
+        self,
+        endpoint: str,
+        vector_store_id: str,
+        added: Iterable[FileInfo],
+        removed: Iterable[str],
+    ) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM files "
+                "WHERE endpoint = ? AND vector_store_id = ? AND id = ?",
+                [(endpoint, vector_store_id, file_id) for file_id in removed],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files "
+                "(endpoint, vector_store_id, id, filename, bytes) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(endpoint, vector_store_id, f.id, f.filename, f.bytes) for f in added],
+            )
@@ -0,0 +1,226 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+# Percentiles are computed over the most recent samples of each operation,
+# so memory stays bounded however long the app runs.
+RESERVOIR_SIZE = 1024
+PERCENTILES = (50, 95, 99)
+DEFAULT_LOG_INTERVAL_SECONDS = 0
+
+
+class Span:
+    # Handed out by Metrics.timer(); the caller fills in what it moved.
+    def __init__(self) -> None:
+        self.items = 0
+        self.bytes = 0
+        self.failed = False
+
+
+class OperationStats:
+    def __init__(self, reservoir_size: int = RESERVOIR_SIZE) -> None:
+        self.count = 0
+        self.errors = 0
+        self.items = 0
+        self.bytes = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._samples: Deque[float] = deque(maxlen=max(1, reservoir_size))
+
+    def record(self, seconds: float, failed: bool, items: int, nbytes: int) -> None:
+        self.count += 1
+        self.errors += int(failed)
+        self.items += items
+        self.bytes += nbytes
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self._samples.append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        samples = sorted(self._samples)
+        data: Dict[str, Any] = {
+            "count": self.count,
+            "errors": self.errors,
+            "items": self.items,
+            "bytes": self.bytes,
+            "mean_ms": _ms(self.total_seconds / self.count) if self.count else None,
+            "max_ms": _ms(self.max_seconds) if self.count else None,
+        }
+        for p in PERCENTILES:
+            value = percentile(samples, p)
+            data[f"p{p}_ms"] = None if value is None else _ms(value)
+        return data
+
+
+class Metrics:
+    # Per-operation call counts, errors, items/bytes and latency samples,
+    # plus plain counters (cache hits and the like). Thread-safe: it is fed
+    # from the UI loop, job threads and fetch pools at the same time.
+    def __init__(self, reservoir_size: int = RESERVOIR_SIZE) -> None:
+        self.reservoir_size = reservoir_size
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._operations: Dict[str, OperationStats] = {}
+        self._counters: Dict[str, int] = {}
+
+    def record(
+        self,
+        operation: str,
+        seconds: float,
+        failed: bool = False,
+        items: int = 0,
+        nbytes: int = 0,
+    ) -> None:
+        with self._lock:
+            stats = self._operations.get(operation)
+            if stats is None:
+                stats = self._operations[operation] = OperationStats(
+                    self.reservoir_size
+                )
+            stats.record(seconds, failed, items, nbytes)
+
+    def count(self, counter: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + n
+
+    @contextmanager
+    def timer(self, operation: str) -> Iterator[Span]:
+        span = Span()
+        started = time.perf_counter()
+        try:
+            yield span
+        except Exception:
+            span.failed = True
+            raise
+        except BaseException:
+            # A cancelled task or Ctrl+C is not a failed call; it is counted
+            # on its own so the error rate stays about the service.
+            self.count(f"{operation}.cancelled")
+            raise
+        finally:
+            self.record(
+                operation,
+                time.perf_counter() - started,
+                span.failed,
+                span.items,
+                span.bytes,
+            )
+
+    def measure(
+        self,
+        operation: str,
+        items: Iterable[T],
+        size: Optional[Callable[[T], int]] = None,
+        first: bool = False,
+    ) -> Iterator[T]:
+        # Times a lazy listing as one call: only the time spent producing
+        # items counts, not the consumer's work between them. With first=True
+        # the wait for the first item is also kept as "<operation>.first".
+        iterator = iter(items)
+        elapsed = 0.0
+        produced = 0
+        failed = False
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    elapsed += time.perf_counter() - started
+                    break
+                elapsed += time.perf_counter() - started
+                if first and produced == 0:
+                    self.record(f"{operation}.first", elapsed)
+                produced += size(item) if size is not None else 1
+                yield item
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.record(operation, elapsed, failed, produced)
+
+    async def ameasure(
+        self,
+        operation: str,
+        items: AsyncIterable[T],
+        size: Optional[Callable[[T], int]] = None,
+        first: bool = False,
+    ) -> AsyncIterator[T]:
+        iterator = items.__aiter__()
+        elapsed = 0.0
+        produced = 0
+        failed = False
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    elapsed += time.perf_counter() - started
+                    break
+                elapsed += time.perf_counter() - started
+                if first and produced == 0:
+                    self.record(f"{operation}.first", elapsed)
+                produced += size(item) if size is not None else 1
+                yield item
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.record(operation, elapsed, failed, produced)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            operations = {
+                name: stats.snapshot()
+                for name, stats in sorted(self._operations.items())
+            }
+            counters = dict(sorted(self._counters.items()))
+        return {
+            "timestamp": time.time(),
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "operations": operations,
+            "counters": counters,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), ensure_ascii=False, sort_keys=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._operations.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+
+# Process-wide registry, shared by the repositories, services and clients.
+METRICS = Metrics()
+
+
+def percentile(samples: List[float], p: float) -> Optional[float]:
+    # Nearest-rank percentile of an already sorted list.
+    if not samples:
+        return None
+    rank = max(1, -(-len(samples) * p // 100))
+    return samples[min(len(samples), int(rank)) - 1]
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
@@ -1,25 +1,153 @@
-from typing import Any, Dict, Iterable, Optional, Tuple
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Container,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
+from services.async_repository import (
+    AsyncProjectsRepository,
+    AzureAsyncProjectsRepository,
+    ThreadedProjectsRepository,
+)
+from services.bulk_upload import (
+    ATTACH_BATCH_SIZE,
+    DEFAULT_UPLOAD_WORKERS,
+    BulkProgress,
+    UploadResult,
+)
+from services.content_index import ContentHit, ContentIndex, ContentIndexes
+from services.directory_sync import (
+    DELETE,
+    DETACH,
+    KEEP,
+    REMOVAL_MODES,
+    SyncPlan,
+    SyncReport,
+    plan_sync,
+    scan_directory,
+)
+from services.filename_index import FilenameIndex
+from services.metadata_cache import STORES_SCOPE, MetadataCache
+from services.metrics import METRICS
+from services.resilience import (
+    AsyncResilientProjectsRepository,
+    Resilience,
+    ResilientProjectsRepository,
+    status_code,
+)
 from services.repository import (
+    DEFAULT_FETCH_WORKERS,
     AzureProjectsRepository,
+    FileFetchError,
     FileInfo,
     ProjectsRepository,
     VectorStoreInfo,
+    fetch_failures,
+)
+from services.upload_manifest import (
+    ManifestEntry,
+    SyncedPath,
+    UploadManifest,
+    hash_file,
 )
 
+T = TypeVar("T")
+
+# Streaming listings hand out a batch once it has this many items or this
+# much time has passed since the previous one, whichever comes first.
+STREAM_BATCH_SIZE = 200
+STREAM_BATCH_SECONDS = 0.25
+DEFAULT_CONTENT_HITS = 50
+
 
 class ProjectsService:
     def __init__(self) -> None:
         self._repo: Optional[ProjectsRepository] = None
+        self._async_repo: Optional[AsyncProjectsRepository] = None
+        self._cache: Optional[MetadataCache] = None
+        self._endpoint: Optional[str] = None
+        self._index: Optional[FilenameIndex] = None
+        self._manifest: Optional[UploadManifest] = None
+        self._content: Optional[ContentIndexes] = None
+        self._index_store_id: Optional[str] = None
+        # Fetch failures of the latest listing of each vector store. Each
+        # listing fills its own list, so concurrent ones don't mix.
+        self._failures: Dict[str, List[FileFetchError]] = {}
+        self._resilience: Optional[Resilience] = None
         self.vector_store_id: Optional[str] = None
         self.vector_store_name: Optional[str] = None
 
-    def set_client(self, client: Any) -> None:
-        self._repo = AzureProjectsRepository(client)
+    def set_resilience(self, resilience: Optional[Resilience]) -> None:
+        # Applies to clients set afterwards; both wrappers share it, so the
+        # rate limit and circuit breaker cover sync and async calls alike.
+        self._resilience = resilience
+
+    def set_client(self, client: Any, max_workers: int = DEFAULT_FETCH_WORKERS) -> None:
+        repo: ProjectsRepository = AzureProjectsRepository(
+            client, max_workers=max_workers
+        )
+        if self._resilience is not None:
+            repo = ResilientProjectsRepository(repo, self._resilience)
+        self._repo = repo
 
     def set_repository(self, repo: ProjectsRepository) -> None:
         self._repo = repo
 
+    def set_async_client(
+        self, client: Any, max_concurrency: int = DEFAULT_FETCH_WORKERS
+    ) -> None:
+        repo: AsyncProjectsRepository = AzureAsyncProjectsRepository(
+            client, max_concurrency=max_concurrency
+        )
+        if self._resilience is not None:
+            repo = AsyncResilientProjectsRepository(repo, self._resilience)
+        self._async_repo = repo
+
+    def set_async_repository(self, repo: Optional[AsyncProjectsRepository]) -> None:
+        self._async_repo = repo
+
+    def _arepo(self) -> AsyncProjectsRepository:
+        # Falls back to running the blocking repository on worker threads.
+        if self._async_repo is not None:
+            return self._async_repo
+        if self._repo is not None:
+            return ThreadedProjectsRepository(self._repo)
+        raise RuntimeError("Cliente do projeto não inicializado.")
+
+    def set_cache(
+        self, cache: Optional[MetadataCache], endpoint: Optional[str]
+    ) -> None:
+        if endpoint != self._endpoint:
+            # The in-memory index and failures belong to the previous project.
+            self._index = None
+            self._index_store_id = None
+            self._failures = {}
+        self._cache = cache
+        self._endpoint = endpoint
+
+    def set_manifest(self, manifest: Optional[UploadManifest]) -> None:
+        self._manifest = manifest
+
+    def set_content_indexes(self, indexes: Optional[ContentIndexes]) -> None:
+        # Text of uploaded files is indexed per endpoint, for content search.
+        self._content = indexes
+
     def set_vector_store(self, vs: VectorStoreInfo | Any) -> None:
         if isinstance(vs, VectorStoreInfo):
             self.vector_store_id = vs.id
@@ -29,28 +157,946 @@ class ProjectsService:
             self.vector_store_name = getattr(vs, "name", None)
 
     def has_client(self) -> bool:
-        return self._repo is not None
+        return self._repo is not None or self._async_repo is not None
+
+    def _cache_enabled(self) -> bool:
+        return self._cache is not None and bool(self._endpoint)
+
+    def cached_vector_stores(self) -> List[VectorStoreInfo]:
+        if not self._cache_enabled():
+            return []
+        return self._cache.get_vector_stores(self._endpoint)
+
+    def cached_vector_store_files(self) -> Dict[str, FileInfo]:
+        if not self._cache_enabled() or not self.vector_store_id:
+            return {}
+        return self._cache.get_files(self._endpoint, self.vector_store_id)
+
+    def invalidate_cache(self, vector_store_id: Optional[str] = None) -> None:
+        if self._cache_enabled():
+            self._cache.invalidate(self._endpoint, vector_store_id)
+
+    def _fresh_vector_stores(self, refresh: bool) -> Optional[List[VectorStoreInfo]]:
+        if (
+            not refresh
+            and self._cache_enabled()
+            and self._cache.is_fresh(self._endpoint, STORES_SCOPE)
+        ):
+            METRICS.count("service.cache.hits")
+            return self._cache.get_vector_stores(self._endpoint)
+        METRICS.count("service.cache.misses")
+        return None
+
+    def _store_vector_stores(self, stores: List[VectorStoreInfo]) -> None:
+        if self._cache_enabled():
+            self._cache.put_vector_stores(self._endpoint, stores)
+
+    def list_vector_stores(self, refresh: bool = False) -> Iterable[VectorStoreInfo]:
+        with METRICS.timer("service.stores.list") as span:
+            stores = self._fresh_vector_stores(refresh)
+            if stores is None:
+                if not self._repo:
+                    raise RuntimeError("Cliente do projeto não inicializado.")
+                stores = list(self._repo.list_vector_stores())
+                self._store_vector_stores(stores)
+            span.items = len(stores)
+        return stores
+
+    async def alist_vector_stores(self, refresh: bool = False) -> List[VectorStoreInfo]:
+        with METRICS.timer("service.stores.list") as span:
+            stores = self._fresh_vector_stores(refresh)
+            if stores is None:
+                stores = [vs async for vs in self._arepo().list_vector_stores()]
+                self._store_vector_stores(stores)
+            span.items = len(stores)
+        return stores
+
+    def _fresh_vector_store_files(self, refresh: bool) -> Optional[Dict[str, FileInfo]]:
+        if not self.vector_store_id:
+            raise RuntimeError("Nenhum Vector Store selecionado.")
+        if (
+            not refresh
+            and self._cache_enabled()
+            and self._cache.is_fresh(self._endpoint, self.vector_store_id)
+        ):
+            METRICS.count("service.cache.hits")
+            return self._cache.get_files(self._endpoint, self.vector_store_id)
+        METRICS.count("service.cache.misses")
+        return None
 
-    def list_vector_stores(self) -> Iterable[VectorStoreInfo]:
+    def list_vector_store_files(self, refresh: bool = False) -> Dict[str, FileInfo]:
+        with METRICS.timer("service.files.list") as span:
+            files = self._list_vector_store_files(refresh)
+            span.items = len(files)
+        return files
+
+    def _list_vector_store_files(self, refresh: bool) -> Dict[str, FileInfo]:
+        cached = self._fresh_vector_store_files(refresh)
+        vector_store_id = self.vector_store_id
+        failures = self._track_failures(vector_store_id)
+        if cached is not None:
+            return cached
         if not self._repo:
             raise RuntimeError("Cliente do projeto não inicializado.")
-        return list(self._repo.list_vector_stores())
+        if not self._cache_enabled():
+            listing = self._repo.list_vector_store_files(vector_store_id)
+            files = {f.id: f for f in listing}
+            failures.extend(fetch_failures(listing))
+            return files
+        # Incremental refresh: list association ids only, fetch metadata for
+        # ids the cache has never seen and drop the ones that disappeared.
+        cached = self._cache.get_files(self._endpoint, vector_store_id)
+        remote_ids = list(self._repo.list_vector_store_file_ids(vector_store_id))
+        missing = [file_id for file_id in remote_ids if file_id not in cached]
+        fetched: List[FileInfo] = []
+        if missing:
+            listing = self._repo.get_files(missing)
+            fetched = list(listing)
+            failures.extend(fetch_failures(listing))
+        return self._apply_file_sync(vector_store_id, cached, remote_ids, fetched)
+
+    async def alist_vector_store_files(
+        self, refresh: bool = False
+    ) -> Dict[str, FileInfo]:
+        with METRICS.timer("service.files.list") as span:
+            files = await self._alist_vector_store_files(refresh)
+            span.items = len(files)
+        return files
+
+    async def _alist_vector_store_files(self, refresh: bool) -> Dict[str, FileInfo]:
+        cached = self._fresh_vector_store_files(refresh)
+        vector_store_id = self.vector_store_id
+        failures = self._track_failures(vector_store_id)
+        if cached is not None:
+            return cached
+        repo = self._arepo()
+        if not self._cache_enabled():
+            listing = repo.list_vector_store_files(vector_store_id)
+            files = {f.id: f async for f in listing}
+            failures.extend(fetch_failures(listing))
+            return files
+        cached = self._cache.get_files(self._endpoint, vector_store_id)
+        remote_ids = [
+            file_id
+            async for file_id in repo.list_vector_store_file_ids(vector_store_id)
+        ]
+        missing = [file_id for file_id in remote_ids if file_id not in cached]
+        fetched: List[FileInfo] = []
+        if missing:
+            listing = repo.get_files(missing)
+            fetched = [f async for f in listing]
+            failures.extend(fetch_failures(listing))
+        return self._apply_file_sync(vector_store_id, cached, remote_ids, fetched)
+
+    def stream_vector_stores(
+        self, refresh: bool = False
+    ) -> Iterator[List[VectorStoreInfo]]:
+        return METRICS.measure(
+            "service.stores.stream",
+            self._stream_vector_stores(refresh),
+            size=len,
+            first=True,
+        )
 
-    def list_vector_store_files(self) -> Dict[str, FileInfo]:
+    def _stream_vector_stores(self, refresh: bool) -> Iterator[List[VectorStoreInfo]]:
+        cached = self._fresh_vector_stores(refresh)
+        if cached is not None:
+            yield cached
+            return
         if not self._repo:
             raise RuntimeError("Cliente do projeto não inicializado.")
-        if not self.vector_store_id:
-            raise RuntimeError("Nenhum Vector Store selecionado.")
-        files = list(self._repo.list_vector_store_files(self.vector_store_id))
-        return {f.id: f for f in files}
+        stores: List[VectorStoreInfo] = []
+        for batch in _batches(self._repo.list_vector_stores()):
+            stores.extend(batch)
+            yield batch
+        self._store_vector_stores(stores)
+
+    def astream_vector_stores(
+        self, refresh: bool = False
+    ) -> AsyncIterator[List[VectorStoreInfo]]:
+        # Same result as alist_vector_stores, delivered as the pager fills.
+        return METRICS.ameasure(
+            "service.stores.stream",
+            self._astream_vector_stores(refresh),
+            size=len,
+            first=True,
+        )
+
+    async def _astream_vector_stores(
+        self, refresh: bool
+    ) -> AsyncIterator[List[VectorStoreInfo]]:
+        cached = self._fresh_vector_stores(refresh)
+        if cached is not None:
+            yield cached
+            return
+        stores: List[VectorStoreInfo] = []
+        async for batch in _abatches(self._arepo().list_vector_stores()):
+            stores.extend(batch)
+            yield batch
+        self._store_vector_stores(stores)
+
+    def stream_vector_store_files(
+        self, refresh: bool = False
+    ) -> Iterator[List[FileInfo]]:
+        return METRICS.measure(
+            "service.files.stream",
+            self._stream_vector_store_files(refresh),
+            size=len,
+            first=True,
+        )
+
+    def _stream_vector_store_files(self, refresh: bool) -> Iterator[List[FileInfo]]:
+        cached = self._fresh_vector_store_files(refresh)
+        vector_store_id = self.vector_store_id
+        failures = self._track_failures(vector_store_id)
+        if cached is not None:
+            yield list(cached.values())
+            self._set_index(vector_store_id, cached)
+            return
+        if not self._repo:
+            raise RuntimeError("Cliente do projeto não inicializado.")
+        if not self._cache_enabled():
+            files: Dict[str, FileInfo] = {}
+            listing = self._repo.list_vector_store_files(vector_store_id)
+            for batch in _batches(listing):
+                files.update((f.id, f) for f in batch)
+                yield batch
+            failures.extend(fetch_failures(listing))
+            self._set_index(vector_store_id, files)
+            return
+        cached = self._cache.get_files(self._endpoint, vector_store_id)
+        remote_ids: List[str] = []
+        fetched: List[FileInfo] = []
+        for ids in _batches(self._repo.list_vector_store_file_ids(vector_store_id)):
+            remote_ids.extend(ids)
+            missing = [file_id for file_id in ids if file_id not in cached]
+            new: Dict[str, FileInfo] = {}
+            if missing:
+                listing = self._repo.get_files(missing)
+                new = {f.id: f for f in listing}
+                failures.extend(fetch_failures(listing))
+            fetched.extend(new.values())
+            yield _known_files(ids, cached, new)
+        files = self._apply_file_sync(vector_store_id, cached, remote_ids, fetched)
+        self._set_index(vector_store_id, files)
+
+    def astream_vector_store_files(
+        self, refresh: bool = False
+    ) -> AsyncIterator[List[FileInfo]]:
+        # Batches follow the service order; unknown ids are resolved per
+        # batch, so cached files show up without waiting for the fetches.
+        # The filename index is rebuilt once the listing completes.
+        return METRICS.ameasure(
+            "service.files.stream",
+            self._astream_vector_store_files(refresh),
+            size=len,
+            first=True,
+        )
+
+    async def _astream_vector_store_files(
+        self, refresh: bool
+    ) -> AsyncIterator[List[FileInfo]]:
+        cached = self._fresh_vector_store_files(refresh)
+        vector_store_id = self.vector_store_id
+        failures = self._track_failures(vector_store_id)
+        if cached is not None:
+            yield list(cached.values())
+            self._set_index(vector_store_id, cached)
+            return
+        repo = self._arepo()
+        if not self._cache_enabled():
+            files: Dict[str, FileInfo] = {}
+            listing = repo.list_vector_store_files(vector_store_id)
+            async for batch in _abatches(listing):
+                files.update((f.id, f) for f in batch)
+                yield batch
+            failures.extend(fetch_failures(listing))
+            self._set_index(vector_store_id, files)
+            return
+        cached = self._cache.get_files(self._endpoint, vector_store_id)
+        remote_ids: List[str] = []
+        fetched: List[FileInfo] = []
+        async for ids in _abatches(repo.list_vector_store_file_ids(vector_store_id)):
+            remote_ids.extend(ids)
+            missing = [file_id for file_id in ids if file_id not in cached]
+            new: Dict[str, FileInfo] = {}
+            if missing:
+                listing = repo.get_files(missing)
+                new = {f.id: f async for f in listing}
+                failures.extend(fetch_failures(listing))
+            fetched.extend(new.values())
+            yield _known_files(ids, cached, new)
+        files = self._apply_file_sync(vector_store_id, cached, remote_ids, fetched)
+        self._set_index(vector_store_id, files)
+
+    def _apply_file_sync(
+        self,
+        vector_store_id: str,
+        cached: Dict[str, FileInfo],
+        remote_ids: List[str],
+        fetched: List[FileInfo],
+    ) -> Dict[str, FileInfo]:
+        remote_set = set(remote_ids)
+        removed = [file_id for file_id in cached if file_id not in remote_set]
+        self._cache.reconcile_files(self._endpoint, vector_store_id, fetched, removed)
+        self._cache.mark_synced(self._endpoint, vector_store_id)
+        merged = {**cached, **{f.id: f for f in fetched}}
+        return {file_id: merged[file_id] for file_id in remote_ids if file_id in merged}
+
+    def _index_stale(self, refresh: bool) -> bool:
+        return (
+            refresh
+            or self._index is None
+            or self._index_store_id != self.vector_store_id
+        )
+
+    def _set_index(
+        self, vector_store_id: Optional[str], files: Dict[str, FileInfo]
+    ) -> None:
+        self._index = FilenameIndex(files.values())
+        self._index_store_id = vector_store_id
+
+    def file_index(self, refresh: bool = False) -> FilenameIndex:
+        # Built once per vector store selection and kept up to date by uploads.
+        if self._index_stale(refresh):
+            vector_store_id = self.vector_store_id
+            self._set_index(vector_store_id, self.list_vector_store_files(refresh))
+        return self._index
+
+    async def afile_index(self, refresh: bool = False) -> FilenameIndex:
+        if self._index_stale(refresh):
+            vector_store_id = self.vector_store_id
+            files = await self.alist_vector_store_files(refresh)
+            self._set_index(vector_store_id, files)
+        return self._index
+
+    async def aprefetch_file_index(
+        self, on_progress: Optional[Callable[[int], None]] = None
+    ) -> int:
+        # Warms the metadata cache and the filename index for the selected
+        # store; a no-op when the index is already current.
+        if self.file_index_ready():
+            return len(self._index)
+        count = 0
+        async for batch in self.astream_vector_store_files():
+            count += len(batch)
+            if on_progress is not None:
+                on_progress(count)
+        return count
+
+    def file_index_ready(self) -> bool:
+        return self._index is not None and self._index_store_id == self.vector_store_id
+
+    def search_files(self, query: str, limit: Optional[int] = None) -> List[FileInfo]:
+        with METRICS.timer("service.files.search") as span:
+            results = self.file_index().search(query, limit)
+            span.items = len(results)
+        return results
+
+    def content_index(self) -> Optional[ContentIndex]:
+        if self._content is None or not self._endpoint:
+            return None
+        return self._content.get(self._endpoint)
+
+    def search_content(
+        self, query: str, limit: int = DEFAULT_CONTENT_HITS
+    ) -> List[ContentHit]:
+        # Fully local: ranks the indexed text of files uploaded from here,
+        # restricted to the selected store when its listing is known.
+        with METRICS.timer("service.files.content_search") as span:
+            index = self.content_index()
+            hits = (
+                [] if index is None else index.search(query, limit, self._store_ids())
+            )
+            span.items = len(hits)
+        return hits
+
+    def _store_ids(self) -> Optional[Container[str]]:
+        if self.file_index_ready():
+            return self._index
+        if self._cache_enabled() and self.vector_store_id:
+            cached = self._cache.get_files(self._endpoint, self.vector_store_id)
+            if cached:
+                return cached
+        return None
+
+    def _index_content(
+        self, index: Optional[ContentIndex], info: FileInfo, file_path: str
+    ) -> None:
+        # Remote files never change, so a file id indexed once is done. A
+        # failure here never fails the upload.
+        if index is None or info.id in index:
+            return
+        with METRICS.timer("service.files.content_index") as span:
+            try:
+                span.items = (
+                    1 if index.add_file(info.id, info.filename, file_path) else 0
+                )
+            except Exception as e:  # noqa: BLE001
+                span.failed = True
+                logging.warning(f"Falha ao indexar o conteúdo de {file_path}: {e}")
+
+    def _record_uploaded(self, vector_store_id: str, *infos: FileInfo) -> None:
+        if self._index is not None and self._index_store_id == vector_store_id:
+            for info in infos:
+                self._index.add(info)
+        if self._cache_enabled() and infos:
+            self._cache.reconcile_files(self._endpoint, vector_store_id, infos, [])
+
+    def _track_failures(self, vector_store_id: str) -> List[FileFetchError]:
+        failures: List[FileFetchError] = []
+        self._failures[vector_store_id] = failures
+        return failures
+
+    def failed_files(
+        self, vector_store_id: Optional[str] = None
+    ) -> List[FileFetchError]:
+        # Lookups that failed in the latest listing of the store, the
+        # selected one by default.
+        return list(self._failures.get(vector_store_id or self.vector_store_id, []))
+
+    def _manifest_enabled(self) -> bool:
+        return self._manifest is not None and bool(self._endpoint)
+
+    def _known_content(
+        self, file_path: str
+    ) -> Tuple[Optional[str], Optional[ManifestEntry]]:
+        if not self._manifest_enabled():
+            return None, None
+        sha256 = hash_file(file_path)
+        return sha256, self._manifest.lookup(self._endpoint, sha256)
+
+    def _is_attached(
+        self,
+        entry: ManifestEntry,
+        vector_store_id: str,
+        remote_ids: Optional[Set[str]],
+    ) -> bool:
+        # remote_ids holds the store's file ids from a fresh metadata cache
+        # (None without one), loaded once by the caller rather than per file.
+        # The cache wins over the manifest: the file may have been detached
+        # remotely.
+        if vector_store_id not in entry.vector_store_ids:
+            return False
+        return remote_ids is None or entry.file.id in remote_ids
+
+    def _record_manifest(
+        self,
+        sha256: Optional[str],
+        vector_store_id: str,
+        info: Optional[FileInfo] = None,
+    ) -> None:
+        if sha256 is None or not self._manifest_enabled():
+            return
+        if info is not None:
+            self._manifest.record_upload(self._endpoint, sha256, info)
+        self._manifest.record_attach(self._endpoint, sha256, vector_store_id)
 
     def upload_and_attach_file(self, file_path: str) -> Tuple[bool, str]:
+        with METRICS.timer("service.files.upload") as span:
+            ok, message = self._upload_and_attach_file(file_path)
+            span.items = 1
+            span.failed = not ok
+        return ok, message
+
+    def _upload_and_attach_file(self, file_path: str) -> Tuple[bool, str]:
         if not self._repo:
             return False, "Cliente do projeto não inicializado."
         if not self.vector_store_id:
             return False, "Nenhum Vector Store selecionado."
+        vector_store_id = self.vector_store_id
+        index = self.content_index()
         try:
-            self._repo.upload_file_to_vector_store(self.vector_store_id, file_path)
+            sha256, entry = self._known_content(file_path)
+            if entry is not None and self._is_attached(
+                entry, vector_store_id, self._remote_file_ids(vector_store_id)
+            ):
+                self._index_content(index, entry.file, file_path)
+                return True, _skipped_message(entry)
+            if entry is not None:
+                try:
+                    failed = self._repo.attach_files(vector_store_id, [entry.file.id])
+                    if not failed:
+                        self._index_content(index, entry.file, file_path)
+                        return True, self._reattached(sha256, vector_store_id, entry)
+                except Exception:  # noqa: BLE001
+                    pass
+                # The remote file is gone or unusable: upload it again.
+                self._manifest.forget(self._endpoint, sha256)
+            info = self._repo.upload_file_to_vector_store(vector_store_id, file_path)
+            self._record_manifest(sha256, vector_store_id, info)
+            self._record_uploaded(vector_store_id, info)
+            self._index_content(index, info, file_path)
             return True, "Arquivo anexado com sucesso."
         except Exception as e:  # noqa: BLE001
             return False, f"Erro ao anexar arquivo: {e}"
+
+    async def aupload_and_attach_file(self, file_path: str) -> Tuple[bool, str]:
+        with METRICS.timer("service.files.upload") as span:
+            ok, message = await self._aupload_and_attach_file(file_path)
+            span.items = 1
+            span.failed = not ok
+        return ok, message
+
+    async def _aupload_and_attach_file(self, file_path: str) -> Tuple[bool, str]:
+        if not self.has_client():
+            return False, "Cliente do projeto não inicializado."
+        if not self.vector_store_id:
+            return False, "Nenhum Vector Store selecionado."
+        vector_store_id = self.vector_store_id
+        repo = self._arepo()
+        index = self.content_index()
+        try:
+            sha256, entry = await asyncio.to_thread(self._known_content, file_path)
+            if entry is not None and self._is_attached(
+                entry, vector_store_id, self._remote_file_ids(vector_store_id)
+            ):
+                await asyncio.to_thread(
+                    self._index_content, index, entry.file, file_path
+                )
+                return True, _skipped_message(entry)
+            if entry is not None:
+                try:
+                    failed = await repo.attach_files(vector_store_id, [entry.file.id])
+                    if not failed:
+                        await asyncio.to_thread(
+                            self._index_content, index, entry.file, file_path
+                        )
+                        return True, self._reattached(sha256, vector_store_id, entry)
+                except Exception:  # noqa: BLE001
+                    pass
+                self._manifest.forget(self._endpoint, sha256)
+            info = await repo.upload_file_to_vector_store(vector_store_id, file_path)
+            self._record_manifest(sha256, vector_store_id, info)
+            self._record_uploaded(vector_store_id, info)
+            await asyncio.to_thread(self._index_content, index, info, file_path)
+            return True, "Arquivo anexado com sucesso."
+        except Exception as e:  # noqa: BLE001
+            return False, f"Erro ao anexar arquivo: {e}"
+
+    def _reattached(
+        self, sha256: Optional[str], vector_store_id: str, entry: ManifestEntry
+    ) -> str:
+        self._record_manifest(sha256, vector_store_id)
+        self._record_uploaded(vector_store_id, entry.file)
+        return (
+            f"Conteúdo já enviado anteriormente (ID: {entry.file.id}); apenas anexado."
+        )
+
+    def upload_many(
+        self,
+        paths: List[str],
+        max_workers: int = DEFAULT_UPLOAD_WORKERS,
+        on_progress: Optional[Callable[[BulkProgress], None]] = None,
+        should_cancel: Optional[Callable[[], bool]] = None,
+    ) -> List[UploadResult]:
+        with METRICS.timer("service.files.upload_many") as span:
+            results = self._upload_many(paths, max_workers, on_progress, should_cancel)
+            span.items = len(results)
+            span.bytes = sum(r.bytes for r in results if r.ok and r.action == "upload")
+            span.failed = not all(r.ok for r in results)
+        return results
+
+    def _upload_many(
+        self,
+        paths: List[str],
+        max_workers: int,
+        on_progress: Optional[Callable[[BulkProgress], None]],
+        should_cancel: Optional[Callable[[], bool]],
+    ) -> List[UploadResult]:
+        if not self._repo:
+            raise RuntimeError("Cliente do projeto não inicializado.")
+        if not self.vector_store_id:
+            raise RuntimeError("Nenhum Vector Store selecionado.")
+        vector_store_id = self.vector_store_id
+        index = self.content_index()
+        remote_ids = self._remote_file_ids(vector_store_id)
+        results = [UploadResult(path=p) for p in paths]
+        progress = BulkProgress(total=len(paths))
+        lock = threading.Lock()
+        # Files to attach in the batch phase, either freshly uploaded or
+        # already known remotely by content hash.
+        to_attach: Dict[int, FileInfo] = {}
+        claimed: Dict[str, int] = {}
+        duplicates: Dict[int, int] = {}
+
+        def notify() -> None:
+            if on_progress is not None:
+                on_progress(progress)
+
+        def cancelled() -> bool:
+            return should_cancel is not None and should_cancel()
+
+        def upload(i: int) -> None:
+            result = results[i]
+            started = time.monotonic()
+            if cancelled():
+                result.error = "Cancelado."
+                with lock:
+                    progress.failed += 1
+                return
+            try:
+                result.bytes = os.path.getsize(result.path)
+                result.sha256, entry = self._known_content(result.path)
+                with lock:
+                    primary = (
+                        claimed.setdefault(result.sha256, i) if result.sha256 else i
+                    )
+                if primary != i:
+                    result.action = "duplicate"
+                    duplicates[i] = primary
+                elif entry is not None and self._is_attached(
+                    entry, vector_store_id, remote_ids
+                ):
+                    result.action = "skip"
+                    result.ok = True
+                    result.file_id = entry.file.id
+                    self._index_content(index, entry.file, result.path)
+                elif entry is not None:
+                    result.action = "attach"
+                    to_attach[i] = entry.file
+                    result.file_id = entry.file.id
+                else:
+                    to_attach[i] = self._repo.upload_file(result.path)
+                    result.file_id = to_attach[i].id
+                if i in to_attach:
+                    # Text extraction runs here, in parallel with the
+                    # other uploads, rather than in the serial attach phase.
+                    self._index_content(index, to_attach[i], result.path)
+            except Exception as e:  # noqa: BLE001
+                result.error = f"Erro ao enviar: {e}"
+            result.seconds = time.monotonic() - started
+            with lock:
+                progress.done += 1
+                if result.action == "upload":
+                    progress.bytes_done += result.bytes
+                if result.error:
+                    progress.failed += 1
+                notify()
+
+        notify()
+        with ThreadPoolExecutor(
+            max_workers=max(1, max_workers), thread_name_prefix="bulk-upload"
+        ) as pool:
+            list(pool.map(upload, range(len(paths))))
+
+        # Attach everything that was uploaded with the file-batch API instead of
+        # one create_and_poll per file.
+        progress.phase = "attach"
+        notify()
+        order = sorted(to_attach)
+        for start in range(0, len(order), ATTACH_BATCH_SIZE):
+            chunk = order[start : start + ATTACH_BATCH_SIZE]
+            ids = [to_attach[i].id for i in chunk]
+            if cancelled():
+                for i in chunk:
+                    results[i].error = "Cancelado antes de anexar."
+                    progress.failed += 1
+                continue
+            try:
+                failed_ids = set(self._repo.attach_files(vector_store_id, ids))
+                batch_error = "Falha ao anexar no Vector Store."
+            except Exception as e:  # noqa: BLE001
+                failed_ids = set(ids)
+                batch_error = f"Erro ao anexar: {e}"
+            # Bookkeeping for the whole chunk is written once, not per file.
+            attached: List[int] = []
+            for i in chunk:
+                result = results[i]
+                if to_attach[i].id in failed_ids:
+                    result.error = batch_error
+                    progress.failed += 1
+                    if result.action == "attach" and self._manifest_enabled():
+                        # Stale remote id: the next run uploads the content again.
+                        self._manifest.forget(self._endpoint, result.sha256)
+                else:
+                    result.ok = True
+                    attached.append(i)
+            if self._manifest_enabled():
+                self._manifest.record_attached(
+                    self._endpoint,
+                    vector_store_id,
+                    [
+                        (
+                            results[i].sha256,
+                            to_attach[i] if results[i].action == "upload" else None,
+                        )
+                        for i in attached
+                        if results[i].sha256
+                    ],
+                )
+            self._record_uploaded(vector_store_id, *(to_attach[i] for i in attached))
+            notify()
+
+        for i, primary in duplicates.items():
+            results[i].ok = results[primary].ok
+            results[i].file_id = results[primary].file_id
+            if not results[i].ok:
+                results[i].error = f"Duplicado de {results[primary].path} (falhou)."
+                progress.failed += 1
+        progress.phase = "done"
+        notify()
+        return results
+
+    def _remote_file_ids(self, vector_store_id: str) -> Optional[Set[str]]:
+        if self._cache_enabled() and self._cache.is_fresh(
+            self._endpoint, vector_store_id
+        ):
+            return set(self._cache.get_files(self._endpoint, vector_store_id))
+        return None
+
+    def _plan_sync(self, root: str) -> SyncPlan:
+        if not self.vector_store_id:
+            raise RuntimeError("Nenhum Vector Store selecionado.")
+        if not self._manifest_enabled():
+            raise RuntimeError("A sincronização requer o manifesto de uploads.")
+        root = os.path.abspath(os.path.expanduser(root))
+        if not os.path.isdir(root):
+            raise RuntimeError(f"Diretório não encontrado: {root}")
+        vector_store_id = self.vector_store_id
+        synced = self._manifest.synced_paths(self._endpoint, vector_store_id, root)
+        return plan_sync(
+            root,
+            vector_store_id,
+            scan_directory(root),
+            synced,
+            self._remote_file_ids(vector_store_id),
+        )
+
+    def sync_directory(
+        self,
+        root: str,
+        dry_run: bool = False,
+        removal: str = DETACH,
+        max_workers: int = DEFAULT_UPLOAD_WORKERS,
+        on_progress: Optional[Callable[[BulkProgress], None]] = None,
+        should_cancel: Optional[Callable[[], bool]] = None,
+    ) -> SyncReport:
+        # Mirrors a local directory into the selected store: new and changed
+        # files go through upload_many (content already known remotely is
+        # only attached), and store files whose local copy was deleted or
+        # replaced are detached, deleted or kept according to `removal`.
+        if not self._repo:
+            raise RuntimeError("Cliente do projeto não inicializado.")
+        if removal not in REMOVAL_MODES:
+            raise RuntimeError(f"Modo de remoção inválido: {removal}")
+        with METRICS.timer("service.files.sync") as span:
+            started = time.monotonic()
+            plan = self._plan_sync(root)
+            report = SyncReport(plan=plan, dry_run=dry_run, removal=removal)
+            if not dry_run and not plan.is_empty():
+                self._apply_sync(report, max_workers, on_progress, should_cancel)
+            report.seconds = time.monotonic() - started
+            span.items = len(plan.new) + len(plan.changed) + len(plan.removed)
+            span.bytes = sum(r.bytes for r in report.results if r.ok)
+            span.failed = report.failed() > 0
+        return report
+
+    def _apply_sync(
+        self,
+        report: SyncReport,
+        max_workers: int,
+        on_progress: Optional[Callable[[BulkProgress], None]],
+        should_cancel: Optional[Callable[[], bool]],
+    ) -> None:
+        plan = report.plan
+        endpoint, vector_store_id, root = (
+            self._endpoint,
+            plan.vector_store_id,
+            plan.root,
+        )
+        synced = self._manifest.synced_paths(endpoint, vector_store_id, root)
+        pending = {f.path: f for f in plan.new + plan.changed}
+        if pending:
+            report.results = self.upload_many(
+                list(pending), max_workers, on_progress, should_cancel
+            )
+        recorded: List[SyncedPath] = []
+        replaced: List[SyncedPath] = []
+        for result in report.results:
+            if not result.ok or not result.file_id:
+                continue
+            local = pending[result.path]
+            recorded.append(
+                SyncedPath(
+                    rel_path=local.rel_path,
+                    size=local.size,
+                    mtime_ns=local.mtime_ns,
+                    sha256=result.sha256 or "",
+                    file_id=result.file_id,
+                )
+            )
+            previous = synced.get(local.rel_path)
+            if previous is not None and previous.file_id != result.file_id:
+                replaced.append(previous)
+        self._manifest.record_synced(endpoint, vector_store_id, root, recorded)
+
+        if report.removal == KEEP:
+            self._manifest.forget_synced(
+                endpoint, vector_store_id, root, [e.rel_path for e in plan.removed]
+            )
+            return
+        # A remote file can back several local paths with the same content;
+        # it only goes once no synced path refers to it any more.
+        gone = {e.rel_path for e in plan.removed + replaced}
+        in_use = {e.file_id for p, e in synced.items() if p not in gone}
+        in_use.update(e.file_id for e in recorded)
+        candidates: Dict[str, SyncedPath] = {}
+        for entry in plan.removed + replaced:
+            if entry.file_id not in in_use:
+                candidates.setdefault(entry.file_id, entry)
+        removed_ok = self._remove_synced(
+            report, list(candidates.values()), max_workers, on_progress, should_cancel
+        )
+        # Paths whose store file could not be removed stay in the manifest,
+        # so the next sync tries again.
+        self._manifest.forget_synced(
+            endpoint,
+            vector_store_id,
+            root,
+            [
+                e.rel_path
+                for e in plan.removed
+                if e.file_id not in candidates or e.file_id in removed_ok
+            ],
+        )
+
+    def _remove_synced(
+        self,
+        report: SyncReport,
+        entries: List[SyncedPath],
+        max_workers: int,
+        on_progress: Optional[Callable[[BulkProgress], None]],
+        should_cancel: Optional[Callable[[], bool]],
+    ) -> Set[str]:
+        vector_store_id = report.plan.vector_store_id
+        progress = BulkProgress(total=len(entries), phase="remove")
+        lock = threading.Lock()
+        removed: Set[str] = set()
+
+        def remove(entry: SyncedPath) -> None:
+            if should_cancel is not None and should_cancel():
+                error = f"{entry.rel_path}: cancelado antes de remover."
+            else:
+                error = self._remove_store_file(vector_store_id, entry, report.removal)
+            with lock:
+                progress.done += 1
+                if error:
+                    progress.failed += 1
+                    report.errors.append(error)
+                else:
+                    removed.add(entry.file_id)
+                    report.removed += 1
+                if on_progress is not None:
+                    on_progress(progress)
+
+        if entries:
+            with ThreadPoolExecutor(
+                max_workers=max(1, max_workers), thread_name_prefix="sync-remove"
+            ) as pool:
+                list(pool.map(remove, entries))
+        if removed and self._cache_enabled():
+            self._cache.reconcile_files(
+                self._endpoint, vector_store_id, [], list(removed)
+            )
+        if self._index is not None and self._index_store_id == vector_store_id:
+            for file_id in removed:
+                self._index.remove(file_id)
+        return removed
+
+    def _remove_store_file(
+        self, vector_store_id: str, entry: SyncedPath, removal: str
+    ) -> Optional[str]:
+        # Already gone remotely (404) counts as removed.
+        try:
+            try:
+                self._repo.detach_file(vector_store_id, entry.file_id)
+            except Exception as e:  # noqa: BLE001
+                if status_code(e) != 404:
+                    raise
+            if entry.sha256:
+                self._manifest.forget_attach(
+                    self._endpoint, entry.sha256, vector_store_id
+                )
+            if removal == DELETE and self._attached_elsewhere(vector_store_id, entry):
+                # Deleting the file would take it out of the other stores too.
+                logging.info(
+                    f"{entry.file_id} continua anexado a outros Vector Stores; "
+                    "apenas desanexado."
+                )
+            elif removal == DELETE:
+                try:
+                    self._repo.delete_file(entry.file_id)
+                except Exception as e:  # noqa: BLE001
+                    if status_code(e) != 404:
+                        raise
+                if entry.sha256:
+                    self._manifest.forget(self._endpoint, entry.sha256)
+                index = self.content_index()
+                if index is not None:
+                    index.remove(entry.file_id)
+        except Exception as e:  # noqa: BLE001
+            return f"{entry.rel_path}: erro ao remover {entry.file_id}: {e}"
+        return None
+
+    def _attached_elsewhere(self, vector_store_id: str, entry: SyncedPath) -> bool:
+        if not entry.sha256:
+            return False
+        known = self._manifest.lookup(self._endpoint, entry.sha256)
+        return (
+            known is not None
+            and known.file.id == entry.file_id
+            and bool(known.vector_store_ids - {vector_store_id})
+        )
+
+
+def _skipped_message(entry: ManifestEntry) -> str:
+    return (
+        f"Conteúdo idêntico já está no Vector Store (ID: {entry.file.id}). "
+        "Envio ignorado."
+    )
+
+
+def _known_files(
+    ids: List[str], cached: Dict[str, FileInfo], fetched: Dict[str, FileInfo]
+) -> List[FileInfo]:
+    files = []
+    for file_id in ids:
+        info = fetched.get(file_id) or cached.get(file_id)
+        if info is not None:
+            files.append(info)
+    return files
+
+
+def _batches(
+    items: Iterable[T],
+    size: int = STREAM_BATCH_SIZE,
+    seconds: float = STREAM_BATCH_SECONDS,
+) -> Iterator[List[T]]:
+    batch: List[T] = []
+    flushed_at = time.monotonic()
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size or time.monotonic() - flushed_at >= seconds:
+            yield batch
+            batch = []
+            flushed_at = time.monotonic()
+    if batch:
+        yield batch
+
+
+async def _abatches(
+    items: AsyncIterable[T],
+    size: int = STREAM_BATCH_SIZE,
+    seconds: float = STREAM_BATCH_SECONDS,
+) -> AsyncIterator[List[T]]:
+    batch: List[T] = []
+    flushed_at = time.monotonic()
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size or time.monotonic() - flushed_at >= seconds:
+            yield batch
+            batch = []
+            flushed_at = time.monotonic()
+    if batch:
+        yield batch
@@ -1,5 +1,11 @@
-from dataclasses import dataclass
-from typing import Iterable, Protocol
+import logging
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Deque, Iterable, Iterator, List, Optional, Protocol, Tuple
+
+from services.metrics import METRICS
 
 
 @dataclass(frozen=True)
@@ -15,48 +21,227 @@ class FileInfo:
     bytes: int | None = None
 
 
+@dataclass(frozen=True)
+class FileFetchError:
+    file_id: str
+    error: str
+    # Kept so wrappers can tell transient failures (429/5xx) from final ones.
+    exception: Optional[BaseException] = field(default=None, compare=False, repr=False)
+
+
+class FileListing:
+    # Result of one listing or lookup call: the files, streamed as they are
+    # resolved, plus the lookups that failed along the way. Failures belong
+    # to the call, so concurrent listings never see each other's.
+    def __init__(
+        self,
+        files: Iterable[FileInfo],
+        failed: Optional[List[FileFetchError]] = None,
+    ) -> None:
+        self._files = files
+        self.failed: List[FileFetchError] = [] if failed is None else failed
+
+    def __iter__(self) -> Iterator[FileInfo]:
+        return iter(self._files)
+
+
+def fetch_failures(listing: Iterable[FileInfo]) -> List[FileFetchError]:
+    # Custom repositories may return plain iterables, which report none.
+    return list(getattr(listing, "failed", []))
+
+
 class ProjectsRepository(Protocol):
     def list_vector_stores(self) -> Iterable[VectorStoreInfo]: ...
 
-    def list_vector_store_files(self, vector_store_id: str) -> Iterable[FileInfo]: ...
+    def list_vector_store_files(self, vector_store_id: str) -> FileListing: ...
+
+    def list_vector_store_file_ids(self, vector_store_id: str) -> Iterable[str]: ...
+
+    def get_files(self, file_ids: Iterable[str]) -> FileListing: ...
 
     def upload_file_to_vector_store(
         self, vector_store_id: str, file_path: str
-    ) -> None: ...
+    ) -> FileInfo: ...
+
+    def upload_file(self, file_path: str) -> FileInfo: ...
+
+    def attach_files(self, vector_store_id: str, file_ids: List[str]) -> List[str]: ...
+
+    def detach_file(self, vector_store_id: str, file_id: str) -> None: ...
+
+    def delete_file(self, file_id: str) -> None: ...
+
+
+DEFAULT_FETCH_WORKERS = 8
 
 
 class AzureProjectsRepository:
-    def __init__(self, project_client) -> None:
+    def __init__(
+        self, project_client, max_workers: int = DEFAULT_FETCH_WORKERS
+    ) -> None:
         self.client = project_client
+        self.max_workers = max(1, max_workers)
 
     def list_vector_stores(self) -> Iterable[VectorStoreInfo]:
         stores = self.client.agents.vector_stores.list()
-        for vs in stores:
-            yield VectorStoreInfo(id=vs.id, name=getattr(vs, "name", vs.id))
+        for vs in METRICS.measure("repo.stores.list", stores):
+            yield VectorStoreInfo(id=vs.id, name=getattr(vs, "name", None) or vs.id)
+
+    def list_vector_store_files(self, vector_store_id: str) -> FileListing:
+        def refs() -> Iterator[Tuple[str, Optional[FileInfo]]]:
+            assocs = self.client.agents.vector_store_files.list(
+                vector_store_id=vector_store_id
+            )
+            for a in METRICS.measure("repo.store_files.list", assocs):
+                yield a.id, file_info_from_assoc(a)
+
+        return self._resolve(refs())
 
-    def list_vector_store_files(self, vector_store_id: str) -> Iterable[FileInfo]:
+    def list_vector_store_file_ids(self, vector_store_id: str) -> Iterable[str]:
         assocs = self.client.agents.vector_store_files.list(
             vector_store_id=vector_store_id
         )
-        for assoc in assocs:
-            try:
-                f = self.client.agents.files.get(file_id=assoc.id)
-                yield FileInfo(
-                    id=f.id, filename=f.filename, bytes=getattr(f, "bytes", None)
-                )
-            except Exception:  # noqa: BLE001
+        for assoc in METRICS.measure("repo.store_files.list", assocs):
+            yield assoc.id
+
+    def get_files(self, file_ids: Iterable[str]) -> FileListing:
+        return self._resolve((file_id, None) for file_id in file_ids)
+
+    def _resolve(self, refs: Iterable[Tuple[str, Optional[FileInfo]]]) -> FileListing:
+        failed: List[FileFetchError] = []
+        if self.max_workers == 1:
+            return FileListing(self._fetch_sequential(refs, failed), failed)
+        return FileListing(self._fetch_parallel(refs, failed), failed)
+
+    def _fetch_sequential(
+        self,
+        refs: Iterable[Tuple[str, Optional[FileInfo]]],
+        failed: List[FileFetchError],
+    ) -> Iterator[FileInfo]:
+        for file_id, info in refs:
+            if info is not None:
+                yield info
                 continue
+            try:
+                yield self._get_file(file_id)
+            except Exception as e:  # noqa: BLE001
+                failed.append(_fetch_error(file_id, e))
+
+    def _fetch_parallel(
+        self,
+        refs: Iterable[Tuple[str, Optional[FileInfo]]],
+        failed: List[FileFetchError],
+    ) -> Iterator[FileInfo]:
+        # Bounded window of in-flight lookups; results are drained in the
+        # order the associations were listed.
+        window = self.max_workers * 4
+        pending: Deque[Tuple[str, FileInfo | Future]] = deque()
+        pool = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="files-get"
+        )
+        try:
+            for file_id, info in refs:
+                if info is not None:
+                    pending.append((file_id, info))
+                else:
+                    pending.append((file_id, pool.submit(self._get_file, file_id)))
+                while len(pending) >= window:
+                    info = self._drain(pending, failed)
+                    if info is not None:
+                        yield info
+            while pending:
+                info = self._drain(pending, failed)
+                if info is not None:
+                    yield info
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
 
-    def upload_file_to_vector_store(self, vector_store_id: str, file_path: str) -> None:
+    def _drain(
+        self,
+        pending: Deque[Tuple[str, FileInfo | Future]],
+        failed: List[FileFetchError],
+    ) -> Optional[FileInfo]:
+        file_id, item = pending.popleft()
+        if isinstance(item, FileInfo):
+            return item
+        try:
+            return item.result()
+        except Exception as e:  # noqa: BLE001
+            failed.append(_fetch_error(file_id, e))
+            return None
+
+    def _get_file(self, file_id: str) -> FileInfo:
+        with METRICS.timer("repo.files.get"):
+            f = self.client.agents.files.get(file_id=file_id)
+        return FileInfo(id=f.id, filename=f.filename, bytes=getattr(f, "bytes", None))
+
+    def upload_file_to_vector_store(
+        self, vector_store_id: str, file_path: str
+    ) -> FileInfo:
+        info = self.upload_file(file_path)
+        with METRICS.timer("repo.store_files.attach") as span:
+            span.items = 1
+            self.client.agents.vector_store_files.create_and_poll(
+                vector_store_id=vector_store_id, file_id=info.id
+            )
+        return info
+
+    def upload_file(self, file_path: str) -> FileInfo:
         try:
             from azure.ai.agents.models import FilePurpose
         except Exception as e:  # noqa: BLE001
             raise RuntimeError(
                 "Dependência azure-ai-agents ausente. Adicione o pacote."
             ) from e
-        uploaded = self.client.agents.files.upload_and_poll(
-            file_path=file_path, purpose=FilePurpose.AGENTS
-        )
-        self.client.agents.vector_store_files.create_and_poll(
-            vector_store_id=vector_store_id, file_id=uploaded.id
+        with METRICS.timer("repo.files.upload") as span:
+            span.items = 1
+            span.bytes = os.path.getsize(file_path)
+            uploaded = self.client.agents.files.upload_and_poll(
+                file_path=file_path, purpose=FilePurpose.AGENTS
+            )
+        return FileInfo(
+            id=uploaded.id,
+            filename=getattr(uploaded, "filename", None) or os.path.basename(file_path),
+            bytes=getattr(uploaded, "bytes", None),
         )
+
+    def attach_files(self, vector_store_id: str, file_ids: List[str]) -> List[str]:
+        # Attaches through the file-batch API and returns the ids that failed.
+        with METRICS.timer("repo.batches.attach") as span:
+            span.items = len(file_ids)
+            batch = self.client.agents.vector_store_file_batches.create_and_poll(
+                vector_store_id=vector_store_id, file_ids=file_ids
+            )
+            counts = getattr(batch, "file_counts", None)
+            if not counts or not getattr(counts, "failed", 0):
+                return []
+            failed = self.client.agents.vector_store_file_batches.list_files(
+                vector_store_id=vector_store_id, batch_id=batch.id, filter="failed"
+            )
+            failed_ids = [f.id for f in failed]
+            span.failed = bool(failed_ids)
+            return failed_ids
+
+    def detach_file(self, vector_store_id: str, file_id: str) -> None:
+        # Removes the file from the store only; the uploaded file remains.
+        with METRICS.timer("repo.store_files.detach"):
+            self.client.agents.vector_store_files.delete(
+                vector_store_id=vector_store_id, file_id=file_id
+            )
+
+    def delete_file(self, file_id: str) -> None:
+        with METRICS.timer("repo.files.delete"):
+            self.client.agents.files.delete(file_id=file_id)
+
+
+def file_info_from_assoc(assoc: Any) -> Optional[FileInfo]:
+    # Some listings already carry the file name; skip the per-file lookup then.
+    filename = getattr(assoc, "filename", None)
+    if not filename:
+        return None
+    return FileInfo(id=assoc.id, filename=filename, bytes=getattr(assoc, "bytes", None))
+
+
+def _fetch_error(file_id: str, error: Exception) -> FileFetchError:
+    logging.warning(f"Falha ao obter metadados do arquivo {file_id}: {error}")
+    return FileFetchError(file_id=file_id, error=str(error), exception=error)
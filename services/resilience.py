@@ -0,0 +1,630 @@
+import asyncio
+import email.utils
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from services.async_repository import AsyncFileListing, AsyncProjectsRepository
+from services.repository import (
+    FileFetchError,
+    FileInfo,
+    FileListing,
+    ProjectsRepository,
+    VectorStoreInfo,
+    fetch_failures,
+)
+
+T = TypeVar("T")
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 30.0
+# Requests per second shared by every caller of one Resilience; 0 disables.
+DEFAULT_RATE_LIMIT = 20.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_SECONDS = 30.0
+# Ids handed to a wrapped async get_files per token reservation.
+ASYNC_FETCH_CHUNK = 32
+# Items per page of the service's list endpoints (their default `limit`);
+# a listing takes one token per page it is expected to request.
+LISTING_PAGE_SIZE = 20
+
+TRANSIENT_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+# Answers that mean the request was turned away unprocessed, so even a
+# non-idempotent call (an upload) can safely be sent again. Timeouts and
+# dropped connections may come after the service took the bytes.
+REJECTED_STATUS = frozenset({408, 429, 503})
+# azure.core connection/timeout errors, matched by name to keep the SDK lazy.
+TRANSIENT_ERROR_NAMES = frozenset(
+    {
+        "ServiceRequestError",
+        "ServiceResponseError",
+        "ServiceRequestTimeoutError",
+        "ServiceResponseTimeoutError",
+    }
+)
+
+CLOSED = "fechado"
+OPEN = "aberto"
+HALF_OPEN = "meio-aberto"
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    code = getattr(error, "status_code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_transient(error: BaseException) -> bool:
+    if isinstance(error, CircuitOpenError):
+        return False
+    code = status_code(error)
+    if code is not None:
+        return code in TRANSIENT_STATUS
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    lowered = {str(k).lower(): v for k, v in headers.items()}
+    for name, scale in (
+        ("retry-after-ms", 0.001),
+        ("x-ms-retry-after-ms", 0.001),
+        ("retry-after", 1.0),
+    ):
+        value = lowered.get(name)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except ValueError:
+            pass
+        try:
+            when = email.utils.parsedate_to_datetime(str(value))
+        except (TypeError, ValueError):
+            continue
+        return max(0.0, when.timestamp() - time.time())
+    return None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    base_delay: float = DEFAULT_BASE_DELAY
+    max_delay: float = DEFAULT_MAX_DELAY
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        # Exponential backoff with full jitter; a longer Retry-After from the
+        # service always wins.
+        ceiling = min(self.max_delay, self.base_delay * (2**attempt))
+        backoff = random.uniform(0, ceiling)
+        if retry_after is not None:
+            return max(backoff, retry_after)
+        return backoff
+
+
+class TokenBucket:
+    # Thread-safe and shared by sync and async callers: reserve() takes the
+    # tokens immediately and returns how long the caller must wait, so
+    # waiters queue up in order instead of racing for refills.
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        with self._lock:
+            now = time.monotonic()
+            pause = max(0.0, self._paused_until - now)
+            if self.rate <= 0:
+                return pause
+            elapsed = now - self._updated
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, pause)
+
+    def pause(self, seconds: float) -> None:
+        # A Retry-After seen by one caller holds back all of them.
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: float = 1.0) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    # Opens after `failure_threshold` consecutive transient failures and
+    # rejects calls for `reset_seconds`; then lets one trial call through.
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_seconds: float = DEFAULT_RESET_SECONDS,
+    ) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            remaining = self._opened_at + self.reset_seconds - time.monotonic()
+            if self.state == OPEN and remaining <= 0:
+                self.state = HALF_OPEN
+                self._trial_running = False
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+            raise CircuitOpenError(
+                "Serviço indisponível (circuito aberto); "
+                f"nova tentativa em {max(0.0, remaining):.0f}s."
+            )
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                logging.info("Circuito fechado: serviço respondendo novamente.")
+            self.state = CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logging.warning(
+                        f"Circuito aberto após {self._failures} falha(s) seguidas."
+                    )
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+
+class Resilience:
+    # Retry policy, rate limit and circuit breaker shared by every wrapper
+    # built from it (sync and async), so they are enforced per service.
+    def __init__(
+        self,
+        policy: Optional[RetryPolicy] = None,
+        bucket: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.policy = policy or RetryPolicy()
+        self.bucket = bucket or TokenBucket(DEFAULT_RATE_LIMIT)
+        self.breaker = breaker or CircuitBreaker()
+
+    def call(self, fn: Callable[..., T], *args: Any, idempotent: bool = True) -> T:
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            self.bucket.acquire()
+            try:
+                result = fn(*args)
+            except Exception as e:  # noqa: BLE001
+                delay = self._retry_delay(e, attempt, idempotent)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def acall(
+        self, fn: Callable[..., Awaitable[T]], *args: Any, idempotent: bool = True
+    ) -> T:
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            await self.bucket.aacquire()
+            try:
+                result = await fn(*args)
+            except Exception as e:  # noqa: BLE001
+                delay = self._retry_delay(e, attempt, idempotent)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    def iterate(
+        self,
+        factory: Callable[[], Iterable[T]],
+        key: Callable[[T], str],
+        page_size: int = LISTING_PAGE_SIZE,
+    ) -> Iterator[T]:
+        # A listing that breaks halfway is restarted and the items already
+        # handed out are skipped, so callers never see duplicates. The pager
+        # fetches the next page once a page is used up, so a token is taken
+        # before asking for the item after each full page.
+        seen: Set[str] = set()
+        attempt = 0
+        # Items reached by the furthest attempt so far; a restart only counts
+        # as progress once it gets past that point, so a listing that keeps
+        # failing on the same page still runs out of attempts.
+        furthest = 0
+        while True:
+            self.breaker.before_call()
+            self.bucket.acquire()
+            received = 0
+            advanced = False
+            try:
+                for item in factory():
+                    received += 1
+                    if received > furthest:
+                        furthest = received
+                        if not advanced:
+                            advanced = True
+                            attempt = 0
+                            self.breaker.record_success()
+                    k = key(item)
+                    if k not in seen:
+                        seen.add(k)
+                        yield item
+                    if received % page_size == 0:
+                        self.bucket.acquire()
+            except Exception as e:  # noqa: BLE001
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return
+
+    async def aiterate(
+        self,
+        factory: Callable[[], AsyncIterator[T]],
+        key: Callable[[T], str],
+        page_size: int = LISTING_PAGE_SIZE,
+    ) -> AsyncIterator[T]:
+        seen: Set[str] = set()
+        attempt = 0
+        furthest = 0
+        while True:
+            self.breaker.before_call()
+            await self.bucket.aacquire()
+            received = 0
+            advanced = False
+            try:
+                async for item in factory():
+                    received += 1
+                    if received > furthest:
+                        furthest = received
+                        if not advanced:
+                            advanced = True
+                            attempt = 0
+                            self.breaker.record_success()
+                    k = key(item)
+                    if k not in seen:
+                        seen.add(k)
+                        yield item
+                    if received % page_size == 0:
+                        await self.bucket.aacquire()
+            except Exception as e:  # noqa: BLE001
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return
+
+    def fetch_round(
+        self, failures: List[FileFetchError], fetched_any: bool, attempt: int
+    ) -> Tuple[List[FileFetchError], List[FileFetchError], Optional[float]]:
+        # Splits a get_files round into (retry, final) failures and the delay
+        # before the next round (None when nothing should be retried).
+        retry = [f for f in failures if f.exception and is_transient(f.exception)]
+        final = [f for f in failures if not (f.exception and is_transient(f.exception))]
+        if fetched_any:
+            self.breaker.record_success()
+        elif retry:
+            self.breaker.record_failure()
+        if not retry or attempt + 1 >= self.policy.max_attempts:
+            return [], final + retry, None
+        hints = [retry_after_seconds(f.exception) for f in retry]
+        retry_after = max((h for h in hints if h is not None), default=None)
+        if retry_after is not None:
+            self.bucket.pause(retry_after)
+        logging.warning(
+            f"{len(retry)} arquivo(s) com falha transitória; nova tentativa "
+            f"({attempt + 2}/{self.policy.max_attempts})."
+        )
+        return retry, final, self.policy.delay(attempt, retry_after)
+
+    def _retry_delay(
+        self, error: BaseException, attempt: int, idempotent: bool = True
+    ) -> Optional[float]:
+        if not is_transient(error):
+            # The service answered; only outages should trip the breaker.
+            if not isinstance(error, CircuitOpenError):
+                self.breaker.record_success()
+            return None
+        self.breaker.record_failure()
+        if attempt + 1 >= self.policy.max_attempts:
+            return None
+        if not idempotent and status_code(error) not in REJECTED_STATUS:
+            logging.warning(
+                f"Falha transitória ({error}) em uma operação que não pode ser "
+                "repetida com segurança; sem nova tentativa."
+            )
+            return None
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            self.bucket.pause(retry_after)
+        delay = self.policy.delay(attempt, retry_after)
+        logging.warning(
+            f"Falha transitória ({error}); nova tentativa "
+            f"{attempt + 2}/{self.policy.max_attempts} em {delay:.1f}s."
+        )
+        return delay
+
+
+def _circuit_failures(
+    file_ids: Iterable[str], error: CircuitOpenError
+) -> List[FileFetchError]:
+    return [
+        FileFetchError(file_id=file_id, error=str(error), exception=error)
+        for file_id in file_ids
+    ]
+
+
+class ResilientProjectsRepository:
+    # ProjectsRepository decorator: retries transient failures (429/5xx,
+    # connection errors) with backoff and jitter, honours Retry-After, keeps
+    # all callers under the shared request rate and fails fast while the
+    # circuit is open. File lookups that still fail end up in the listing's
+    # `failed`.
+    def __init__(
+        self, repo: ProjectsRepository, resilience: Optional[Resilience] = None
+    ) -> None:
+        self.repo = repo
+        self.resilience = resilience or Resilience()
+
+    def list_vector_stores(self) -> Iterable[VectorStoreInfo]:
+        return self.resilience.iterate(self.repo.list_vector_stores, lambda vs: vs.id)
+
+    def list_vector_store_files(self, vector_store_id: str) -> FileListing:
+        failed: List[FileFetchError] = []
+        return FileListing(self._list_files(vector_store_id, failed), failed)
+
+    def _list_files(
+        self, vector_store_id: str, failed: List[FileFetchError]
+    ) -> Iterator[FileInfo]:
+        failures: List[FileFetchError] = []
+
+        def listing() -> Iterator[FileInfo]:
+            failures.clear()
+            files = self.repo.list_vector_store_files(vector_store_id)
+            yield from files
+            failures.extend(fetch_failures(files))
+
+        yielded: Set[str] = set()
+        for info in self.resilience.iterate(listing, lambda f: f.id):
+            yielded.add(info.id)
+            yield info
+        # Lookups the inner listing gave up on get their own retry rounds.
+        failures = [f for f in failures if f.file_id not in yielded]
+        retry, final, _ = self.resilience.fetch_round(failures, True, 0)
+        failed.extend(final)
+        if retry:
+            yield from self._get_files([f.file_id for f in retry], failed)
+
+    def list_vector_store_file_ids(self, vector_store_id: str) -> Iterable[str]:
+        return self.resilience.iterate(
+            lambda: self.repo.list_vector_store_file_ids(vector_store_id),
+            lambda file_id: file_id,
+        )
+
+    def get_files(self, file_ids: Iterable[str]) -> FileListing:
+        failed: List[FileFetchError] = []
+        return FileListing(self._get_files(file_ids, failed), failed)
+
+    def _get_files(
+        self, file_ids: Iterable[str], failed: List[FileFetchError]
+    ) -> Iterator[FileInfo]:
+        remaining = list(file_ids)
+        attempt = 0
+        while remaining:
+            try:
+                self.resilience.breaker.before_call()
+            except CircuitOpenError as e:
+                failed.extend(_circuit_failures(remaining, e))
+                return
+            fetched_any = False
+            files = self.repo.get_files(self._throttled(remaining))
+            for info in files:
+                fetched_any = True
+                yield info
+            retry, final, delay = self.resilience.fetch_round(
+                fetch_failures(files), fetched_any, attempt
+            )
+            failed.extend(final)
+            if delay is None:
+                return
+            time.sleep(delay)
+            attempt += 1
+            remaining = [f.file_id for f in retry]
+
+    def _throttled(self, file_ids: List[str]) -> Iterator[str]:
+        # The wrapped repository pulls ids lazily as it issues lookups, so
+        # taking a token per id paces the lookups themselves.
+        for file_id in file_ids:
+            self.resilience.bucket.acquire()
+            yield file_id
+
+    def upload_file_to_vector_store(
+        self, vector_store_id: str, file_path: str
+    ) -> FileInfo:
+        # Upload and attach go through separately so a failed attach never
+        # re-uploads the file.
+        info = self.upload_file(file_path)
+        if self.attach_files(vector_store_id, [info.id]):
+            raise RuntimeError(f"Falha ao anexar o arquivo {info.id} ao Vector Store.")
+        return info
+
+    def upload_file(self, file_path: str) -> FileInfo:
+        # Not idempotent: a retry after a timeout could upload the file twice.
+        return self.resilience.call(self.repo.upload_file, file_path, idempotent=False)
+
+    def attach_files(self, vector_store_id: str, file_ids: List[str]) -> List[str]:
+        return self.resilience.call(self.repo.attach_files, vector_store_id, file_ids)
+
+    def detach_file(self, vector_store_id: str, file_id: str) -> None:
+        self.resilience.call(self.repo.detach_file, vector_store_id, file_id)
+
+    def delete_file(self, file_id: str) -> None:
+        self.resilience.call(self.repo.delete_file, file_id)
+
+
+class AsyncResilientProjectsRepository:
+    # Async counterpart of ResilientProjectsRepository; share one Resilience
+    # between both so they draw from the same rate limit and breaker.
+    def __init__(
+        self, repo: AsyncProjectsRepository, resilience: Optional[Resilience] = None
+    ) -> None:
+        self.repo = repo
+        self.resilience = resilience or Resilience()
+
+    def list_vector_stores(self) -> AsyncIterator[VectorStoreInfo]:
+        return self.resilience.aiterate(self.repo.list_vector_stores, lambda vs: vs.id)
+
+    def list_vector_store_files(self, vector_store_id: str) -> AsyncFileListing:
+        failed: List[FileFetchError] = []
+        return AsyncFileListing(self._list_files(vector_store_id, failed), failed)
+
+    async def _list_files(
+        self, vector_store_id: str, failed: List[FileFetchError]
+    ) -> AsyncIterator[FileInfo]:
+        failures: List[FileFetchError] = []
+
+        async def listing() -> AsyncIterator[FileInfo]:
+            failures.clear()
+            files = self.repo.list_vector_store_files(vector_store_id)
+            async for info in files:
+                yield info
+            failures.extend(fetch_failures(files))
+
+        yielded: Set[str] = set()
+        async for info in self.resilience.aiterate(listing, lambda f: f.id):
+            yielded.add(info.id)
+            yield info
+        failures = [f for f in failures if f.file_id not in yielded]
+        retry, final, _ = self.resilience.fetch_round(failures, True, 0)
+        failed.extend(final)
+        if retry:
+            async for info in self._get_files([f.file_id for f in retry], failed):
+                yield info
+
+    def list_vector_store_file_ids(self, vector_store_id: str) -> AsyncIterator[str]:
+        return self.resilience.aiterate(
+            lambda: self.repo.list_vector_store_file_ids(vector_store_id),
+            lambda file_id: file_id,
+        )
+
+    def get_files(self, file_ids: Iterable[str]) -> AsyncFileListing:
+        failed: List[FileFetchError] = []
+        return AsyncFileListing(self._get_files(file_ids, failed), failed)
+
+    async def _get_files(
+        self, file_ids: Iterable[str], failed: List[FileFetchError]
+    ) -> AsyncIterator[FileInfo]:
+        remaining = list(file_ids)
+        attempt = 0
+        while remaining:
+            fetched_any = False
+            failures: List[FileFetchError] = []
+            for start in range(0, len(remaining), ASYNC_FETCH_CHUNK):
+                chunk = remaining[start : start + ASYNC_FETCH_CHUNK]
+                try:
+                    self.resilience.breaker.before_call()
+                except CircuitOpenError as e:
+                    failed.extend(_circuit_failures(remaining[start:], e))
+                    return
+                await self.resilience.bucket.aacquire(len(chunk))
+                files = self.repo.get_files(chunk)
+                async for info in files:
+                    fetched_any = True
+                    yield info
+                failures.extend(fetch_failures(files))
+            retry, final, delay = self.resilience.fetch_round(
+                failures, fetched_any, attempt
+            )
+            failed.extend(final)
+            if delay is None:
+                return
+            await asyncio.sleep(delay)
+            attempt += 1
+            remaining = [f.file_id for f in retry]
+
+    async def upload_file_to_vector_store(
+        self, vector_store_id: str, file_path: str
+    ) -> FileInfo:
+        info = await self.upload_file(file_path)
+        if await self.attach_files(vector_store_id, [info.id]):
+            raise RuntimeError(f"Falha ao anexar o arquivo {info.id} ao Vector Store.")
+        return info
+
+    async def upload_file(self, file_path: str) -> FileInfo:
+        return await self.resilience.acall(
+            self.repo.upload_file, file_path, idempotent=False
+        )
+
+    async def attach_files(
+        self, vector_store_id: str, file_ids: List[str]
+    ) -> List[str]:
+        return await self.resilience.acall(
+            self.repo.attach_files, vector_store_id, file_ids
+        )
+
+    async def detach_file(self, vector_store_id: str, file_id: str) -> None:
+        await self.resilience.acall(self.repo.detach_file, vector_store_id, file_id)
+
+    async def delete_file(self, file_id: str) -> None:
+        await self.resilience.acall(self.repo.delete_file, file_id)
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.metadata_cache import CACHE_DIR
+
+RESPONSE_CACHE_PATH = os.path.join(CACHE_DIR, "responses.sqlite3")
+DEFAULT_RESPONSE_CACHE_ENTRIES = 1000
+DEFAULT_RESPONSE_CACHE_BYTES = 16 * 1024 * 1024
+DEFAULT_RESPONSE_CACHE_TTL = 24 * 60 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    stored_at REAL NOT NULL
+);
+"""
+
+
+def cache_key(
+    endpoint: Optional[str],
+    model: Optional[str],
+    messages: List[Dict[str, str]],
+    params: Optional[Dict[str, Any]] = None,
+) -> str:
+    # The same deployment name in two projects is two different models.
+    payload = json.dumps(
+        {
+            "endpoint": endpoint,
+            "model": model,
+            "messages": messages,
+            "params": params or {},
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    # LRU of model responses, bounded by entry count and by total size,
+    # with a TTL. With a path, entries are also written through to SQLite
+    # so evaluation reruns survive restarts; memory stays the bounded hot
+    # set and misses fall back to disk.
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_RESPONSE_CACHE_ENTRIES,
+        max_bytes: int = DEFAULT_RESPONSE_CACHE_BYTES,
+        ttl_seconds: float = DEFAULT_RESPONSE_CACHE_TTL,
+        path: Optional[str] = None,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.expired = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # key -> (stored_at, response)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            parent = os.path.dirname(path)
+            if parent and not os.path.exists(parent):
+                os.makedirs(parent)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            with self._conn:
+                self._conn.executescript(_SCHEMA)
+                if ttl_seconds > 0:
+                    self._conn.execute(
+                        "DELETE FROM responses WHERE stored_at < ?",
+                        (time.time() - ttl_seconds,),
+                    )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _fresh(self, stored_at: float) -> bool:
+        return self.ttl_seconds <= 0 or time.time() - stored_at < self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._fresh(entry[0]):
+                self._drop(key)
+                self.expired += 1
+                entry = None
+            if entry is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT stored_at, response FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and self._fresh(row[0]):
+                    entry = (row[0], row[1])
+                    self._insert(key, entry)
+                    self.disk_hits += 1
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, response: str) -> None:
+        entry = (time.time(), response)
+        with self._lock:
+            self._insert(key, entry)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, response, stored_at) "
+                        "VALUES (?, ?, ?)",
+                        (key, response, entry[0]),
+                    )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM responses")
+
+    def _insert(self, key: str, entry: Tuple[float, str]) -> None:
+        self._drop(key)
+        self._entries[key] = entry
+        self._bytes += _size(entry[1])
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, (_, response) = self._entries.popitem(last=False)
+            self._bytes -= _size(response)
+            self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= _size(entry[1])
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hit_rate(), 3),
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+def _size(response: str) -> int:
+    return len(response.encode("utf-8"))
@@ -0,0 +1,218 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+from services.metadata_cache import CACHE_DIR
+from services.repository import FileInfo
+
+MANIFEST_PATH = os.path.join(CACHE_DIR, "manifest.sqlite3")
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    endpoint TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    file_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    bytes INTEGER,
+    PRIMARY KEY (endpoint, sha256)
+);
+CREATE TABLE IF NOT EXISTS attachments (
+    endpoint TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    vector_store_id TEXT NOT NULL,
+    PRIMARY KEY (endpoint, sha256, vector_store_id)
+);
+CREATE TABLE IF NOT EXISTS synced_paths (
+    endpoint TEXT NOT NULL,
+    vector_store_id TEXT NOT NULL,
+    root TEXT NOT NULL,
+    rel_path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    file_id TEXT NOT NULL,
+    PRIMARY KEY (endpoint, vector_store_id, root, rel_path)
+);
+"""
+
+
+def hash_file(path: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    # Streamed in fixed-size chunks so large files never sit in memory.
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    sha256: str
+    file: FileInfo
+    vector_store_ids: FrozenSet[str]
+
+
+@dataclass(frozen=True)
+class SyncedPath:
+    # A local file as it was when last synced to a vector store; size and
+    # mtime let unchanged files be recognised without hashing them again.
+    rel_path: str
+    size: int
+    mtime_ns: int
+    sha256: str
+    file_id: str
+
+
+class UploadManifest:
+    def __init__(self, path: str = MANIFEST_PATH) -> None:
+        self.path = path
+        parent = os.path.dirname(path)
+        if parent and not os.path.exists(parent):
+            os.makedirs(parent)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def lookup(self, endpoint: str, sha256: str) -> Optional[ManifestEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file_id, filename, bytes FROM blobs "
+                "WHERE endpoint = ? AND sha256 = ?",
+                (endpoint, sha256),
+            ).fetchone()
+            if row is None:
+                return None
+            stores = self._conn.execute(
+                "SELECT vector_store_id FROM attachments "
+                "WHERE endpoint = ? AND sha256 = ?",
+                (endpoint, sha256),
+            ).fetchall()
+        return ManifestEntry(
+            sha256=sha256,
+            file=FileInfo(id=row[0], filename=row[1], bytes=row[2]),
+            vector_store_ids=frozenset(r[0] for r in stores),
+        )
+
+    def record_upload(self, endpoint: str, sha256: str, info: FileInfo) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blobs "
+                "(endpoint, sha256, file_id, filename, bytes) VALUES (?, ?, ?, ?, ?)",
+                (endpoint, sha256, info.id, info.filename, info.bytes),
+            )
+            # A new remote file for this content invalidates older attachments.
+            self._conn.execute(
+                "DELETE FROM attachments WHERE endpoint = ? AND sha256 = ?",
+                (endpoint, sha256),
+            )
+
+    def record_attach(self, endpoint: str, sha256: str, vector_store_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO attachments "
+                "(endpoint, sha256, vector_store_id) VALUES (?, ?, ?)",
+                (endpoint, sha256, vector_store_id),
+            )
+
+    def record_attached(
+        self,
+        endpoint: str,
+        vector_store_id: str,
+        entries: Iterable[Tuple[str, Optional[FileInfo]]],
+    ) -> None:
+        # record_upload (when a FileInfo is given) plus record_attach for a
+        # whole attach batch, in a single transaction.
+        with self._lock, self._conn:
+            for sha256, info in entries:
+                if info is not None:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO blobs (endpoint, sha256, file_id, "
+                        "filename, bytes) VALUES (?, ?, ?, ?, ?)",
+                        (endpoint, sha256, info.id, info.filename, info.bytes),
+                    )
+                    self._conn.execute(
+                        "DELETE FROM attachments WHERE endpoint = ? AND sha256 = ?",
+                        (endpoint, sha256),
+                    )
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO attachments "
+                    "(endpoint, sha256, vector_store_id) VALUES (?, ?, ?)",
+                    (endpoint, sha256, vector_store_id),
+                )
+
+    def forget_attach(self, endpoint: str, sha256: str, vector_store_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM attachments "
+                "WHERE endpoint = ? AND sha256 = ? AND vector_store_id = ?",
+                (endpoint, sha256, vector_store_id),
+            )
+
+    def forget(self, endpoint: str, sha256: str) -> None:
+        with self._lock, self._conn:
+            for table in ("blobs", "attachments"):
+                self._conn.execute(
+                    f"DELETE FROM {table} WHERE endpoint = ? AND sha256 = ?",
+                    (endpoint, sha256),
+                )
+
+    def synced_paths(
+        self, endpoint: str, vector_store_id: str, root: str
+    ) -> Dict[str, SyncedPath]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rel_path, size, mtime_ns, sha256, file_id FROM synced_paths "
+                "WHERE endpoint = ? AND vector_store_id = ? AND root = ?",
+                (endpoint, vector_store_id, root),
+            ).fetchall()
+        return {row[0]: SyncedPath(*row) for row in rows}
+
+    def record_synced(
+        self,
+        endpoint: str,
+        vector_store_id: str,
+        root: str,
+        entries: Iterable[SyncedPath],
+    ) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO synced_paths "
+                "(endpoint, vector_store_id, root, rel_path, size, mtime_ns, sha256, "
+                "file_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        endpoint,
+                        vector_store_id,
+                        root,
+                        e.rel_path,
+                        e.size,
+                        e.mtime_ns,
+                        e.sha256,
+                        e.file_id,
+                    )
+                    for e in entries
+                ],
+            )
+
+    def forget_synced(
+        self,
+        endpoint: str,
+        vector_store_id: str,
+        root: str,
+        rel_paths: Iterable[str],
+    ) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM synced_paths WHERE endpoint = ? AND vector_store_id = ? "
+                "AND root = ? AND rel_path = ?",
+                [(endpoint, vector_store_id, root, p) for p in rel_paths],
+            )
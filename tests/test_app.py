@@ -0,0 +1,175 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import urwid
+
+from benchmarks.startup import DEFERRED_MODULES, FIRST_FRAME_SNIPPET, ROOT
+from services.fake_inference import FakeStreamingBackend
+from services.fake_repository import FakeProjectsRepository, FaultPlan
+from services.inference_service import InferenceService
+from services.projects_service import ProjectsService
+from services.repository import VectorStoreInfo
+from ui.app import App, AppState
+from ui.jobs import CANCELLED, DONE, JobManager
+
+
+def stub_app(loop: asyncio.AbstractEventLoop, repo) -> SimpleNamespace:
+    service = ProjectsService()
+    service.set_repository(repo)
+    app = SimpleNamespace(
+        projects_service=service,
+        state=AppState(),
+        main=urwid.WidgetPlaceholder(urwid.SolidFill()),
+        jobs=JobManager(loop),
+        _connect_job=None,
+        _stores_job=None,
+        refresh_screen=lambda: None,
+        back=lambda *args: None,
+    )
+    app.run_task = lambda name, task: App.run_task(app, name, task)
+    return app
+
+
+def test_refreshing_vector_stores_cancels_the_listing_in_flight():
+    loop = asyncio.new_event_loop()
+    fake = FakeProjectsRepository(
+        stores=60, page_size=10, faults=FaultPlan(latency=0.02)
+    )
+    app = stub_app(loop, fake)
+
+    App.show_vector_stores(app)
+    first = app._stores_job
+    loop.run_until_complete(asyncio.sleep(0.05))
+    App.show_vector_stores(app, refresh=True)
+    second = app._stores_job
+    loop.run_until_complete(asyncio.wait_for(second.wait(), timeout=10))
+    loop.run_until_complete(asyncio.sleep(0.05))
+
+    assert first.status == CANCELLED and second.status == DONE
+    stores_list = app.main.original_widget.original_widget.contents[3][0]
+    assert len(stores_list.walker) == 60
+    app.jobs.shutdown()
+    loop.close()
+
+
+def chat_app(loop: asyncio.AbstractEventLoop, backend) -> SimpleNamespace:
+    app = stub_app(loop, FakeProjectsRepository(stores=0))
+    app.inference_service = InferenceService()
+    app.inference_service.configure(model="m", backend=backend)
+    app.redraws = SimpleNamespace(interval=1.0)
+    app.refreshes = 0
+
+    def refresh_screen() -> None:
+        app.refreshes += 1
+
+    app.refresh_screen = refresh_screen
+    App.show_chat(app)
+    return app
+
+
+def send(app: SimpleNamespace, message: str) -> urwid.Text:
+    pile = app.main.original_widget
+    edit = pile.contents[5][0]
+    edit.set_edit_text(message)
+    edit.keypress((40,), "enter")
+    walker = pile.contents[2][0].body
+    return walker[-2]
+
+
+def test_chat_redraws_at_most_once_per_frame_while_streaming():
+    loop = asyncio.new_event_loop()
+    reply = " ".join(f"t{i}" for i in range(50))
+    backend = FakeStreamingBackend(reply, first_token_delay=0, token_delay=0)
+    app = chat_app(loop, backend)
+
+    text = send(app, "oi")
+    job = app.jobs.jobs()[-1]
+    loop.run_until_complete(asyncio.wait_for(job.wait(), timeout=10))
+
+    assert job.status == DONE
+    assert text.text == "Assistente: " + reply
+    # Fifty deltas inside one frame interval: only the first repaints.
+    assert app.refreshes == 1
+    app.jobs.shutdown()
+    loop.close()
+
+
+def test_interrupting_a_reply_keeps_what_arrived_and_marks_it():
+    loop = asyncio.new_event_loop()
+    backend = FakeStreamingBackend(first_token_delay=0, token_delay=0.05)
+    app = chat_app(loop, backend)
+
+    text = send(app, "oi")
+    job = app.jobs.jobs()[-1]
+    loop.run_until_complete(asyncio.sleep(0.12))
+    job.cancel()
+    loop.run_until_complete(asyncio.sleep(0.05))
+
+    assert job.status == CANCELLED
+    assert text.text.startswith("Assistente: [fake:m]")
+    assert text.text.endswith(" [interrompido]")
+    assert app.inference_service._history == []
+    app.jobs.shutdown()
+    loop.close()
+
+
+def test_the_first_frame_renders_without_the_sdk(tmp_path):
+    # Importing any deferred module before the first frame fails the run.
+    blocker = (
+        "import sys\n"
+        "class Deferred:\n"
+        "    def find_spec(self, name, path=None, target=None):\n"
+        f"        if name.startswith({DEFERRED_MODULES!r}):\n"
+        "            raise ImportError(name)\n"
+        "sys.meta_path.insert(0, Deferred())\n"
+    )
+    env = dict(
+        os.environ,
+        PYTHONPATH=ROOT,
+        PROJECT_ENDPOINT="https://example.services.ai.azure.com/api/projects/p",
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", blocker + FIRST_FRAME_SNIPPET % (DEFERRED_MODULES,)],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=tmp_path,
+        timeout=60,
+    )
+
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    assert report["deferred_loaded"] == []
+
+
+def test_selecting_another_store_cancels_the_previous_prefetch():
+    loop = asyncio.new_event_loop()
+    fake = FakeProjectsRepository(
+        stores=2, files_per_store=300, faults=FaultPlan(latency=0.002)
+    )
+    app = stub_app(loop, fake)
+    app._prefetch_job = None
+    service = app.projects_service
+
+    service.set_vector_store(VectorStoreInfo("vs0", "Store 0"))
+    App.prefetch_files(app)
+    first = app._prefetch_job
+    loop.run_until_complete(asyncio.sleep(0.1))
+    service.set_vector_store(VectorStoreInfo("vs1", "Store 1"))
+    App.prefetch_files(app)
+    second = app._prefetch_job
+    loop.run_until_complete(asyncio.wait_for(second.wait(), timeout=30))
+    loop.run_until_complete(asyncio.sleep(0.05))
+
+    assert first.status == CANCELLED and second.status == DONE
+    assert first.done < 300 and second.done == 300
+    assert service.file_index_ready()
+    assert {f.id for f in service.search_files("doc")} == {
+        f"vs1-f{i}" for i in range(300)
+    }
+    app.jobs.shutdown()
+    loop.close()
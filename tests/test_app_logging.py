@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import threading
+import time
+
+import pytest
+
+from services.app_logging import LOG_NAME, RotatingLogHandler, start_logging
+
+
+@pytest.fixture
+def logs(tmp_path):
+    # start_logging takes over the root logger; it is handed back as found.
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    listeners = []
+
+    def start(**kwargs):
+        listener = start_logging(directory=str(tmp_path), **kwargs)
+        listeners.append(listener)
+        return listener
+
+    yield start
+    for listener in listeners:
+        if listener._thread is not None:
+            listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def lines(tmp_path, suffix: str = ".log"):
+    with open(tmp_path / (LOG_NAME + suffix), encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_stopping_the_listener_writes_everything_queued(tmp_path, logs):
+    listener = logs()
+
+    def burst(n: int) -> None:
+        for i in range(500):
+            logging.info(f"thread {n} registro {i}")
+
+    threads = [threading.Thread(target=burst, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    listener.stop()
+
+    assert len(lines(tmp_path)) == 2000
+
+
+def test_records_are_rendered_when_logged_not_when_written(tmp_path, logs):
+    listener = logs(json_lines=True)
+    files = ["a.txt"]
+    logging.warning("arquivos: %s", files)
+    files.append("b.txt")
+    try:
+        raise ValueError("quebrou")
+    except ValueError:
+        logging.exception("falha")
+    listener.stop()
+
+    first, second = [json.loads(line) for line in lines(tmp_path, ".jsonl")]
+    assert first["message"] == "arquivos: ['a.txt']"
+    assert first["level"] == "WARNING" and first["thread"] == "MainThread"
+    assert second["message"] == "falha"
+    assert "ValueError: quebrou" in second["exception"]
+
+
+def test_records_below_the_level_are_dropped(tmp_path, logs):
+    listener = logs(level=logging.WARNING)
+    logging.info("detalhe")
+    logging.warning("aviso")
+    listener.stop()
+
+    (line,) = lines(tmp_path)
+    assert line.endswith(" - WARNING - aviso")
+
+
+def test_files_roll_over_by_size_and_keep_the_backup_count(tmp_path):
+    handler = RotatingLogHandler(
+        str(tmp_path / "app.log"), max_bytes=200, backup_count=2
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    for i in range(50):
+        handler.emit(logging.makeLogRecord({"msg": f"linha {i:02d} " + "x" * 40}))
+    handler.close()
+
+    assert sorted(os.listdir(tmp_path)) == ["app.log", "app.log.1", "app.log.2"]
+    assert os.path.getsize(tmp_path / "app.log") <= 200
+
+
+def test_files_roll_over_after_the_rotation_period(tmp_path):
+    handler = RotatingLogHandler(str(tmp_path / "app.log"), rotate_seconds=0.05)
+    handler.emit(logging.makeLogRecord({"msg": "antes"}))
+    time.sleep(0.06)
+    handler.emit(logging.makeLogRecord({"msg": "depois"}))
+    handler.close()
+
+    assert (tmp_path / "app.log").read_text().strip() == "depois"
+    assert (tmp_path / "app.log.1").read_text().strip() == "antes"
+
+
+def test_old_rotated_files_are_pruned_on_open(tmp_path):
+    old = tmp_path / "app.log.3"
+    old.write_text("antigo")
+    stale = time.time() - 3600
+    os.utime(old, (stale, stale))
+    recent = tmp_path / "app.log.1"
+    recent.write_text("recente")
+
+    handler = RotatingLogHandler(str(tmp_path / "app.log"), retention_seconds=60)
+    handler.close()
+
+    assert not old.exists() and recent.exists()
@@ -0,0 +1,159 @@
+import pytest
+
+from services.bulk_upload import expand_source
+from services.fake_repository import FakeProjectsRepository
+from services.projects_service import ProjectsService
+from services.repository import VectorStoreInfo
+
+
+def write_files(root, count: int):
+    paths = []
+    for i in range(count):
+        path = root / f"doc{i:02d}.txt"
+        path.write_text(f"conteúdo {i}")
+        paths.append(str(path))
+    return paths
+
+
+def uploader(repo=None) -> ProjectsService:
+    service = ProjectsService()
+    service.set_repository(repo or FakeProjectsRepository(files_per_store=0))
+    service.set_vector_store(VectorStoreInfo("vs0", "Store 0"))
+    return service
+
+
+def test_directories_are_walked_recursively_without_hidden_entries(tmp_path):
+    (tmp_path / "b").mkdir()
+    (tmp_path / ".git").mkdir()
+    for name in ("z.txt", "b/a.txt", ".hidden", ".git/config"):
+        (tmp_path / name).write_text("x")
+
+    assert expand_source(str(tmp_path)) == [
+        str(tmp_path / "z.txt"),
+        str(tmp_path / "b" / "a.txt"),
+    ]
+
+
+def test_anything_else_is_a_glob_over_files(tmp_path):
+    (tmp_path / "sub").mkdir()
+    for name in ("a.txt", "b.pdf", "sub/c.txt"):
+        (tmp_path / name).write_text("x")
+
+    assert expand_source(f" {tmp_path}/**/*.txt ") == [
+        str(tmp_path / "a.txt"),
+        str(tmp_path / "sub" / "c.txt"),
+    ]
+    assert expand_source(str(tmp_path / "nada*")) == []
+
+
+def test_uploads_are_attached_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr("services.projects_service.ATTACH_BATCH_SIZE", 2)
+    fake = FakeProjectsRepository(files_per_store=0)
+    paths = write_files(tmp_path, 5)
+
+    results = uploader(fake).upload_many(paths)
+
+    assert all(r.ok and r.action == "upload" for r in results)
+    assert fake.stats["files.upload"] == 5
+    assert fake.stats["vector_store_file_batches.create"] == 3
+    assert fake._attached["vs0"] == [r.file_id for r in results]
+
+
+class PartialAttach(FakeProjectsRepository):
+    # The batch goes through but the service rejects some of its files, as
+    # reported by list_files(filter="failed").
+    def __init__(self, rejected) -> None:
+        super().__init__(files_per_store=0)
+        self.rejected = set(rejected)
+
+    def attach_files(self, vector_store_id, file_ids):
+        failed = [i for i in file_ids if i in self.rejected]
+        super().attach_files(vector_store_id, [i for i in file_ids if i not in failed])
+        return failed
+
+
+def test_files_the_batch_rejected_are_reported_individually(tmp_path):
+    paths = write_files(tmp_path, 4)
+    fake = PartialAttach(rejected={"up2"})
+    progress = []
+
+    results = uploader(fake).upload_many(
+        paths, max_workers=1, on_progress=lambda p: progress.append(p.failed)
+    )
+
+    assert [r.ok for r in results] == [True, False, True, True]
+    assert results[1].error == "Falha ao anexar no Vector Store."
+    assert progress[-1] == 1
+    assert "up2" not in fake._attached["vs0"]
+
+
+def test_a_failed_batch_fails_every_file_in_it(tmp_path, monkeypatch):
+    monkeypatch.setattr("services.projects_service.ATTACH_BATCH_SIZE", 2)
+    paths = write_files(tmp_path, 3)
+    fake = FakeProjectsRepository(files_per_store=0)
+    calls = []
+
+    def attach(vector_store_id, file_ids):
+        calls.append(file_ids)
+        if len(calls) == 1:
+            raise RuntimeError("tempo esgotado")
+        return FakeProjectsRepository.attach_files(fake, vector_store_id, file_ids)
+
+    fake.attach_files = attach
+    results = uploader(fake).upload_many(paths, max_workers=1)
+
+    assert [r.ok for r in results] == [False, False, True]
+    assert results[0].error == "Erro ao anexar: tempo esgotado"
+
+
+def test_upload_errors_do_not_stop_the_rest(tmp_path):
+    paths = write_files(tmp_path, 2)
+    paths.insert(1, str(tmp_path / "sumiu.txt"))
+
+    results = uploader().upload_many(paths)
+
+    assert [r.ok for r in results] == [True, False, True]
+    assert results[1].error.startswith("Erro ao enviar:")
+
+
+def test_cancelling_stops_pending_uploads_and_attaches(tmp_path):
+    paths = write_files(tmp_path, 4)
+    fake = FakeProjectsRepository(files_per_store=0)
+    service = uploader(fake)
+
+    results = service.upload_many(
+        paths, max_workers=1, should_cancel=lambda: fake.stats["files.upload"] >= 2
+    )
+
+    assert [r.error for r in results] == [
+        "Cancelado antes de anexar.",
+        "Cancelado antes de anexar.",
+        "Cancelado.",
+        "Cancelado.",
+    ]
+    assert fake.stats["vector_store_file_batches.create"] == 0
+
+
+def test_progress_counts_files_bytes_and_phases(tmp_path):
+    paths = write_files(tmp_path, 3)
+    size = sum((tmp_path / f"doc{i:02d}.txt").stat().st_size for i in range(3))
+    seen = []
+
+    uploader().upload_many(
+        paths,
+        max_workers=2,
+        on_progress=lambda p: seen.append((p.phase, p.done, p.failed, p.bytes_done)),
+    )
+
+    assert seen[0] == ("upload", 0, 0, 0)
+    assert [s[1] for s in seen if s[0] == "upload"] == [0, 1, 2, 3]
+    assert seen[-1] == ("done", 3, 0, size)
+    assert ("attach", 3, 0, size) in seen
+
+
+def test_upload_many_needs_a_selected_store():
+    service = ProjectsService()
+    service.set_repository(FakeProjectsRepository())
+
+    with pytest.raises(RuntimeError):
+        service.upload_many([])
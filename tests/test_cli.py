@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Makes the Azure SDK (and the HTTP stacks it pulls in) unimportable, as on
+# a machine where only the offline commands are used.
+WITHOUT_SDK = """
+import runpy, sys
+
+class NoSdk:
+    def find_spec(self, name, path=None, target=None):
+        if name.split(".")[0] in ("azure", "openai", "requests", "aiohttp"):
+            raise ImportError(f"{name} indisponível")
+
+sys.meta_path.insert(0, NoSdk())
+sys.argv = ["cli.py"] + sys.argv[1:]
+runpy.run_path(%r, run_name="__main__")
+""" % os.path.join(ROOT, "cli.py")
+
+
+def run_cli(tmp_path, *args: str, stdin: str = ""):
+    env = dict(os.environ, PYTHONPATH=ROOT, PROJECT_ENDPOINT="https://p.example/api")
+    result = subprocess.run(
+        [sys.executable, "-c", WITHOUT_SDK, *args],
+        input=stdin,
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=tmp_path,
+        timeout=60,
+    )
+    records = [json.loads(line) for line in result.stdout.splitlines()]
+    return result.returncode, records
+
+
+def test_offline_commands_run_without_the_sdk(tmp_path):
+    code, records = run_cli(
+        tmp_path, "infer", "--fake", "--no-cache", stdin="olá\nmundo\n"
+    )
+
+    assert code == 0
+    assert [r["type"] for r in records] == ["response", "response", "summary"]
+
+
+def test_commands_that_need_the_sdk_fail_as_configuration_errors(tmp_path):
+    code, records = run_cli(tmp_path, "stores", "--no-cache")
+
+    assert code == 3
+    assert records[-1]["type"] == "error"
+    assert records[-1]["message"].startswith("Falha ao conectar ao projeto")
@@ -0,0 +1,165 @@
+import os
+
+import pytest
+
+from services import content_index
+from services.content_index import ContentIndex, _decode, _encode
+
+
+@pytest.fixture
+def index(tmp_path):
+    opened = ContentIndex(str(tmp_path / "index"))
+    yield opened
+    opened.close()
+
+
+def reopen(index: ContentIndex) -> ContentIndex:
+    # Drops the index without close(), which would flush the buffer.
+    for segment in index._segments.values():
+        segment.close()
+    index._conn.close()
+    return ContentIndex(index.directory)
+
+
+def ids(hits):
+    return [h.file_id for h in hits]
+
+
+@pytest.mark.parametrize(
+    "postings",
+    [[], [(1, 1)], [(1, 3), (2, 1), (200, 127), (201, 128), (70_000, 2**21)]],
+)
+def test_varint_postings_round_trip(postings):
+    assert _decode(_encode(postings)) == postings
+
+
+def test_large_values_take_several_bytes():
+    assert len(_encode([(1, 127)])) == 2
+    assert len(_encode([(1, 128)])) == 3
+
+
+def test_buffered_and_flushed_documents_are_both_searchable(index):
+    index.add("f1", "um.txt", "relatório anual de vendas")
+    index.flush()
+    index.add("f2", "dois.txt", "vendas do trimestre")
+
+    assert index.stats()["segments"] == 1 and index.stats()["buffered"] == 1
+    assert sorted(ids(index.search("vendas"))) == ["f1", "f2"]
+    assert ids(index.search("relatorio")) == ["f1"]
+
+
+def test_flushing_past_the_limit_merges_segments(index, monkeypatch):
+    monkeypatch.setattr(content_index, "FLUSH_DOCS", 1)
+    monkeypatch.setattr(content_index, "MAX_SEGMENTS", 4)
+    for i in range(12):
+        index.add(f"f{i}", f"{i}.txt", f"documento número{i} comum")
+
+    assert index.stats()["segments"] <= 4
+    assert len(index.search("comum", limit=100)) == 12
+    assert ids(index.search("numero7")) == ["f7"]
+    files = [n for n in os.listdir(index.directory) if n.endswith(".postings")]
+    assert len(files) == index.stats()["segments"]
+
+
+def test_removed_and_replaced_documents_stop_matching(index, monkeypatch):
+    monkeypatch.setattr(content_index, "MAX_SEGMENTS", 1)
+    index.add("f1", "a.txt", "laranja")
+    index.add("f2", "b.txt", "laranja limão")
+    index.flush()
+    index.remove("f1")
+    index.add("f2", "b.txt", "só limão")
+
+    assert index.search("laranja") == []
+    assert ids(index.search("limao")) == ["f2"]
+    index.add("f3", "c.txt", "limão")
+    index.flush()
+    # The merge drops the postings of f1 and the old f2 for good.
+    assert index.stats()["segments"] == 1
+    assert sorted(ids(index.search("limao"))) == ["f2", "f3"]
+
+
+def test_unflushed_documents_survive_a_crash(tmp_path):
+    index = ContentIndex(str(tmp_path / "index"))
+    index.add("f1", "a.txt", "persistido em segmento")
+    index.flush()
+    index.add("f2", "b.txt", "apenas no buffer")
+
+    index = reopen(index)
+    try:
+        assert index.stats()["buffered"] == 1
+        assert ids(index.search("buffer")) == ["f2"]
+        assert ids(index.search("segmento")) == ["f1"]
+    finally:
+        index.close()
+
+
+def test_orphan_segment_files_are_removed_on_open(tmp_path):
+    index = ContentIndex(str(tmp_path / "index"))
+    index.add("f1", "a.txt", "texto")
+    index.flush()
+    orphan = os.path.join(index.directory, "segment-99.postings")
+    with open(orphan, "wb") as f:
+        f.write(b"\x01\x01")
+
+    index = reopen(index)
+    try:
+        assert not os.path.exists(orphan)
+        assert ids(index.search("texto")) == ["f1"]
+    finally:
+        index.close()
+
+
+def test_a_missing_segment_file_is_rebuilt_from_stored_text(tmp_path):
+    index = ContentIndex(str(tmp_path / "index"))
+    index.add("f1", "a.txt", "primeiro segmento")
+    index.flush()
+    index.add("f2", "b.txt", "segundo segmento")
+    index.flush()
+    os.remove(index._segment_path(min(index._segments)))
+
+    index = reopen(index)
+    try:
+        assert index.stats()["segments"] == 1 and index.stats()["buffered"] == 0
+        assert sorted(ids(index.search("segmento"))) == ["f1", "f2"]
+    finally:
+        index.close()
+
+
+def test_prefix_queries_expand_to_indexed_terms(index):
+    index.add("f1", "a.txt", "contrato assinado")
+    index.flush()
+    index.add("f2", "b.txt", "contratação pendente")
+    index.add("f3", "c.txt", "conta de luz")
+
+    assert sorted(ids(index.search("contrat*"))) == ["f1", "f2"]
+    assert ids(index.search("contrat")) == []
+
+
+def test_rarer_and_more_frequent_terms_rank_higher(index):
+    index.add("f1", "a.txt", "banco banco banco de dados")
+    index.add("f2", "b.txt", "banco de dados relacional")
+    index.add("f3", "c.txt", "dados abertos")
+
+    assert ids(index.search("banco")) == ["f1", "f2"]
+    assert ids(index.search("relacional dados"))[0] == "f2"
+    # Same frequency everywhere: shorter documents come first.
+    assert ids(index.search("dados")) == ["f3", "f2", "f1"]
+    assert ids(index.search("dados", limit=1)) == ["f3"]
+
+
+def test_snippets_mark_the_matching_words(index):
+    index.add("f1", "a.txt", "O Relatório de Ação anual.")
+    long_text = "início " + "palavra " * 100 + "alvo no fim"
+    index.add("f2", "b.txt", long_text)
+
+    assert index.search("acao")[0].snippet == "O Relatório de [Ação] anual."
+    snippet = index.search("alvo")[0].snippet
+    assert snippet.startswith("…") and "[alvo]" in snippet
+
+
+def test_results_can_be_limited_to_some_files(index):
+    for i in range(3):
+        index.add(f"f{i}", f"{i}.txt", "mesmo texto")
+
+    assert sorted(ids(index.search("texto", file_ids={"f0", "f2"}))) == ["f0", "f2"]
+    assert index.search("texto", file_ids=set()) == []
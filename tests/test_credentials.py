@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+from collections import namedtuple
+
+from clients.credentials import (
+    TOKEN_REFRESH_MARGIN_SECONDS,
+    AsyncSharedCredential,
+    SharedCredential,
+)
+
+AccessToken = namedtuple("AccessToken", "token expires_on")
+SCOPE = "https://ai.azure.com/.default"
+
+
+class Chain:
+    # Stands in for DefaultAzureCredential; every call is a token request.
+    def __init__(self, lifetime: float = 3600, delay: float = 0.0) -> None:
+        self.lifetime = lifetime
+        self.delay = delay
+        self.calls = []
+        self.closed = False
+
+    def get_token(self, *scopes, **kwargs):
+        self.calls.append((scopes, kwargs))
+        time.sleep(self.delay)
+        return AccessToken(f"t{len(self.calls)}", time.time() + self.lifetime)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_tokens_are_reused_per_scope():
+    chain = Chain()
+    cred = SharedCredential(chain)
+
+    first = cred.get_token(SCOPE)
+    assert cred.get_token(SCOPE) is first
+    assert cred.get_token("https://graph.microsoft.com/.default") is not first
+
+    assert len(chain.calls) == 2
+    assert (cred.token_requests, cred.token_hits) == (3, 1)
+    assert cred.first_token_seconds is not None
+
+
+def test_tokens_close_to_expiry_are_refreshed():
+    chain = Chain(lifetime=TOKEN_REFRESH_MARGIN_SECONDS - 1)
+    cred = SharedCredential(chain)
+
+    assert cred.get_token(SCOPE).token == "t1"
+    assert cred.cached_token(SCOPE) is None
+    assert cred.get_token(SCOPE).token == "t2"
+
+
+def test_claims_challenges_and_other_tenants_get_their_own_token():
+    chain = Chain()
+    cred = SharedCredential(chain)
+    cred.get_token(SCOPE)
+
+    cred.get_token(SCOPE, claims="{}")
+    cred.get_token(SCOPE, claims="{}")
+    cred.get_token(SCOPE, tenant_id="outro")
+    cred.get_token(SCOPE, tenant_id="outro")
+
+    assert len(chain.calls) == 4
+
+
+def test_concurrent_callers_share_one_acquisition():
+    chain = Chain(delay=0.05)
+    cred = SharedCredential(chain)
+    tokens = []
+
+    threads = [
+        threading.Thread(target=lambda: tokens.append(cred.get_token(SCOPE)))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(chain.calls) == 1 and len(set(tokens)) == 1
+
+
+def test_the_async_view_shares_the_cache():
+    chain = Chain()
+    cred = SharedCredential(chain)
+    view = AsyncSharedCredential(cred)
+
+    async def both():
+        first = await view.get_token(SCOPE)
+        return first, await view.get_token(SCOPE)
+
+    first, second = asyncio.run(both())
+
+    assert first is second is cred.get_token(SCOPE)
+    assert len(chain.calls) == 1 and cred.token_hits == 2
+
+
+def test_closing_drops_the_tokens_and_the_chain():
+    chain = Chain()
+    cred = SharedCredential(chain)
+    cred.get_token(SCOPE)
+
+    asyncio.run(AsyncSharedCredential(cred).close())
+    assert not chain.closed
+    cred.close()
+
+    assert chain.closed and cred.cached_token(SCOPE) is None
@@ -0,0 +1,201 @@
+import os
+
+import pytest
+
+from services.directory_sync import (
+    DELETE,
+    DETACH,
+    KEEP,
+    LocalFile,
+    plan_sync,
+    scan_directory,
+)
+from services.fake_repository import FakeHttpError, FakeProjectsRepository
+from services.metadata_cache import MetadataCache
+from services.projects_service import ProjectsService
+from services.repository import VectorStoreInfo
+from services.upload_manifest import SyncedPath, UploadManifest, hash_file
+
+ENDPOINT = "https://example.services.ai.azure.com/api/projects/p"
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "docs"
+    (root / "sub").mkdir(parents=True)
+    (root / ".git").mkdir()
+    (root / "a.txt").write_text("alfa")
+    (root / "sub" / "b.txt").write_text("beta")
+    (root / ".oculto").write_text("x")
+    (root / ".git" / "config").write_text("x")
+    return root
+
+
+def sync_service(tmp_path):
+    fake = FakeProjectsRepository(stores=2, files_per_store=0)
+    service = ProjectsService()
+    service.set_repository(fake)
+    service.set_cache(MetadataCache(path=str(tmp_path / "metadata.sqlite3")), ENDPOINT)
+    service.set_manifest(UploadManifest(path=str(tmp_path / "manifest.sqlite3")))
+    service.set_vector_store(VectorStoreInfo("vs0", "Store 0"))
+    return fake, service
+
+
+def synced_ids(service, root) -> dict:
+    synced = service._manifest.synced_paths(ENDPOINT, "vs0", str(root))
+    return {p: e.file_id for p, e in synced.items()}
+
+
+def test_scan_skips_hidden_entries_and_uses_slash_paths(tree):
+    files = scan_directory(str(tree))
+
+    assert sorted(files) == ["a.txt", "sub/b.txt"]
+    assert files["sub/b.txt"].path == os.path.join(str(tree), "sub", "b.txt")
+    assert files["a.txt"].size == 4
+
+
+def test_plan_compares_size_mtime_and_remote_ids():
+    local = {
+        p: LocalFile(p, f"/r/{p}", size, 1)
+        for p, size in (("new", 1), ("same", 2), ("bigger", 9), ("gone", 3))
+    }
+    synced = {
+        p: SyncedPath(p, size, 1, f"h-{p}", f"id-{p}")
+        for p, size in (("same", 2), ("bigger", 3), ("gone", 3), ("deleted", 1))
+    }
+
+    plan = plan_sync("/r", "vs0", local, synced)
+    assert [f.rel_path for f in plan.new] == ["new"]
+    assert [f.rel_path for f in plan.changed] == ["bigger"]
+    assert [e.rel_path for e in plan.removed] == ["deleted"]
+    assert plan.unchanged == 2
+
+    remote = {"id-same", "id-bigger"}
+    plan = plan_sync("/r", "vs0", local, synced, remote)
+    # Detached remotely since the last sync: planned again.
+    assert [f.rel_path for f in plan.changed] == ["bigger", "gone"]
+
+
+def test_sync_uploads_once_then_finds_nothing_to_do(tmp_path, tree):
+    fake, service = sync_service(tmp_path)
+
+    preview = service.sync_directory(str(tree), dry_run=True)
+    assert preview.summary().startswith("Prévia: 2 novo(s)")
+    assert fake.stats["files.upload"] == 0
+
+    first = service.sync_directory(str(tree))
+    assert all(r.ok for r in first.results) and first.failed() == 0
+    assert sorted(fake._attached["vs0"]) == sorted(synced_ids(service, tree).values())
+
+    second = service.sync_directory(str(tree))
+    assert second.plan.is_empty() and second.plan.unchanged == 2
+    assert fake.stats["files.upload"] == 2
+
+
+def replace_content(path) -> None:
+    path.write_text(path.read_text() + " (nova versão)")
+
+
+@pytest.mark.parametrize(
+    "removal, attached, exists",
+    [(KEEP, True, True), (DETACH, False, True), (DELETE, False, False)],
+)
+def test_a_replaced_file_leaves_its_old_version_per_mode(
+    tmp_path, tree, removal, attached, exists
+):
+    fake, service = sync_service(tmp_path)
+    service.sync_directory(str(tree))
+    old = synced_ids(service, tree)["a.txt"]
+    replace_content(tree / "a.txt")
+
+    report = service.sync_directory(str(tree), removal=removal)
+
+    new = synced_ids(service, tree)["a.txt"]
+    assert [f.rel_path for f in report.plan.changed] == ["a.txt"]
+    assert new != old and new in fake._attached["vs0"]
+    assert (old in fake._attached["vs0"]) == attached
+    assert (old in fake._files) == exists
+    assert report.removed == (0 if removal == KEEP else 1)
+
+
+@pytest.mark.parametrize(
+    "removal, attached, exists",
+    [(KEEP, True, True), (DETACH, False, True), (DELETE, False, False)],
+)
+def test_a_removed_file_is_forgotten_per_mode(
+    tmp_path, tree, removal, attached, exists
+):
+    fake, service = sync_service(tmp_path)
+    service.sync_directory(str(tree))
+    file_id = synced_ids(service, tree)["a.txt"]
+    sha256 = hash_file(str(tree / "a.txt"))
+    os.remove(tree / "a.txt")
+
+    report = service.sync_directory(str(tree), removal=removal)
+
+    assert [e.rel_path for e in report.plan.removed] == ["a.txt"]
+    assert "a.txt" not in synced_ids(service, tree)
+    assert (file_id in fake._attached["vs0"]) == attached
+    assert (file_id in fake._files) == exists
+    known = service._manifest.lookup(ENDPOINT, sha256)
+    assert (known is not None) == exists
+
+
+def test_a_store_file_shared_by_two_paths_stays_while_one_remains(tmp_path, tree):
+    fake, service = sync_service(tmp_path)
+    (tree / "copia.txt").write_text("alfa")
+    service.sync_directory(str(tree))
+    ids = synced_ids(service, tree)
+    assert ids["a.txt"] == ids["copia.txt"]
+    os.remove(tree / "a.txt")
+
+    report = service.sync_directory(str(tree), removal=DELETE)
+
+    assert report.removed == 0
+    assert ids["a.txt"] in fake._attached["vs0"]
+    assert set(synced_ids(service, tree)) == {"copia.txt", "sub/b.txt"}
+
+
+def test_delete_only_detaches_a_file_other_stores_still_use(tmp_path, tree):
+    fake, service = sync_service(tmp_path)
+    service.sync_directory(str(tree))
+    file_id = synced_ids(service, tree)["a.txt"]
+    service.set_vector_store(VectorStoreInfo("vs1", "Store 1"))
+    (result,) = service.upload_many([str(tree / "a.txt")])
+    assert result.action == "attach" and result.file_id == file_id
+    service.set_vector_store(VectorStoreInfo("vs0", "Store 0"))
+    sha256 = hash_file(str(tree / "a.txt"))
+    os.remove(tree / "a.txt")
+
+    report = service.sync_directory(str(tree), removal=DELETE)
+
+    assert report.removed == 1 and report.errors == []
+    assert file_id not in fake._attached["vs0"]
+    assert file_id in fake._files and fake._attached["vs1"] == [file_id]
+    assert service._manifest.lookup(ENDPOINT, sha256).vector_store_ids == {"vs1"}
+
+
+def test_paths_whose_file_could_not_be_removed_are_retried(tmp_path, tree):
+    fake, service = sync_service(tmp_path)
+    service.sync_directory(str(tree))
+    os.remove(tree / "a.txt")
+
+    def unavailable(vector_store_id, file_id):
+        raise FakeHttpError(500, "Server Error")
+
+    fake.detach_file = unavailable
+    report = service.sync_directory(str(tree), removal=DETACH)
+    assert report.removed == 0 and len(report.errors) == 1
+    assert "a.txt" in synced_ids(service, tree)
+
+    del fake.detach_file
+    report = service.sync_directory(str(tree), removal=DETACH)
+    assert report.removed == 1 and report.errors == []
+    assert "a.txt" not in synced_ids(service, tree)
+
+
+def test_sync_rejects_unknown_removal_modes(tmp_path, tree):
+    _, service = sync_service(tmp_path)
+
+    with pytest.raises(RuntimeError):
+        service.sync_directory(str(tree), removal="apagar")
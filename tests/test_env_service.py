@@ -0,0 +1,85 @@
+import os
+import stat
+
+from services.env_service import EnvStore, env_flag, env_number
+
+
+def test_env_number_casts_and_falls_back_to_the_default(monkeypatch):
+    monkeypatch.setenv("FT_WORKERS", "8")
+    monkeypatch.setenv("FT_TTL", "2.5")
+    monkeypatch.setenv("FT_BAD", "muitos")
+
+    assert env_number("FT_WORKERS", 4, int) == 8
+    assert env_number("FT_TTL", 60.0, float) == 2.5
+    assert env_number("FT_BAD", 4, int) == 4
+    assert env_number("FT_TTL", 4, int) == 4
+    assert env_number("FT_MISSING", 1.5, float) == 1.5
+
+
+def test_env_flag(monkeypatch):
+    monkeypatch.setenv("FT_ON", "Sim")
+    monkeypatch.setenv("FT_OFF", "0")
+    monkeypatch.setenv("FT_EMPTY", " ")
+
+    assert env_flag("FT_ON") is True
+    assert env_flag("FT_OFF", True) is False
+    assert env_flag("FT_EMPTY", True) is True
+    assert env_flag("FT_MISSING") is False
+
+
+def test_writes_keep_the_file_mode_and_leave_no_temp_files(tmp_path):
+    path = tmp_path / ".env"
+    path.write_text("AZURE_OPENAI_API_KEY=segredo\n")
+    os.chmod(path, 0o600)
+    store = EnvStore(str(path))
+
+    store.set("PROJECT_ENDPOINT", "https://a")
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert os.listdir(tmp_path) == [".env"]
+    assert store.get("AZURE_OPENAI_API_KEY") == ("segredo", True)
+
+
+def test_set_replaces_duplicate_keys(tmp_path):
+    path = tmp_path / ".env"
+    path.write_text("# projeto\nKEY=a\nOTHER=1\nKEY=b\n")
+    store = EnvStore(str(path))
+
+    store.set("KEY", "c")
+
+    assert path.read_text() == "# projeto\nKEY=c\nOTHER=1\n"
+    assert EnvStore(str(path)).get("KEY") == ("c", True)
+
+
+def test_values_that_need_quotes_round_trip(tmp_path):
+    path = tmp_path / ".env"
+    store = EnvStore(str(path))
+    values = {
+        "A": "com espaço",
+        "B": 'aspas "e" #',
+        "C": "a\\b",
+        "D": "l1\nl2",
+        "E": "",
+    }
+
+    store.set_many(values)
+
+    assert EnvStore(str(path)).values() == {
+        **values,
+        "PROJECT_ENDPOINT": "",
+        "AZURE_OPENAI_ENDPOINT": "",
+        "AZURE_OPENAI_API_KEY": "",
+        "AZURE_INFERENCE_CREDENTIAL": "",
+    }
+
+
+def test_external_edits_are_picked_up(tmp_path):
+    path = tmp_path / ".env"
+    path.write_text("KEY=a\n")
+    store = EnvStore(str(path))
+    assert store.get("KEY") == ("a", True)
+
+    path.write_text("KEY=outro\n")
+    os.utime(path, ns=(1, 1))
+
+    assert store.get("KEY") == ("outro", True)
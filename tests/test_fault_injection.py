@@ -0,0 +1,75 @@
+import time
+
+from services.fake_repository import FakeProjectsRepository, FaultPlan
+from services.resilience import (
+    CircuitBreaker,
+    Resilience,
+    ResilientProjectsRepository,
+    RetryPolicy,
+    TokenBucket,
+    status_code,
+)
+
+FILES = 60
+
+
+def resilient(faults: FaultPlan, max_attempts: int = 10):
+    fake = FakeProjectsRepository(files_per_store=FILES, faults=faults)
+    resilience = Resilience(
+        RetryPolicy(max_attempts=max_attempts, base_delay=0, max_delay=0),
+        TokenBucket(0),
+        CircuitBreaker(failure_threshold=1000),
+    )
+    return fake, ResilientProjectsRepository(fake, resilience)
+
+
+def test_server_errors_are_retried_until_every_file_arrives():
+    fake, repo = resilient(FaultPlan(error_rate=0.3, seed=7))
+
+    listing = repo.list_vector_store_files("vs0")
+    files = list(listing)
+
+    assert sorted(f.id for f in files) == sorted(f"vs0-f{i}" for i in range(FILES))
+    assert listing.failed == []
+    errors = sum(fake.stats[f"files.get:{code}"] for code in (500, 502, 503))
+    assert errors > 0
+
+
+def test_throttled_requests_wait_for_retry_after():
+    fake, repo = resilient(FaultPlan(throttle_rate=0.3, retry_after=0.05, seed=3))
+
+    started = time.monotonic()
+    listing = repo.list_vector_store_files("vs0")
+    files = list(listing)
+    elapsed = time.monotonic() - started
+
+    assert len(files) == FILES and listing.failed == []
+    assert fake.stats["files.get:429"] > 0
+    # Backoff is zero here, so any wait comes from the Retry-After header.
+    assert elapsed >= 0.05
+
+
+def test_not_found_is_final_and_reported_in_failed_files():
+    fake, repo = resilient(FaultPlan(not_found_rate=0.2, seed=11))
+    ids = [f"vs0-f{i}" for i in range(FILES)]
+
+    listing = repo.get_files(ids)
+    files = list(listing)
+
+    failed = listing.failed
+    assert failed and all(status_code(f.exception) == 404 for f in failed)
+    assert len(files) + len(failed) == FILES
+    # A 404 is never retried: one lookup per file.
+    assert fake.stats["files.get"] == FILES
+    assert fake.stats["files.get:404"] == len(failed)
+
+
+def test_unknown_ids_fail_without_retrying():
+    fake, repo = resilient(FaultPlan())
+
+    listing = repo.get_files(["vs0-f1", "nope"])
+    files = list(listing)
+
+    assert [f.id for f in files] == ["vs0-f1"]
+    assert [f.file_id for f in listing.failed] == ["nope"]
+    assert fake.stats["files.get"] == 2
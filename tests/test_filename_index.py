@@ -0,0 +1,46 @@
+from services.filename_index import FilenameIndex, filter_files
+from services.repository import FileInfo
+
+
+def make_index(names) -> FilenameIndex:
+    return FilenameIndex(FileInfo(f"f{i}", name) for i, name in enumerate(names))
+
+
+def names(files) -> list:
+    return [f.filename for f in files]
+
+
+def test_query_syntax():
+    index = make_index(["Relatorio.pdf", "relatorio-2024.docx", "notas.txt", "a.PDF"])
+
+    # Prefix matches come back in name order.
+    assert names(index.search("relat*")) == ["relatorio-2024.docx", "Relatorio.pdf"]
+    assert names(index.search("*.pdf")) == ["Relatorio.pdf", "a.PDF"]
+    assert names(index.search("2024")) == ["relatorio-2024.docx"]
+    assert names(index.search("nada")) == []
+    assert len(index.search("")) == 4
+
+
+def test_short_terms_scan_every_name_but_stop_at_the_limit():
+    index = make_index(f"r{i}.txt" for i in range(5000))
+
+    assert len(index.search("r")) == 5000
+    assert names(index.search("r", limit=3)) == ["r0.txt", "r1.txt", "r2.txt"]
+    assert len(index.search("r1", limit=10)) == 10
+
+
+def test_add_and_remove_keep_results_current():
+    index = make_index(["a.txt", "b.txt"])
+    index.add(FileInfo("f9", "abc.txt"))
+    index.remove("f0")
+
+    assert names(index.search("*.txt")) == ["b.txt", "abc.txt"]
+    assert names(index.search("ab*")) == ["abc.txt"]
+    assert "f0" not in index and len(index) == 2
+
+
+def test_filter_files_matches_index_search():
+    files = [FileInfo("1", "x.pdf"), FileInfo("2", "y.txt")]
+
+    assert filter_files(files, "*.pdf") == [files[0]]
+    assert filter_files(files, " ") == files
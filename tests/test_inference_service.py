@@ -0,0 +1,203 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from services.fake_inference import FakeStreamingBackend
+from services.inference_service import AzureOpenAIBackend, InferenceService
+
+
+def service(backend) -> InferenceService:
+    inference = InferenceService()
+    inference.configure(model="m", backend=backend)
+    return inference
+
+
+def fast(**kwargs) -> FakeStreamingBackend:
+    return FakeStreamingBackend(first_token_delay=0, token_delay=0, **kwargs)
+
+
+def test_replies_stream_delta_by_delta_and_join_the_history():
+    inference = service(fast(reply="um dois três"))
+
+    async def collect():
+        return [d async for d in inference.astream_message("oi")]
+
+    assert asyncio.run(collect()) == ["um", " dois", " três"]
+    assert inference._history == [
+        {"role": "user", "content": "oi"},
+        {"role": "assistant", "content": "um dois três"},
+    ]
+
+
+def test_a_reply_that_fails_midway_is_left_out_of_the_history():
+    backend = fast(reply="um dois três", fail_after=2)
+    inference = service(backend)
+    received = []
+
+    async def collect():
+        async for delta in inference.astream_message("oi"):
+            received.append(delta)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(collect())
+    assert received == ["um", " dois"]
+    assert inference._history == []
+
+
+def test_cancelling_mid_stream_keeps_the_history_unchanged():
+    inference = service(FakeStreamingBackend(first_token_delay=0, token_delay=0.05))
+    received = []
+
+    async def main():
+        async def consume():
+            async for delta in inference.astream_message("oi"):
+                received.append(delta)
+
+        task = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.02)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert received and inference._history == []
+
+
+class Stream:
+    def __init__(self, chunks) -> None:
+        self.chunks = iter(chunks)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def close(self) -> None:
+        pass
+
+
+class LoopBoundOpenAI:
+    # Like the real async client, usable only on the loop it was opened on.
+    def __init__(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.closed = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages, stream, **params):
+        if self.closed or asyncio.get_running_loop() is not self.loop:
+            raise RuntimeError("Event loop is closed")
+        chunks = [
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=t))])
+            for t in ("olá", " mundo")
+        ]
+        return Stream(chunks)
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class Factory:
+    def __init__(self) -> None:
+        self.opened = []
+
+    def endpoint(self) -> str:
+        return "https://a"
+
+    def get_async(self):
+        async def get_openai_client(api_version):
+            client = LoopBoundOpenAI()
+            self.opened.append(client)
+            return client
+
+        return SimpleNamespace(get_openai_client=get_openai_client)
+
+
+def test_blocking_calls_reopen_the_client_on_each_event_loop():
+    factory = Factory()
+    inference = service(AzureOpenAIBackend(factory))
+
+    assert inference.send_message("oi") == (True, "olá mundo")
+    assert inference.send_message("de novo") == (True, "olá mundo")
+    results = inference.run_batch(["a", "b"])
+
+    assert all(r.ok for r in results)
+    assert len(factory.opened) == 3
+    assert all(client.closed for client in factory.opened)
+
+
+class CountingBackend:
+    # Answers "eco: <prompt>" after `delay`, recording the peak number of
+    # requests in flight; prompts starting with "erro" fail.
+    def __init__(self, delay: float = 0.02) -> None:
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.requests = []
+
+    async def astream(self, model, messages, params=None):
+        prompt = messages[-1]["content"]
+        self.requests.append(prompt)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay * (1 + len(self.requests) % 3))
+            if prompt.startswith("erro"):
+                raise RuntimeError(f"falhou: {prompt}")
+            yield f"eco: {prompt}"
+        finally:
+            self.active -= 1
+
+    async def aclose(self) -> None:
+        pass
+
+
+def test_batches_keep_at_most_max_concurrency_requests_in_flight():
+    backend = CountingBackend()
+    inference = service(backend)
+    prompts = [f"p{i}" for i in range(12)]
+
+    results = asyncio.run(inference.arun_batch(prompts, max_concurrency=3))
+
+    assert backend.peak == 3
+    assert [r.index for r in results] == list(range(12))
+    assert [r.response for r in results] == [f"eco: {p}" for p in prompts]
+
+
+def test_a_failed_prompt_does_not_stop_the_batch():
+    inference = service(CountingBackend())
+    seen = []
+
+    results = asyncio.run(
+        inference.arun_batch(["a", "erro 1", "   ", "b"], on_result=seen.append)
+    )
+
+    assert [r.ok for r in results] == [True, False, False, True]
+    assert results[1].error == "falhou: erro 1"
+    assert results[2].error == "Mensagem vazia."
+    assert sorted(r.index for r in seen) == [0, 1, 2, 3]
+
+
+def test_identical_prompts_share_one_request():
+    backend = CountingBackend()
+    inference = service(backend)
+
+    results = asyncio.run(inference.arun_batch(["x", "y", "x", "x"]))
+
+    assert sorted(backend.requests) == ["x", "y"]
+    assert [r.cached for r in results] == [False, False, True, True]
+    assert results[3].response == "eco: x"
+
+
+def test_batches_are_independent_of_the_chat_history():
+    inference = service(fast())
+    inference._history = [{"role": "user", "content": "antes"}]
+
+    (result,) = asyncio.run(inference.arun_batch(["oi"]))
+
+    assert result.response.endswith("(1 mensagem(ns) na conversa)")
+    assert inference._history == [{"role": "user", "content": "antes"}]
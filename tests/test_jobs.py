@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from ui.app import App
+from ui.jobs import CANCELLED, DONE, FAILED, JobManager
+
+
+def run_until_finished(loop: asyncio.AbstractEventLoop, job) -> None:
+    loop.run_until_complete(asyncio.wait_for(job.wait(), timeout=5))
+
+
+def test_thread_progress_reaches_the_loop_coalesced():
+    loop = asyncio.new_event_loop()
+    manager = JobManager(loop)
+    seen = []
+    manager.subscribe(lambda job: seen.append((job.status, job.done)))
+
+    def work(job) -> None:
+        for i in range(1, 10_001):
+            job.update(done=i)
+
+    job = manager.start_thread("progresso", work)
+    run_until_finished(loop, job)
+    loop.run_until_complete(asyncio.sleep(0))
+
+    assert job.status == DONE and job.done == 10_000
+    assert seen[-1] == (DONE, 10_000)
+    # One queued dispatch covers every update made before it runs.
+    assert len(seen) < 1000
+    manager.shutdown()
+    loop.close()
+
+
+def test_worker_reporting_after_the_loop_closed_does_not_raise():
+    # The bulk upload screen's worker used to write to a pipe the loop had
+    # already dropped; a late update must now be a no-op instead.
+    loop = asyncio.new_event_loop()
+    manager = JobManager(loop)
+    manager.subscribe(lambda job: None)
+    release = threading.Event()
+    errors = []
+
+    def work(job) -> None:
+        release.wait(5)
+        try:
+            job.update(done=1, detail="tarde demais")
+        except Exception as e:  # noqa: BLE001
+            errors.append(e)
+
+    job = manager.start_thread("tardio", work)
+    loop.run_until_complete(asyncio.sleep(0.05))
+    manager.shutdown()
+    loop.run_until_complete(asyncio.sleep(0.01))
+    loop.close()
+    release.set()
+    deadline = time.monotonic() + 5
+    while job.done != 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert job.done == 1
+    assert errors == []
+
+
+def test_cancel_and_failure_are_reported():
+    loop = asyncio.new_event_loop()
+    manager = JobManager(loop)
+
+    def polling(job) -> None:
+        while not job.cancelled():
+            time.sleep(0.01)
+
+    def failing(job) -> None:
+        raise RuntimeError("falhou de propósito")
+
+    cancelled = manager.start_thread("cancelável", polling)
+    failed = manager.start_thread("falha", failing)
+    loop.run_until_complete(asyncio.sleep(0.05))
+    cancelled.cancel()
+    run_until_finished(loop, failed)
+    loop.run_until_complete(asyncio.sleep(0.1))
+
+    assert cancelled.status == CANCELLED
+    assert failed.status == FAILED and failed.error == "falhou de propósito"
+    manager.shutdown()
+    loop.close()
+
+
+def test_every_watcher_of_a_job_hears_its_result():
+    # A project switch watches the connect job too; connect()'s own watcher
+    # must still run (it records the error and starts the follow-up work).
+    loop = asyncio.new_event_loop()
+    manager = JobManager(loop)
+    app = SimpleNamespace(_job_watchers={}, refresh_screen=lambda: None)
+    manager.subscribe(lambda job: App.on_job_change(app, job))
+    heard = []
+
+    def failing(job) -> None:
+        raise RuntimeError("sem rede")
+
+    job = manager.start_thread("Conectar ao projeto", failing)
+    App.watch_job(app, job, lambda j: heard.append(("connect", j.status)))
+    App.watch_job(app, job, lambda j: heard.append(("switch", j.status)))
+    run_until_finished(loop, job)
+    loop.run_until_complete(asyncio.sleep(0))
+
+    assert heard[-2:] == [("connect", FAILED), ("switch", FAILED)]
+    assert app._job_watchers == {}
+    manager.shutdown()
+    loop.close()
+
+
+def test_screen_task_cancelled_while_queued_never_creates_its_coroutine():
+    loop = asyncio.new_event_loop()
+    manager = JobManager(loop)
+    release = threading.Event()
+    connect = manager.start_thread("Conectar ao projeto", lambda job: release.wait(5))
+    app = SimpleNamespace(jobs=manager, _connect_job=connect)
+    created = []
+
+    async def task() -> None:
+        created.append(True)
+
+    job = App.run_task(app, "Listar Vector Stores", task)
+    loop.run_until_complete(asyncio.sleep(0.05))
+    job.cancel()
+    release.set()
+    run_until_finished(loop, connect)
+    loop.run_until_complete(asyncio.sleep(0.01))
+
+    assert job.status == CANCELLED
+    assert created == []
+    manager.shutdown()
+    loop.close()
@@ -0,0 +1,58 @@
+import asyncio
+from types import SimpleNamespace
+
+from services.async_repository import AzureAsyncProjectsRepository
+from services.metadata_cache import MetadataCache
+from services.repository import AzureProjectsRepository, FileInfo, VectorStoreInfo
+
+ENDPOINT = "https://example.services.ai.azure.com/api/projects/p"
+
+
+def stores_client(stores) -> SimpleNamespace:
+    return SimpleNamespace(
+        agents=SimpleNamespace(vector_stores=SimpleNamespace(list=lambda: stores))
+    )
+
+
+def test_unnamed_vector_stores_are_listed_under_their_id():
+    stores = [SimpleNamespace(id="vs1", name=None), SimpleNamespace(id="vs2", name="B")]
+    repo = AzureProjectsRepository(stores_client(stores))
+
+    assert list(repo.list_vector_stores()) == [
+        VectorStoreInfo("vs1", "vs1"),
+        VectorStoreInfo("vs2", "B"),
+    ]
+
+
+def test_async_repository_names_unnamed_vector_stores_too():
+    async def listing():
+        yield SimpleNamespace(id="vs1", name=None)
+
+    repo = AzureAsyncProjectsRepository(stores_client(listing()))
+
+    async def collect():
+        return [vs async for vs in repo.list_vector_stores()]
+
+    assert asyncio.run(collect()) == [VectorStoreInfo("vs1", "vs1")]
+
+
+def test_cache_stores_vector_stores_without_a_name(tmp_path):
+    cache = MetadataCache(path=str(tmp_path / "metadata.sqlite3"))
+
+    cache.put_vector_stores(ENDPOINT, [VectorStoreInfo("vs1", None)])
+
+    assert cache.get_vector_stores(ENDPOINT) == [VectorStoreInfo("vs1", "vs1")]
+    cache.close()
+
+
+def test_cache_reconciles_files_per_endpoint_and_store(tmp_path):
+    cache = MetadataCache(path=str(tmp_path / "metadata.sqlite3"))
+    a, b = FileInfo("f1", "a.txt", 1), FileInfo("f2", "b.txt", 2)
+
+    cache.reconcile_files(ENDPOINT, "vs1", [a, b], [])
+    cache.reconcile_files(ENDPOINT, "vs1", [], ["f1"])
+
+    assert cache.get_files(ENDPOINT, "vs1") == {"f2": b}
+    assert cache.get_files(ENDPOINT, "vs2") == {}
+    assert cache.get_files("https://other", "vs1") == {}
+    cache.close()
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from services.metrics import Metrics, percentile
+
+
+def test_percentile_is_nearest_rank():
+    samples = [float(i) for i in range(1, 101)]
+
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 95) == 95.0
+    assert percentile(samples, 99) == 99.0
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([], 50) is None
+
+
+def test_snapshot_reports_percentiles_over_the_recent_samples():
+    metrics = Metrics(reservoir_size=100)
+    for ms in range(1, 1001):
+        metrics.record("op", ms / 1000)
+
+    op = metrics.snapshot()["operations"]["op"]
+
+    assert op["count"] == 1000
+    # Only the last 100 samples (901..1000 ms) are kept for percentiles.
+    assert (op["p50_ms"], op["p95_ms"], op["p99_ms"]) == (950.0, 995.0, 999.0)
+    assert op["max_ms"] == 1000.0
+
+
+def test_timer_records_span_items_bytes_and_failures():
+    metrics = Metrics()
+    with metrics.timer("upload") as span:
+        span.items = 3
+        span.bytes = 2048
+    with pytest.raises(ValueError):
+        with metrics.timer("upload"):
+            raise ValueError("falhou")
+
+    op = metrics.snapshot()["operations"]["upload"]
+
+    assert (op["count"], op["errors"], op["items"], op["bytes"]) == (2, 1, 3, 2048)
+
+
+def test_cancelled_operations_are_not_errors():
+    metrics = Metrics()
+
+    async def cancelled():
+        with metrics.timer("listing"):
+            await asyncio.sleep(10)
+
+    async def run():
+        task = asyncio.ensure_future(cancelled())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    snapshot = metrics.snapshot()
+
+    assert snapshot["operations"]["listing"]["errors"] == 0
+    assert snapshot["counters"] == {"listing.cancelled": 1}
+
+
+def test_measure_counts_items_and_errors():
+    metrics = Metrics()
+
+    def broken():
+        yield 1
+        raise RuntimeError("quebrou")
+
+    assert list(metrics.measure("list", [b"ab", b"c"], size=len)) == [b"ab", b"c"]
+    with pytest.raises(RuntimeError):
+        list(metrics.measure("broken", broken(), first=True))
+
+    ops = metrics.snapshot()["operations"]
+
+    assert (ops["list"]["count"], ops["list"]["items"]) == (1, 3)
+    assert (ops["broken"]["errors"], ops["broken"]["items"]) == (1, 1)
+    assert ops["broken.first"]["count"] == 1
+
+
+def test_reset_clears_operations_and_counters():
+    metrics = Metrics()
+    metrics.record("op", 0.1)
+    metrics.count("hits")
+
+    metrics.reset()
+
+    assert metrics.snapshot()["operations"] == {}
+    assert metrics.snapshot()["counters"] == {}
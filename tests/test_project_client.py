@@ -0,0 +1,232 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from clients import project_client
+from clients.project_client import GRAPH_ME_URL, GRAPH_ORG_URL, ProjectClientFactory
+
+ENDPOINT = "https://a.services.ai.azure.com/api/projects/p"
+OTHER = "https://b.services.ai.azure.com/api/projects/q"
+
+
+class TokenCredential:
+    def get_token(self, *scopes):
+        return SimpleNamespace(token="t", expires_on=0)
+
+
+def factory(tmp_path, ttl: float = 3600) -> ProjectClientFactory:
+    made = ProjectClientFactory(
+        user_info_path=str(tmp_path / "user_info.json"), user_info_ttl=ttl
+    )
+    made.configure(ENDPOINT)
+    return made
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    calls = []
+
+    def resolve(self, endpoint):
+        calls.append(endpoint)
+        return f"Usuário {len(calls)}", "Contoso"
+
+    monkeypatch.setattr(ProjectClientFactory, "_resolve_user_info", resolve)
+    return calls
+
+
+def test_profile_is_resolved_once_while_fresh(tmp_path, lookups):
+    clients = factory(tmp_path)
+
+    assert clients.cached_user_info() == (None, None)
+    assert not clients.user_info_fresh()
+    assert clients.get_user_info() == ("Usuário 1", "Contoso")
+    assert clients.get_user_info() == ("Usuário 1", "Contoso")
+    assert clients.user_info_fresh() and lookups == [ENDPOINT]
+
+    assert clients.get_user_info(refresh=True) == ("Usuário 2", "Contoso")
+
+
+def test_the_disk_cache_survives_a_restart(tmp_path, lookups):
+    factory(tmp_path).get_user_info()
+
+    restarted = factory(tmp_path)
+
+    assert restarted.cached_user_info() == ("Usuário 1", "Contoso")
+    assert restarted.get_user_info() == ("Usuário 1", "Contoso")
+    assert lookups == [ENDPOINT]
+    saved = json.loads((tmp_path / "user_info.json").read_text())
+    assert saved[ENDPOINT]["user_name"] == "Usuário 1"
+
+
+def test_an_expired_profile_is_shown_until_resolved_again(tmp_path, lookups):
+    clients = factory(tmp_path, ttl=0)
+    clients.get_user_info()
+
+    assert not clients.user_info_fresh()
+    assert clients.cached_user_info() == ("Usuário 1", "Contoso")
+    assert clients.get_user_info() == ("Usuário 2", "Contoso")
+
+
+def test_profiles_are_kept_per_endpoint(tmp_path, lookups):
+    clients = factory(tmp_path)
+    clients.get_user_info()
+
+    clients.configure(OTHER)
+    assert clients.cached_user_info() == (None, None)
+    assert clients.get_user_info() == ("Usuário 2", "Contoso")
+    clients.configure(ENDPOINT)
+    assert clients.get_user_info() == ("Usuário 1", "Contoso")
+    assert lookups == [ENDPOINT, OTHER]
+
+
+def test_a_failed_lookup_keeps_the_cached_profile(tmp_path, monkeypatch):
+    clients = factory(tmp_path, ttl=0)
+    monkeypatch.setattr(
+        ProjectClientFactory, "_resolve_user_info", lambda self, e: ("Ana", "Contoso")
+    )
+    clients.get_user_info()
+
+    def offline(self, endpoint):
+        raise RuntimeError("sem rede")
+
+    monkeypatch.setattr(ProjectClientFactory, "_resolve_user_info", offline)
+    assert clients.get_user_info() == ("Ana", "Contoso")
+
+
+def graph(monkeypatch, me, org):
+    requested = []
+
+    def get(url, headers):
+        requested.append(url)
+        return {GRAPH_ME_URL: me, GRAPH_ORG_URL: org}[url]
+
+    monkeypatch.setattr(project_client, "_graph_get", get)
+    return requested
+
+
+def test_the_profile_takes_two_graph_requests(tmp_path, monkeypatch):
+    clients = factory(tmp_path)
+    clients._credentials[ENDPOINT] = TokenCredential()
+    requested = graph(
+        monkeypatch,
+        {"displayName": "Ana"},
+        {"value": [{"displayName": "Contoso Ltda"}]},
+    )
+
+    assert clients._resolve_user_info(ENDPOINT) == ("Ana", "Contoso Ltda")
+    assert sorted(requested) == sorted([GRAPH_ME_URL, GRAPH_ORG_URL])
+
+
+def test_the_organization_falls_back_to_the_upn_domain(tmp_path, monkeypatch):
+    clients = factory(tmp_path)
+    clients._credentials[ENDPOINT] = TokenCredential()
+    graph(
+        monkeypatch, {"givenName": "Ana", "userPrincipalName": "ana@fabrikam.com"}, None
+    )
+
+    assert clients._resolve_user_info(ENDPOINT) == ("Ana", "Fabrikam")
+
+
+def test_switching_back_to_an_endpoint_reuses_its_credential(tmp_path, monkeypatch):
+    built = []
+
+    def build(**kwargs):
+        built.append(kwargs)
+        return TokenCredential()
+
+    monkeypatch.setattr(project_client, "build_default_credential", build)
+    clients = factory(tmp_path)
+    first = clients.credential()
+
+    clients.configure(OTHER)
+    assert clients.credential() is not first
+    clients.configure(ENDPOINT)
+    assert clients.credential() is first
+    assert len(built) == 2
+
+
+class Client:
+    def __init__(self, endpoint, credential, transport) -> None:
+        self.endpoint = endpoint
+        self.credential = credential
+        self.transport = transport
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class AsyncClient(Client):
+    async def close(self) -> None:
+        self.closed = True
+
+
+class Transports:
+    def __init__(self) -> None:
+        self.closed = False
+
+    def sync(self):
+        return "sessão"
+
+    def async_(self):
+        return "sessão async"
+
+    def close(self) -> None:
+        self.closed = True
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def pooled(tmp_path, monkeypatch):
+    monkeypatch.setattr("azure.ai.projects.AIProjectClient", Client)
+    monkeypatch.setattr("azure.ai.projects.aio.AIProjectClient", AsyncClient)
+    monkeypatch.setattr(
+        project_client, "build_default_credential", lambda **kw: TokenCredential()
+    )
+    clients = factory(tmp_path)
+    clients._transports = Transports()
+    return clients
+
+
+def test_switching_projects_reuses_their_pooled_clients(pooled):
+    first = pooled.get()
+    assert pooled.get() is first and pooled.get(ENDPOINT) is first
+
+    pooled.configure(OTHER)
+    other = pooled.get()
+    assert other is not first and other.endpoint == OTHER
+    pooled.configure(ENDPOINT)
+    assert pooled.get() is first
+    assert first.transport == other.transport == "sessão"
+    assert pooled.pooled_endpoints() == [ENDPOINT, OTHER]
+
+
+def test_idle_clients_of_other_projects_are_closed(pooled):
+    current, current_async = pooled.get(), pooled.get_async()
+    pooled.configure(OTHER)
+    idle = pooled.get()
+    credential = pooled.credential(OTHER)
+    pooled.configure(ENDPOINT)
+
+    assert asyncio.run(pooled.aevict_idle(0)) == []
+    assert asyncio.run(pooled.aevict_idle(1e-9)) == [OTHER]
+
+    assert idle.closed and not current.closed and not current_async.closed
+    assert pooled.pooled_endpoints() == [ENDPOINT]
+    pooled.configure(OTHER)
+    assert pooled.get() is not idle
+    assert pooled.credential() is credential
+
+
+def test_closing_the_pool_closes_every_client_and_the_transports(pooled):
+    sync_client, async_client = pooled.get(), pooled.get_async()
+    transports = pooled._transports
+
+    asyncio.run(pooled.aclose())
+
+    assert sync_client.closed and async_client.closed and transports.closed
+    assert pooled.pooled_endpoints() == []
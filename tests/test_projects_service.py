@@ -0,0 +1,51 @@
+import asyncio
+
+from services.fake_repository import FakeProjectsRepository
+from services.metadata_cache import MetadataCache
+from services.projects_service import ProjectsService
+from services.repository import VectorStoreInfo
+
+ENDPOINT = "https://example.services.ai.azure.com/api/projects/p"
+
+
+def service_with_ghosts(tmp_path=None) -> ProjectsService:
+    # Every store has one attached id whose metadata lookup fails (404).
+    fake = FakeProjectsRepository(stores=2, files_per_store=5)
+    for vs in ("vs0", "vs1"):
+        fake._attached[vs].append(f"{vs}-ghost")
+    service = ProjectsService()
+    service.set_repository(fake)
+    if tmp_path is not None:
+        cache = MetadataCache(path=str(tmp_path / "metadata.sqlite3"))
+        service.set_cache(cache, ENDPOINT)
+    return service
+
+
+def test_interleaved_listings_keep_failures_per_store(tmp_path):
+    service = service_with_ghosts(tmp_path)
+
+    service.set_vector_store(VectorStoreInfo("vs0", "Store 0"))
+    first = service.stream_vector_store_files(True)
+    next(first)
+    service.set_vector_store(VectorStoreInfo("vs1", "Store 1"))
+    second = list(service.stream_vector_store_files(True))
+    list(first)
+
+    assert sum(len(batch) for batch in second) == 5
+    assert [f.file_id for f in service.failed_files("vs0")] == ["vs0-ghost"]
+    assert [f.file_id for f in service.failed_files()] == ["vs1-ghost"]
+
+
+def test_concurrent_async_listings_keep_failures_per_store():
+    service = service_with_ghosts()
+
+    async def listing(vs_id: str) -> int:
+        service.set_vector_store(VectorStoreInfo(vs_id, vs_id))
+        return len(await service.alist_vector_store_files(True))
+
+    async def both():
+        return await asyncio.gather(listing("vs0"), listing("vs1"))
+
+    assert asyncio.run(both()) == [5, 5]
+    assert [f.file_id for f in service.failed_files("vs0")] == ["vs0-ghost"]
+    assert [f.file_id for f in service.failed_files("vs1")] == ["vs1-ghost"]
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from ui.redraw import RedrawScheduler
+
+
+class Screen:
+    def __init__(self) -> None:
+        self.draws = []
+
+    def draw_screen(self) -> None:
+        self.draws.append(time.monotonic())
+
+
+@pytest.fixture
+def loop():
+    aio_loop = asyncio.new_event_loop()
+    yield aio_loop
+    if not aio_loop.is_closed():
+        aio_loop.close()
+
+
+def scheduler(loop, max_fps: float = 20, can_draw=lambda: True):
+    screen = Screen()
+    return screen, RedrawScheduler(screen, loop, can_draw, max_fps=max_fps)
+
+
+def settle(loop, seconds: float = 0.02) -> None:
+    loop.run_until_complete(asyncio.sleep(seconds))
+
+
+def test_requests_within_a_frame_share_one_draw(loop):
+    screen, redraws = scheduler(loop)
+
+    for _ in range(100):
+        redraws.request()
+    settle(loop)
+
+    assert len(screen.draws) == 1
+    assert (redraws.requests, redraws.draws) == (100, 1)
+
+
+def test_the_next_draw_waits_for_the_frame_interval(loop):
+    screen, redraws = scheduler(loop, max_fps=10)
+    redraws.request()
+    settle(loop)
+
+    redraws.request()
+    redraws.request()
+    settle(loop, 0.15)
+
+    assert len(screen.draws) == 2
+    assert screen.draws[1] - screen.draws[0] >= redraws.interval - 0.005
+
+
+def test_requests_from_worker_threads_are_drawn_on_the_loop(loop):
+    screen, redraws = scheduler(loop)
+    drawn_on = []
+    screen.draw_screen = lambda: drawn_on.append(threading.current_thread())
+
+    workers = [threading.Thread(target=redraws.request) for _ in range(8)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    settle(loop)
+
+    assert drawn_on == [threading.main_thread()]
+
+
+def test_nothing_is_drawn_before_the_screen_starts(loop):
+    started = False
+    screen, redraws = scheduler(loop, can_draw=lambda: started)
+
+    redraws.request()
+    settle(loop)
+    assert screen.draws == []
+
+    started = True
+    redraws.request()
+    settle(loop, 0.1)
+    assert len(screen.draws) == 1
+
+
+def test_flush_draws_a_pending_request_right_away(loop):
+    screen, redraws = scheduler(loop)
+
+    redraws.flush()
+    assert screen.draws == []
+    redraws.request()
+    redraws.flush()
+    assert len(screen.draws) == 1
+    settle(loop)
+    assert len(screen.draws) == 1
+
+
+def test_requests_after_the_loop_closed_are_dropped(loop):
+    screen, redraws = scheduler(loop)
+    loop.close()
+
+    worker = threading.Thread(target=redraws.request)
+    worker.start()
+    worker.join()
+
+    assert redraws.requests == 1 and screen.draws == []
@@ -0,0 +1,116 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from services.repository import AzureProjectsRepository, FileInfo
+
+LATENCY = 0.02
+FILES = 40
+
+
+class SlowFiles:
+    # Stands in for client.agents.files: every lookup takes LATENCY seconds.
+    def __init__(self, missing=()) -> None:
+        self.missing = set(missing)
+        self.calls = 0
+
+    def get(self, file_id: str):
+        self.calls += 1
+        time.sleep(LATENCY)
+        if file_id in self.missing:
+            raise RuntimeError(f"(404) {file_id} não encontrado")
+        return SimpleNamespace(id=file_id, filename=f"{file_id}.pdf", bytes=10)
+
+
+def fake_client(files: SlowFiles, assocs=()) -> SimpleNamespace:
+    store_files = SimpleNamespace(list=lambda vector_store_id: list(assocs))
+    return SimpleNamespace(
+        agents=SimpleNamespace(files=files, vector_store_files=store_files)
+    )
+
+
+def timed_get_files(max_workers: int, ids):
+    files = SlowFiles()
+    repo = AzureProjectsRepository(fake_client(files), max_workers=max_workers)
+    started = time.perf_counter()
+    result = list(repo.get_files(ids))
+    return result, time.perf_counter() - started
+
+
+def test_concurrent_get_files_is_faster_and_keeps_order():
+    ids = [f"file-{i}" for i in range(FILES)]
+    sequential, sequential_seconds = timed_get_files(1, ids)
+    concurrent, concurrent_seconds = timed_get_files(8, ids)
+
+    assert [f.id for f in concurrent] == ids
+    assert concurrent == sequential
+    assert sequential_seconds >= FILES * LATENCY
+    # Eight workers over 40 lookups need about five rounds of LATENCY.
+    assert concurrent_seconds < sequential_seconds / 3
+
+
+@pytest.mark.parametrize("max_workers", [1, 8])
+def test_failed_lookups_are_recorded_not_raised(max_workers):
+    files = SlowFiles(missing={"file-3", "file-7"})
+    repo = AzureProjectsRepository(fake_client(files), max_workers=max_workers)
+
+    listing = repo.get_files(f"file-{i}" for i in range(10))
+    result = list(listing)
+
+    assert [f.id for f in result] == [f"file-{i}" for i in range(10) if i not in (3, 7)]
+    assert sorted(f.file_id for f in listing.failed) == ["file-3", "file-7"]
+
+
+def test_concurrent_lookups_keep_their_own_failures():
+    files = SlowFiles(missing={"file-1", "file-8"})
+    repo = AzureProjectsRepository(fake_client(files), max_workers=4)
+
+    first = repo.get_files(["file-0", "file-1"])
+    second = repo.get_files(["file-8", "file-9"])
+    interleaved = list(zip(first, second))
+
+    assert interleaved == [
+        (FileInfo("file-0", "file-0.pdf", 10), FileInfo("file-9", "file-9.pdf", 10))
+    ]
+    assert [f.file_id for f in first.failed] == ["file-1"]
+    assert [f.file_id for f in second.failed] == ["file-8"]
+
+
+def test_listing_skips_lookups_for_associations_with_filenames():
+    files = SlowFiles()
+    assocs = [
+        SimpleNamespace(id="a", filename="a.txt", bytes=1),
+        SimpleNamespace(id="b", filename=None),
+        SimpleNamespace(id="c", filename="c.txt", bytes=3),
+    ]
+    repo = AzureProjectsRepository(fake_client(files, assocs), max_workers=4)
+
+    result = list(repo.list_vector_store_files("vs"))
+
+    assert result == [
+        FileInfo("a", "a.txt", 1),
+        FileInfo("b", "b.pdf", 10),
+        FileInfo("c", "c.txt", 3),
+    ]
+    assert files.calls == 1
+
+
+def test_attach_reports_the_files_the_batch_rejected():
+    listed = []
+
+    def list_files(vector_store_id, batch_id, filter):
+        listed.append((batch_id, filter))
+        return [SimpleNamespace(id="file-2")]
+
+    batches = SimpleNamespace(
+        create_and_poll=lambda vector_store_id, file_ids: SimpleNamespace(
+            id="batch-1", file_counts=SimpleNamespace(failed=1)
+        ),
+        list_files=list_files,
+    )
+    client = SimpleNamespace(agents=SimpleNamespace(vector_store_file_batches=batches))
+    repo = AzureProjectsRepository(client)
+
+    assert repo.attach_files("vs0", ["file-1", "file-2"]) == ["file-2"]
+    assert listed == [("batch-1", "failed")]
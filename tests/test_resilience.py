@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+
+from services.fake_repository import FakeHttpError, FakeProjectsRepository, FaultPlan
+from services.resilience import (
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    Resilience,
+    ResilientProjectsRepository,
+    RetryPolicy,
+    TokenBucket,
+)
+
+
+def resilience(max_attempts: int = 3, failure_threshold: int = 100) -> Resilience:
+    return Resilience(
+        RetryPolicy(max_attempts=max_attempts, base_delay=0, max_delay=0),
+        TokenBucket(0),
+        CircuitBreaker(failure_threshold=failure_threshold),
+    )
+
+
+class FailingPager(FakeProjectsRepository):
+    # Fails with 503 on page `fail_page` of every listing; with `once` only
+    # the first time each page is reached, like a service that recovers.
+    def __init__(self, fail_page: int = 1, once: bool = False, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.fail_page = fail_page
+        self.once = once
+        self.failed_pages = set()
+
+    def _pages(self, operation, items):
+        for i, item in enumerate(super()._pages(operation, items)):
+            page = i // self.page_size
+            if i % self.page_size == 0 and page >= self.fail_page:
+                if not (self.once and page in self.failed_pages):
+                    self.failed_pages.add(page)
+                    self.stats[f"{operation}:503"] += 1
+                    raise FakeHttpError(503, "Service Unavailable")
+            yield item
+
+
+def test_listing_that_always_fails_on_page_two_stops_after_max_attempts():
+    fake = FailingPager(stores=50, page_size=20)
+    repo = ResilientProjectsRepository(fake, resilience(max_attempts=3))
+    seen = []
+
+    with pytest.raises(FakeHttpError):
+        for vs in repo.list_vector_stores():
+            seen.append(vs.id)
+
+    assert fake.stats["vector_stores.list:503"] == 3
+    # Restarts never hand out the first page twice.
+    assert seen == [f"vs{i}" for i in range(20)]
+
+
+def test_async_listing_that_always_fails_on_page_two_stops_too():
+    fake = FailingPager(stores=50, page_size=20)
+
+    async def listing():
+        for vs in fake.list_vector_stores():
+            yield vs
+
+    async def collect():
+        return [vs async for vs in resilience(3).aiterate(listing, lambda v: v.id)]
+
+    with pytest.raises(FakeHttpError):
+        asyncio.run(collect())
+    assert fake.stats["vector_stores.list:503"] == 3
+
+
+def test_listing_that_gets_further_on_each_restart_completes():
+    # Every page fails once; each restart gets past the previous one, so
+    # the attempt count resets and two attempts per page are enough.
+    fake = FailingPager(stores=100, page_size=20, once=True)
+    repo = ResilientProjectsRepository(fake, resilience(max_attempts=2))
+
+    ids = [vs.id for vs in repo.list_vector_stores()]
+
+    assert ids == [f"vs{i}" for i in range(100)]
+    assert fake.stats["vector_stores.list:503"] == 4
+
+
+def test_breaker_opens_during_an_outage_and_fails_fast():
+    fake = FakeProjectsRepository(stores=5, faults=FaultPlan(outage_requests=100))
+    shared = resilience(max_attempts=10, failure_threshold=3)
+    repo = ResilientProjectsRepository(fake, shared)
+
+    with pytest.raises(CircuitOpenError):
+        list(repo.list_vector_stores())
+    assert shared.breaker.state == OPEN
+    assert fake.stats["vector_stores.list"] == 3
+
+    with pytest.raises(CircuitOpenError):
+        list(repo.list_vector_stores())
+    assert fake.stats["vector_stores.list"] == 3
+
+
+class CountingBucket(TokenBucket):
+    def __init__(self) -> None:
+        super().__init__(0)
+        self.taken = 0
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        self.taken += tokens
+        return super().reserve(tokens)
+
+
+def test_listings_take_a_token_per_page():
+    fake = FakeProjectsRepository(stores=100, page_size=20)
+    bucket = CountingBucket()
+    shared = Resilience(RetryPolicy(base_delay=0, max_delay=0), bucket)
+    repo = ResilientProjectsRepository(fake, shared)
+
+    assert len(list(repo.list_vector_stores())) == 100
+
+    pages = fake.stats["vector_stores.list"]
+    assert pages == 5
+    # One ahead of each page, plus one when the last page runs out.
+    assert bucket.taken == pages + 1
+
+
+class FlakyUploads(FakeProjectsRepository):
+    def __init__(self, *errors: FakeHttpError) -> None:
+        super().__init__(stores=1, files_per_store=0)
+        self.errors = list(errors)
+        self.attempts = 0
+
+    def upload_file(self, file_path: str):
+        self.attempts += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return super().upload_file(file_path)
+
+
+def test_uploads_are_not_retried_after_an_ambiguous_failure(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("conteúdo")
+    fake = FlakyUploads(FakeHttpError(504, "Gateway Timeout"))
+    repo = ResilientProjectsRepository(fake, resilience(max_attempts=5))
+
+    with pytest.raises(FakeHttpError):
+        repo.upload_file_to_vector_store("vs0", str(path))
+    assert fake.attempts == 1
+
+
+def test_uploads_the_service_turned_away_are_retried(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("conteúdo")
+    fake = FlakyUploads(
+        FakeHttpError(429, "Too Many Requests", 0), FakeHttpError(503, "Busy")
+    )
+    repo = ResilientProjectsRepository(fake, resilience(max_attempts=5))
+
+    info = repo.upload_file_to_vector_store("vs0", str(path))
+
+    assert fake.attempts == 3
+    assert info.filename == "a.txt"
@@ -0,0 +1,33 @@
+import asyncio
+
+from services.fake_inference import FakeStreamingBackend
+from services.inference_service import InferenceService
+from services.response_cache import ResponseCache, cache_key
+
+MESSAGES = [{"role": "user", "content": "oi"}]
+
+
+def test_cache_key_includes_the_endpoint():
+    a = cache_key("https://a", "gpt", MESSAGES)
+
+    assert a == cache_key("https://a", "gpt", MESSAGES)
+    assert a != cache_key("https://b", "gpt", MESSAGES)
+    assert a != cache_key("https://a", "gpt", MESSAGES, {"temperature": 0})
+
+
+def test_projects_with_the_same_deployment_do_not_share_answers():
+    backend = FakeStreamingBackend(first_token_delay=0, token_delay=0)
+    service = InferenceService()
+    service.set_cache(ResponseCache())
+    service.configure(model="gpt", backend=backend, endpoint="https://a")
+
+    async def batch():
+        return await service.arun_batch(["oi"])
+
+    first = asyncio.run(batch())
+    again = asyncio.run(batch())
+    service.set_endpoint("https://b")
+    other = asyncio.run(batch())
+
+    assert not first[0].cached and again[0].cached and not other[0].cached
+    assert backend.requests == 2
@@ -0,0 +1,101 @@
+import urwid
+
+from ui.screens import ROW_CACHE_SIZE, EnterEdit, VirtualList
+
+SIZE = (40, 10)
+
+
+def virtual_list(count: int, selected=None):
+    built = []
+
+    def render(row):
+        built.append(row)
+        return urwid.Text(f"linha {row}")
+
+    listing = VirtualList(
+        range(count),
+        render,
+        on_select=selected.append if selected is not None else None,
+    )
+    return listing, built
+
+
+def visible(listing: VirtualList):
+    canvas = listing.render(SIZE, focus=True)
+    return [line.decode().rstrip() for line in canvas.text]
+
+
+def test_only_the_visible_rows_are_built():
+    listing, built = virtual_list(100_000)
+
+    assert visible(listing)[:2] == ["linha 0", "linha 1"]
+    assert len(set(built)) <= SIZE[1] + 1
+
+
+def test_scrolling_far_keeps_the_row_cache_bounded():
+    listing, built = virtual_list(100_000)
+    for _ in range(100):
+        listing.keypress(SIZE, "page down")
+        listing.render(SIZE, focus=True)
+
+    assert listing.selected_index() > 500
+    assert len(listing.walker._cache) <= ROW_CACHE_SIZE
+
+
+def test_keys_move_the_focus_and_enter_selects():
+    selected = []
+    listing, _ = virtual_list(50, selected)
+    listing.render(SIZE, focus=True)
+
+    listing.keypress(SIZE, "down")
+    listing.keypress(SIZE, "down")
+    assert listing.selected() == 2
+    listing.keypress(SIZE, "end")
+    assert listing.selected() == 49
+    assert visible(listing)[-1] == "linha 49"
+    listing.keypress(SIZE, "home")
+    assert listing.selected() == 0
+    listing.keypress(SIZE, "enter")
+    assert selected == [0]
+
+
+def test_jump_to_clamps_to_the_rows():
+    listing, _ = virtual_list(20)
+
+    listing.jump_to(7)
+    assert listing.selected_index() == 7
+    listing.jump_to(1_000)
+    assert listing.selected_index() == 19
+    listing.jump_to(-5)
+    assert listing.selected_index() == 0
+
+
+def test_new_rows_reset_the_focus_but_appended_rows_keep_it():
+    listing, _ = virtual_list(20)
+    listing.jump_to(5)
+
+    listing.extend([20, 21])
+    assert listing.selected_index() == 5 and len(listing.walker) == 22
+    listing.set_rows(["a", "b"])
+    assert listing.selected() == "a"
+    assert visible(listing)[:2] == ["linha a", "linha b"]
+
+
+def test_an_empty_list_is_not_selectable():
+    selected = []
+    listing, _ = virtual_list(0, selected)
+
+    assert not listing.selectable()
+    assert listing.selected() is None and listing.selected_index() is None
+    listing.jump_to(3)
+    listing.keypress(SIZE, "enter")
+    assert selected == []
+
+
+def test_enter_edit_hands_its_text_to_the_callback():
+    sent = []
+    edit = EnterEdit("Mensagem: ", on_enter=lambda w: sent.append(w.edit_text))
+    edit.set_edit_text("oi")
+
+    assert edit.keypress((20,), "enter") is None
+    assert sent == ["oi"]
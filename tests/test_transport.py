@@ -0,0 +1,33 @@
+import asyncio
+
+from clients.transport import SharedTransports
+
+
+def test_sync_clients_share_one_session_they_do_not_own():
+    shared = SharedTransports()
+    first, second = shared.sync(), shared.sync()
+
+    assert first.session is second.session is shared._session
+    assert not first._session_owner
+    shared.close()
+
+
+def test_closing_a_borrowed_transport_leaves_the_session_open():
+    shared = SharedTransports()
+
+    async def use():
+        first, second = shared.async_(), shared.async_()
+        assert first is not second and first._inner is second._inner
+        async with first:
+            pass
+        await first.close()
+        session = shared._async.session
+        assert session is not None and not session.closed
+        await second.open()
+        assert shared._async.session is session
+        await shared.aclose()
+        return session
+
+    session = asyncio.run(use())
+    assert session.closed and shared._async is None
+    shared.close()
@@ -0,0 +1,139 @@
+from services.fake_repository import FakeProjectsRepository
+from services.metadata_cache import MetadataCache
+from services.projects_service import ProjectsService
+from services.repository import FileInfo, VectorStoreInfo
+from services.upload_manifest import UploadManifest, hash_file
+
+ENDPOINT = "https://example.services.ai.azure.com/api/projects/p"
+
+
+def manifest_service(tmp_path):
+    fake = FakeProjectsRepository(stores=2, files_per_store=0)
+    manifest = UploadManifest(path=str(tmp_path / "manifest.sqlite3"))
+    cache = MetadataCache(path=str(tmp_path / "metadata.sqlite3"))
+    service = ProjectsService()
+    service.set_repository(fake)
+    service.set_cache(cache, ENDPOINT)
+    service.set_manifest(manifest)
+    service.set_vector_store(VectorStoreInfo("vs0", "Store 0"))
+    return fake, manifest, service
+
+
+def write(path, content: str) -> str:
+    path.write_text(content)
+    return str(path)
+
+
+def test_attachments_follow_the_latest_upload_of_a_content(tmp_path):
+    manifest = UploadManifest(path=str(tmp_path / "manifest.sqlite3"))
+    manifest.record_upload(ENDPOINT, "abc", FileInfo("f1", "a.txt", 3))
+    manifest.record_attach(ENDPOINT, "abc", "vs0")
+    manifest.record_attach(ENDPOINT, "abc", "vs1")
+
+    assert manifest.lookup(ENDPOINT, "abc").vector_store_ids == {"vs0", "vs1"}
+    manifest.forget_attach(ENDPOINT, "abc", "vs0")
+    assert manifest.lookup(ENDPOINT, "abc").vector_store_ids == {"vs1"}
+
+    manifest.record_upload(ENDPOINT, "abc", FileInfo("f2", "a.txt", 3))
+    entry = manifest.lookup(ENDPOINT, "abc")
+    assert entry.file.id == "f2" and entry.vector_store_ids == frozenset()
+
+    manifest.forget(ENDPOINT, "abc")
+    assert manifest.lookup(ENDPOINT, "abc") is None
+    assert manifest.lookup("https://outro", "abc") is None
+
+
+def test_identical_content_is_uploaded_once(tmp_path):
+    fake, manifest, service = manifest_service(tmp_path)
+    paths = [write(tmp_path / "a.txt", "mesmo"), write(tmp_path / "b.txt", "mesmo")]
+
+    first = service.upload_many(paths, max_workers=1)
+    again = service.upload_many(paths, max_workers=1)
+
+    assert [r.action for r in first] == ["upload", "duplicate"]
+    assert first[0].file_id == first[1].file_id and all(r.ok for r in first)
+    assert [r.action for r in again] == ["skip", "duplicate"]
+    assert fake.stats["files.upload"] == 1
+    entry = manifest.lookup(ENDPOINT, hash_file(paths[0]))
+    assert entry.file.id == first[0].file_id and entry.vector_store_ids == {"vs0"}
+
+
+def test_known_content_is_only_attached_to_another_store(tmp_path):
+    fake, manifest, service = manifest_service(tmp_path)
+    path = write(tmp_path / "a.txt", "conteúdo")
+    ok, _ = service.upload_and_attach_file(path)
+    assert ok
+
+    service.set_vector_store(VectorStoreInfo("vs1", "Store 1"))
+    (result,) = service.upload_many([path])
+
+    assert result.ok and result.action == "attach"
+    assert fake.stats["files.upload"] == 1
+    assert fake._attached["vs1"] == [result.file_id]
+    assert manifest.lookup(ENDPOINT, hash_file(path)).vector_store_ids == {
+        "vs0",
+        "vs1",
+    }
+
+
+def test_a_stale_remote_file_is_forgotten_and_uploaded_again(tmp_path):
+    fake, manifest, service = manifest_service(tmp_path)
+    path = write(tmp_path / "a.txt", "conteúdo")
+    (uploaded,) = service.upload_many([path])
+    fake.delete_file(uploaded.file_id)
+    service.set_vector_store(VectorStoreInfo("vs1", "Store 1"))
+
+    (stale,) = service.upload_many([path])
+    assert not stale.ok and stale.action == "attach"
+    assert manifest.lookup(ENDPOINT, hash_file(path)) is None
+
+    (fresh,) = service.upload_many([path])
+    assert fresh.ok and fresh.action == "upload"
+    assert fresh.file_id != uploaded.file_id
+
+
+def test_single_uploads_fall_back_to_uploading_a_stale_file(tmp_path):
+    fake, manifest, service = manifest_service(tmp_path)
+    path = write(tmp_path / "a.txt", "conteúdo")
+    service.upload_and_attach_file(path)
+    first = manifest.lookup(ENDPOINT, hash_file(path)).file.id
+    fake.delete_file(first)
+    service.set_vector_store(VectorStoreInfo("vs1", "Store 1"))
+
+    ok, message = service.upload_and_attach_file(path)
+
+    assert ok and message == "Arquivo anexado com sucesso."
+    entry = manifest.lookup(ENDPOINT, hash_file(path))
+    assert entry.file.id != first and entry.vector_store_ids == {"vs1"}
+
+
+def test_a_fresh_cache_overrides_the_manifest(tmp_path):
+    fake, manifest, service = manifest_service(tmp_path)
+    path = write(tmp_path / "a.txt", "conteúdo")
+    (uploaded,) = service.upload_many([path])
+    fake.detach_file("vs0", uploaded.file_id)
+    service.list_vector_store_files(refresh=True)
+
+    (result,) = service.upload_many([path])
+
+    assert result.ok and result.action == "attach"
+    assert fake._attached["vs0"] == [uploaded.file_id]
+
+
+def test_the_cached_file_ids_are_read_once_per_run(tmp_path):
+    fake, manifest, service = manifest_service(tmp_path)
+    paths = [write(tmp_path / f"{i}.txt", f"arquivo {i}") for i in range(5)]
+    service.upload_many(paths)
+    service.list_vector_store_files(refresh=True)
+    reads = []
+    get_files = service._cache.get_files
+
+    def counting(endpoint, vector_store_id):
+        reads.append(vector_store_id)
+        return get_files(endpoint, vector_store_id)
+
+    service._cache.get_files = counting
+    results = service.upload_many(paths)
+
+    assert [r.action for r in results] == ["skip"] * 5
+    assert reads == ["vs0"]
@@ -1,22 +1,91 @@
+import asyncio
 import os
 import logging
-from datetime import datetime
+import time
 from dataclasses import dataclass
-from typing import Optional
+from typing import Awaitable, Callable, Dict, List, Optional
 
 import urwid
 from dotenv import load_dotenv
 
-from clients.project_client import ProjectClientFactory
-from services.env_service import (
-    ensure_env_file,
-    read_env,
-    set_env_var,
+from clients.project_client import (
+    DEFAULT_POOL_IDLE_SECONDS,
+    DEFAULT_USER_INFO_TTL_SECONDS,
+    ProjectClientFactory,
 )
-from services.inference_service import InferenceService
+from services.app_logging import (
+    DEFAULT_LOG_BACKUPS,
+    DEFAULT_LOG_MAX_BYTES,
+    DEFAULT_LOG_RETENTION_DAYS,
+    DEFAULT_LOG_ROTATE_HOURS,
+    start_logging,
+)
+from services.content_index import ContentHit, ContentIndexes
+from services.endpoint_registry import EndpointRegistry
+from services.env_service import ensure_env_file, env_flag, env_number, env_store
+from services.bulk_upload import DEFAULT_UPLOAD_WORKERS, expand_source
+from services.directory_sync import DELETE, DETACH, KEEP
+from services.filename_index import filter_files
+from services.fake_inference import FakeStreamingBackend
+from services.inference_service import (
+    DEFAULT_API_VERSION,
+    DEFAULT_BATCH_CONCURRENCY,
+    AzureOpenAIBackend,
+    InferenceService,
+    StreamStats,
+    load_prompts,
+)
+from services.metadata_cache import DEFAULT_TTL_SECONDS, MetadataCache
+from services.metrics import DEFAULT_LOG_INTERVAL_SECONDS, METRICS
 from services.projects_service import ProjectsService
+from services.upload_manifest import UploadManifest
+from services.response_cache import (
+    DEFAULT_RESPONSE_CACHE_ENTRIES,
+    DEFAULT_RESPONSE_CACHE_TTL,
+    RESPONSE_CACHE_PATH,
+    ResponseCache,
+)
+from services.repository import DEFAULT_FETCH_WORKERS, VectorStoreInfo
+from services.resilience import (
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_RATE_LIMIT,
+    Resilience,
+    RetryPolicy,
+    TokenBucket,
+)
+
+from ui.jobs import DEFAULT_MAX_NETWORK_JOBS, DONE, FAILED, Job, JobManager
+from ui.redraw import DEFAULT_MAX_FPS, RedrawScheduler
+from ui.screens import (
+    EnterEdit,
+    VirtualList,
+    menu_screen,
+    message_screen,
+    table_row,
+    table_rows,
+)
 
-from ui.screens import EnterEdit, menu_screen, message_screen
+DIAGNOSTICS_WEIGHTS = (8, 2, 2, 2, 2, 2, 2, 2)
+
+SYNC_REMOVAL_LABELS = {
+    DETACH: "Retirar do Vector Store",
+    DELETE: "Retirar e excluir o arquivo remoto",
+    KEEP: "Manter no Vector Store",
+}
+# How often idle pooled clients are looked for.
+POOL_EVICT_CHECK_SECONDS = 60
+
+# Rows of a dry-run preview shown per category.
+SYNC_PREVIEW_ROWS = 200
+# Matches shown for a non-empty filename search.
+SEARCH_RESULT_LIMIT = 1000
+
+UPLOAD_ACTIONS = {
+    "upload": "enviado",
+    "attach": "reanexado",
+    "skip": "ignorado",
+    "duplicate": "duplicado",
+}
 
 
 @dataclass
@@ -27,66 +96,354 @@ class AppState:
 
 class App:
     def __init__(self) -> None:
-        if not os.path.exists("logs"):
-            os.makedirs("logs")
-        log_filename = (
-            f"logs/rag_management_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-        )
-        for h in logging.root.handlers[:]:
-            logging.root.removeHandler(h)
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s - %(levelname)s - %(message)s",
-            handlers=[logging.FileHandler(log_filename, encoding="utf-8")],
+        # .env is read first so the LOG_* settings apply.
+        load_dotenv()
+        self.log_listener = start_logging(
+            level=self.log_level(),
+            json_lines=env_flag("LOG_JSON"),
+            max_bytes=self.log_max_bytes(),
+            backup_count=self.log_backups(),
+            rotate_hours=self.log_rotate_hours(),
+            retention_days=self.log_retention_days(),
         )
         logging.getLogger("azure").setLevel(logging.WARNING)
         logging.getLogger("azure.identity").setLevel(logging.WARNING)
         logging.getLogger("urllib3").setLevel(logging.WARNING)
         logging.getLogger("httpx").setLevel(logging.WARNING)
 
-        load_dotenv()
         ensure_env_file()
+        self.env = env_store()
 
         self.palette = [("reversed", "standout", "")]
         self.main = urwid.WidgetPlaceholder(urwid.SolidFill())
         self.screen = urwid.raw_display.Screen()
+        self.aio_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.aio_loop)
         self.loop = urwid.MainLoop(
             self.main,
             self.palette,
             screen=self.screen,
-            event_loop=urwid.AsyncioEventLoop(),
+            event_loop=urwid.AsyncioEventLoop(loop=self.aio_loop),
         )
+        self.redraws = RedrawScheduler(
+            self.loop,
+            self.aio_loop,
+            lambda: self.screen.started,
+            max_fps=self.max_fps(),
+        )
+        self.jobs = JobManager(self.aio_loop, max_network_jobs=self.network_jobs())
+        self.jobs.subscribe(self.on_job_change)
+        self._job_watchers: Dict[int, List[Callable[[Job], None]]] = {}
 
-        self.client_factory = ProjectClientFactory()
+        self.client_factory = ProjectClientFactory(
+            user_info_ttl=self.user_info_ttl(),
+            persistent_token_cache=env_flag("TOKEN_CACHE_PERSISTENT"),
+            allow_unencrypted_token_cache=env_flag("TOKEN_CACHE_ALLOW_UNENCRYPTED"),
+        )
         self.projects_service = (
             ProjectsService()
         )  # now uses repository adapter internally
         self.inference_service = InferenceService()
+        self.response_cache = ResponseCache(
+            max_entries=self.response_cache_entries(),
+            ttl_seconds=self.response_cache_ttl(),
+            path=(
+                RESPONSE_CACHE_PATH if env_flag("RESPONSE_CACHE_PERSISTENT") else None
+            ),
+        )
+        self.inference_service.set_cache(self.response_cache)
+        self.metadata_cache = MetadataCache(ttl_seconds=self.cache_ttl())
+        self.upload_manifest = UploadManifest()
+        self.projects_service.set_manifest(self.upload_manifest)
+        self.content_indexes = ContentIndexes()
+        if env_flag("CONTENT_INDEX", True):
+            self.projects_service.set_content_indexes(self.content_indexes)
+        self.projects_service.set_resilience(
+            Resilience(
+                policy=RetryPolicy(max_attempts=self.max_retries()),
+                bucket=TokenBucket(self.rate_limit()),
+            )
+        )
+        self.endpoints = EndpointRegistry()
         self.state = AppState()
+        self._menu_widget: Optional[urwid.Widget] = None
+        self._connect_job: Optional[Job] = None
+        self._prefetch_job: Optional[Job] = None
+        self._stores_job: Optional[Job] = None
+        self._saved_warmed = False
 
+        # Only cheap configuration happens here; the SDK clients are built
+        # by a background job once the first frame is on screen.
         endpoint = os.environ.get("PROJECT_ENDPOINT")
-        try:
-            if not endpoint:
-                self.state.error_msg = "A variável PROJECT_ENDPOINT não está definida ou não foi alterada no .env."
-            else:
-                self.client_factory.configure(endpoint)
-                client = self.client_factory.get()
-                self.projects_service.set_client(client)
-        except Exception as e:  # noqa: BLE001
-            self.state.error_msg = f"Erro de autenticação: {e}"
+        if not endpoint:
+            self.state.error_msg = "A variável PROJECT_ENDPOINT não está definida ou não foi alterada no .env."
+        else:
+            self.client_factory.configure(endpoint)
+            self.projects_service.set_cache(self.metadata_cache, endpoint)
+            self.endpoints.touch(endpoint)
+            self.restore_vector_store(endpoint)
 
     def run(self) -> None:
         try:
             self.show_main_menu()
+            if not self.state.error_msg:
+                self.connect()
+                if self.projects_service.vector_store_id:
+                    self.prefetch_files()
+            self.schedule_metrics_log()
+            self.schedule_pool_eviction()
             self.loop.run()
         finally:
             self.screen.clear()
+            self.jobs.shutdown()
+            self.aio_loop.run_until_complete(self.inference_service.aclose())
+            self.aio_loop.run_until_complete(self.client_factory.aclose())
+            self.aio_loop.close()
+            self.client_factory.close()
+            self.content_indexes.close()
+            logging.info(f"Autenticação: {self.client_factory.auth_metrics()}")
+            if self.metrics_log_interval() > 0:
+                logging.info(f"Métricas: {METRICS.to_json()}")
+            self.log_listener.stop()
 
-    def redraw(self) -> None:
-        try:
-            urwid.MainLoop(self.main, self.palette).draw_screen()
-        except Exception:  # noqa: BLE001
-            pass
+    def schedule_metrics_log(self) -> None:
+        # One JSON line per interval, for grepping or feeding into a
+        # dashboard; disabled unless METRICS_LOG_INTERVAL is set.
+        interval = self.metrics_log_interval()
+        if interval <= 0:
+            return
+
+        def dump(loop, user_data) -> None:
+            logging.info(f"Métricas: {METRICS.to_json()}")
+            self.loop.set_alarm_in(interval, dump)
+
+        self.loop.set_alarm_in(interval, dump)
+
+    def schedule_pool_eviction(self) -> None:
+        # Clients of projects not used for a while are closed; never while
+        # jobs run, since a job may still hold the previous project's client.
+        idle = self.pool_idle_seconds()
+        if idle <= 0:
+            return
+
+        def check(loop, user_data) -> None:
+            if not self.jobs.running():
+                self.aio_loop.create_task(self.client_factory.aevict_idle(idle))
+            self.loop.set_alarm_in(POOL_EVICT_CHECK_SECONDS, check)
+
+        self.loop.set_alarm_in(POOL_EVICT_CHECK_SECONDS, check)
+
+    def connect_clients(self, endpoint: str) -> None:
+        workers = self.fetch_workers()
+        client = self.client_factory.get(endpoint)
+        async_client = self.client_factory.get_async(endpoint)
+        if endpoint != self.client_factory.endpoint():
+            # Switched away meanwhile; that switch connects its own clients.
+            return
+        self.projects_service.set_client(client, workers)
+        self.projects_service.set_async_client(async_client, workers)
+
+    def restore_vector_store(self, endpoint: str) -> None:
+        vs = self.endpoints.vector_store(endpoint)
+        self.projects_service.set_vector_store(vs)
+        self.state.vector_store_name = (vs.name or vs.id) if vs else None
+
+    def switch_endpoint(self, endpoint: str) -> Job:
+        # Nothing here waits on the network: a project used before gets its
+        # pooled clients and cached token back, and the connect job only
+        # builds what is missing.
+        if self._prefetch_job is not None and self._prefetch_job.is_active():
+            self._prefetch_job.cancel()
+        self.client_factory.configure(endpoint)
+        self.projects_service.set_cache(self.metadata_cache, endpoint)
+        if self.inference_service.is_configured():
+            self.inference_service.set_endpoint(endpoint)
+        self.env.set("PROJECT_ENDPOINT", endpoint)
+        self.endpoints.touch(endpoint)
+        self.state.error_msg = None
+        self.restore_vector_store(endpoint)
+        job = self.connect()
+        if self.projects_service.vector_store_id:
+            self.prefetch_files()
+        return job
+
+    def warm_saved_endpoints(self) -> None:
+        # Once per session, after the current project is connected, so
+        # switching to another saved project is instant too.
+        if self._saved_warmed or not env_flag("CLIENT_POOL_WARM", True):
+            return
+        self._saved_warmed = True
+        others = [
+            e for e in self.endpoints.endpoints() if e != self.client_factory.endpoint()
+        ]
+        if not others:
+            return
+
+        def work(job: Job) -> None:
+            job.update(total=len(others))
+            for i, endpoint in enumerate(others, 1):
+                if job.cancelled():
+                    return
+                try:
+                    self.client_factory.warm_up(endpoint)
+                except Exception as e:  # noqa: BLE001
+                    logging.warning(f"Falha ao preparar {endpoint}: {e}")
+                job.update(done=i)
+
+        self.jobs.start_thread(
+            "Preparar projetos salvos", work, after=self._connect_job
+        )
+
+    def connect(self) -> Job:
+        # Imports the SDK, builds the clients and authenticates off the UI
+        # thread. Jobs that need the service are started with after= this
+        # job, so they wait for it instead of failing.
+        endpoint = self.client_factory.endpoint()
+
+        def work(job: Job) -> None:
+            self.connect_clients(endpoint)
+            job.update(detail="Autenticando...")
+            try:
+                self.client_factory.warm_up(endpoint)
+            except Exception as e:  # noqa: BLE001
+                logging.warning(f"Falha ao autenticar em segundo plano: {e}")
+
+        def on_job(job: Job) -> None:
+            if job.is_active():
+                return
+            if job.status == FAILED:
+                self.state.error_msg = f"Erro de autenticação: {job.error}"
+                if self.main.original_widget is self._menu_widget:
+                    self.show_main_menu()
+            elif job.status == DONE:
+                self.refresh_user_info()
+                self.warm_saved_endpoints()
+
+        self._connect_job = self.jobs.start_thread(
+            "Conectar ao projeto", work, network=False
+        )
+        self.watch_job(self._connect_job, on_job)
+        return self._connect_job
+
+    def prefetch_files(self) -> None:
+        # Warms the selected store's file metadata and index in the
+        # background; picking another store cancels the previous warm-up.
+        if self._prefetch_job is not None and self._prefetch_job.is_active():
+            self._prefetch_job.cancel()
+        name = self.state.vector_store_name or self.projects_service.vector_store_id
+
+        async def work(job: Job) -> None:
+            await self.projects_service.aprefetch_file_index(
+                lambda count: job.update(done=count)
+            )
+
+        self._prefetch_job = self.jobs.start(
+            f"Pré-carregar arquivos: {name}", work, after=self._connect_job
+        )
+
+    def refresh_user_info(self) -> None:
+        # Resolved once in the background; the menu renders from the cache.
+        if self.state.error_msg or self.client_factory.user_info_fresh():
+            return
+
+        def work(job: Job) -> None:
+            self.client_factory.get_user_info(refresh=True)
+
+        def on_job(job: Job) -> None:
+            if not job.is_active() and self.main.original_widget is self._menu_widget:
+                self.show_main_menu()
+
+        self.watch_job(self.jobs.start_thread("Perfil do usuário", work), on_job)
+
+    def run_task(self, name: str, task: Callable[[], Awaitable[None]]) -> Job:
+        # Screen work runs as a job on the urwid asyncio loop so input and
+        # redraws keep flowing; leaving the screen cancels it. The coroutine
+        # is only created once the job runs, so a job cancelled while still
+        # queued leaves nothing un-awaited behind.
+        async def work(job: Job) -> None:
+            await task()
+
+        return self.jobs.start(name, work, screen=True, after=self._connect_job)
+
+    def watch_job(self, job: Job, watcher: Callable[[Job], None]) -> None:
+        # Watchers stack: a screen following a job (e.g. a project switch)
+        # must not replace the one that applies its result (connect()).
+        # They run in the order they were added.
+        if job.is_active():
+            self._job_watchers.setdefault(job.id, []).append(watcher)
+        watcher(job)
+
+    def on_job_change(self, job: Job) -> None:
+        watchers = self._job_watchers.get(job.id, [])
+        if not job.is_active():
+            self._job_watchers.pop(job.id, None)
+        for watcher in list(watchers):
+            watcher(job)
+        self.refresh_screen()
+
+    def refresh_screen(self) -> None:
+        # The asyncio loop only repaints after input or alarms; work that
+        # changes widgets from a task or thread asks for a repaint, and
+        # requests within one frame share a single draw.
+        self.redraws.request()
+
+    def log_level(self) -> int:
+        level = logging.getLevelName(os.environ.get("LOG_LEVEL", "INFO").upper())
+        return level if isinstance(level, int) else logging.INFO
+
+    def log_max_bytes(self) -> int:
+        mb = env_number("LOG_MAX_MB", DEFAULT_LOG_MAX_BYTES / 1024 / 1024, float)
+        return int(mb * 1024 * 1024)
+
+    def log_backups(self) -> int:
+        return env_number("LOG_BACKUPS", DEFAULT_LOG_BACKUPS, int)
+
+    def log_rotate_hours(self) -> float:
+        return env_number("LOG_ROTATE_HOURS", DEFAULT_LOG_ROTATE_HOURS, float)
+
+    def log_retention_days(self) -> float:
+        return env_number("LOG_RETENTION_DAYS", DEFAULT_LOG_RETENTION_DAYS, float)
+
+    def pool_idle_seconds(self) -> float:
+        return env_number("CLIENT_POOL_IDLE_SECONDS", DEFAULT_POOL_IDLE_SECONDS, float)
+
+    def max_fps(self) -> float:
+        return env_number("UI_MAX_FPS", DEFAULT_MAX_FPS, float)
+
+    def network_jobs(self) -> int:
+        return env_number("MAX_NETWORK_JOBS", DEFAULT_MAX_NETWORK_JOBS, int)
+
+    def fetch_workers(self) -> int:
+        return env_number("FILES_FETCH_WORKERS", DEFAULT_FETCH_WORKERS, int)
+
+    def upload_workers(self) -> int:
+        return env_number("BULK_UPLOAD_WORKERS", DEFAULT_UPLOAD_WORKERS, int)
+
+    def cache_ttl(self) -> float:
+        return env_number("METADATA_CACHE_TTL", DEFAULT_TTL_SECONDS, float)
+
+    def rate_limit(self) -> float:
+        return env_number("API_RATE_LIMIT", DEFAULT_RATE_LIMIT, float)
+
+    def max_retries(self) -> int:
+        return env_number("API_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS, int)
+
+    def user_info_ttl(self) -> float:
+        return env_number("USER_INFO_TTL", DEFAULT_USER_INFO_TTL_SECONDS, float)
+
+    def inference_concurrency(self) -> int:
+        return env_number("INFERENCE_CONCURRENCY", DEFAULT_BATCH_CONCURRENCY, int)
+
+    def response_cache_entries(self) -> int:
+        return env_number(
+            "RESPONSE_CACHE_MAX_ENTRIES", DEFAULT_RESPONSE_CACHE_ENTRIES, int
+        )
+
+    def response_cache_ttl(self) -> float:
+        return env_number("RESPONSE_CACHE_TTL", DEFAULT_RESPONSE_CACHE_TTL, float)
+
+    def metrics_log_interval(self) -> float:
+        return env_number("METRICS_LOG_INTERVAL", DEFAULT_LOG_INTERVAL_SECONDS, float)
 
     def show_main_menu(self, button: Optional[urwid.Button] = None) -> None:
         if self.state.error_msg:
@@ -95,7 +452,7 @@ class App:
             )
             return
 
-        user_name, organization = self.client_factory.get_user_info()
+        user_name, organization = self.client_factory.cached_user_info()
         welcome_text = "--- Menu Principal ---"
         if user_name and organization:
             welcome_text = f"Seja bem-vindo {user_name} da {organization}!"
@@ -113,53 +470,114 @@ class App:
             "Vector Stores": self.show_vector_stores,
             "Arquivos: Listar/Pesquisar": self.show_files_search,
             "Arquivos: Incluir": self.show_file_add,
+            "Arquivos: Incluir em lote": self.show_bulk_add,
+            "Arquivos: Sincronizar diretório": self.show_sync,
             "Agentes": self.show_agents_stub,
-            "Chat": self.show_chat_stub,
+            "Chat": self.show_chat,
+            "Jobs": self.show_jobs,
             "Utilidades": self.show_utilities,
             "Sair": self.exit,
         }
         footer = None
-        self.main.original_widget = menu_screen(welcome_text, items, footer)
+        self._menu_widget = menu_screen(welcome_text, items, footer)
+        self.main.original_widget = self._menu_widget
 
     def exit(self, button: Optional[urwid.Button] = None) -> None:
         raise urwid.ExitMainLoop()
 
     def back(self, button: Optional[urwid.Button] = None) -> None:
+        self.jobs.cancel_screen_jobs()
         self.show_main_menu()
 
     def show_connect(self, button: Optional[urwid.Button] = None) -> None:
-        env = read_env()
-        endpoint = env.get("PROJECT_ENDPOINT") or ""
-        status = "Configurado" if self.client_factory.endpoint() else "Não configurado"
         result_text = urwid.Text("")
+        saved = urwid.Pile([])
 
-        def on_save(widget: urwid.Edit) -> None:
-            value = edit.edit_text.strip()
-            set_env_var("PROJECT_ENDPOINT", value)
-            result_text.set_text("Salvo no .env. Reconfigurando...")
+        def label(endpoint: str) -> str:
+            current = endpoint == self.client_factory.endpoint()
+            vs = self.endpoints.vector_store(endpoint)
+            store = (vs.name or vs.id) if vs else "nenhum Vector Store"
+            ready = "pronto" if self.client_factory.is_warm(endpoint) else "frio"
+            return f"{'*' if current else ' '} {endpoint} ({store}, {ready})"
 
-            def do_reconfig(loop, user_data) -> None:
-                try:
-                    self.client_factory.configure(value)
-                    client = self.client_factory.get()
-                    self.projects_service.set_client(client)
-                    result_text.set_text("Reconfigurado com sucesso.")
-                    self.state.error_msg = None
-                except Exception as e:  # noqa: BLE001
-                    self.state.error_msg = f"Erro de autenticação: {e}"
-                    result_text.set_text(self.state.error_msg)
+        def render_saved() -> None:
+            rows = []
+            for endpoint in self.endpoints.endpoints():
+                rows.append(
+                    urwid.Columns(
+                        [
+                            urwid.AttrMap(
+                                urwid.Button(
+                                    label(endpoint), on_switch, user_data=endpoint
+                                ),
+                                None,
+                                focus_map="reversed",
+                            ),
+                            (
+                                "fixed",
+                                11,
+                                urwid.AttrMap(
+                                    urwid.Button(
+                                        "Remover", on_remove, user_data=endpoint
+                                    ),
+                                    None,
+                                    focus_map="reversed",
+                                ),
+                            ),
+                        ],
+                        dividechars=1,
+                    )
+                )
+            if not rows:
+                rows.append(urwid.Text("Nenhum endpoint salvo."))
+            saved.contents[:] = [(r, saved.options()) for r in rows]
+
+        def on_switch(btn, endpoint: str) -> None:
+            job = self.switch_endpoint(endpoint)
+            render_saved()
+            result_text.set_text(f"Projeto atual: {endpoint}")
 
-            self.loop.set_alarm_in(0, do_reconfig)
+            def on_job(job: Job) -> None:
+                if job.is_active():
+                    return
+                if job.status == DONE:
+                    result_text.set_text(f"Conectado a {endpoint}.")
+                else:
+                    result_text.set_text(
+                        self.state.error_msg or "Conexão interrompida."
+                    )
+                if self.main.original_widget is screen:
+                    render_saved()
 
-        edit = EnterEdit("PROJECT_ENDPOINT: ", edit_text=endpoint, on_enter=on_save)
-        save_btn = urwid.Button("Salvar e Reconfigurar")
+            self.watch_job(job, on_job)
+
+        def on_remove(btn, endpoint: str) -> None:
+            if endpoint == self.client_factory.endpoint():
+                result_text.set_text("O projeto atual não pode ser removido.")
+                return
+            self.endpoints.remove(endpoint)
+            render_saved()
+            result_text.set_text(f"Removido: {endpoint}")
+
+        def on_save(widget: urwid.Edit) -> None:
+            value = edit.edit_text.strip()
+            if not value:
+                result_text.set_text("Informe o endpoint do projeto.")
+                return
+            edit.set_edit_text("")
+            on_switch(None, value)
+
+        edit = EnterEdit("Novo endpoint: ", on_enter=on_save)
+        save_btn = urwid.Button("Salvar e Conectar")
         urwid.connect_signal(save_btn, "click", lambda btn: on_save(edit))
+        render_saved()
 
         pile = urwid.Pile(
             [
                 urwid.Text("Conectar ao Projeto", align="center"),
                 urwid.Divider(),
-                urwid.Text(f"Status: {status}", align="center"),
+                urwid.Text("Projetos salvos (Enter troca, * = atual):"),
+                saved,
                 urwid.Divider(),
                 edit,
                 urwid.AttrMap(save_btn, None, focus_map="reversed"),
@@ -170,20 +588,136 @@ class App:
                 ),
             ]
         )
-        self.main.original_widget = urwid.Filler(pile, valign="top", top=2, bottom=2)
+        screen = urwid.Filler(pile, valign="top", top=2, bottom=2)
+        self.main.original_widget = screen
 
     def show_utilities(self, button: Optional[urwid.Button] = None) -> None:
-        env = read_env()
-        lines = [f"{k}={v}" for k, v in env.items()]
+        lines = [f"{k}={v}" for k, v in self.env.values().items()]
         text = urwid.Text("\n".join(lines) or "(vazio)")
+        status = urwid.Text("")
+
+        def on_clear_cache(btn) -> None:
+            self.metadata_cache.clear()
+            status.set_text("Cache de metadados limpo.")
+
+        def on_clear_responses(btn) -> None:
+            self.response_cache.clear()
+            status.set_text("Cache de respostas limpo.")
+
+        def on_clear_content(btn) -> None:
+            index = self.projects_service.content_index()
+            if index is None:
+                status.set_text("Índice de conteúdo desativado ou sem projeto.")
+                return
+            index.clear()
+            status.set_text("Índice de conteúdo deste projeto limpo.")
+
+        clear_btn = urwid.Button("Limpar cache de metadados")
+        urwid.connect_signal(clear_btn, "click", on_clear_cache)
+        clear_responses_btn = urwid.Button(
+            "Limpar cache de respostas", on_clear_responses
+        )
+        clear_content_btn = urwid.Button("Limpar índice de conteúdo", on_clear_content)
+        diagnostics_btn = urwid.Button("Diagnóstico", self.show_diagnostics)
         back = urwid.AttrMap(
             urwid.Button("Voltar", self.back), None, focus_map="reversed"
         )
         pile = urwid.Pile(
-            [urwid.Text(".env atual"), urwid.Divider(), text, urwid.Divider(), back]
+            [
+                urwid.Text(".env atual"),
+                urwid.Divider(),
+                text,
+                urwid.Divider(),
+                urwid.AttrMap(clear_btn, None, focus_map="reversed"),
+                urwid.AttrMap(clear_responses_btn, None, focus_map="reversed"),
+                urwid.AttrMap(clear_content_btn, None, focus_map="reversed"),
+                urwid.AttrMap(diagnostics_btn, None, focus_map="reversed"),
+                status,
+                back,
+            ]
         )
         self.main.original_widget = urwid.Filler(pile, valign="top", top=1)
 
+    def show_diagnostics(self, button: Optional[urwid.Button] = None) -> None:
+        walker = urwid.SimpleFocusListWalker([])
+        summary = urwid.Text("")
+
+        def ms(value: Optional[float]) -> str:
+            return "-" if value is None else f"{value:.1f}"
+
+        def refresh() -> None:
+            snapshot = METRICS.snapshot()
+            rows = []
+            for name, op in snapshot["operations"].items():
+                cells = [
+                    name,
+                    str(op["count"]),
+                    str(op["errors"]),
+                    str(op["items"]),
+                    f"{op['bytes'] / (1024 * 1024):.2f}" if op["bytes"] else "-",
+                    ms(op["p50_ms"]),
+                    ms(op["p95_ms"]),
+                    ms(op["p99_ms"]),
+                ]
+                rows.append(table_row(cells, DIAGNOSTICS_WEIGHTS))
+            if snapshot["counters"]:
+                rows.append(urwid.Divider())
+                rows.extend(
+                    urwid.Text(f"{name}: {value}")
+                    for name, value in snapshot["counters"].items()
+                )
+            walker[:] = rows or [urwid.Text("Nenhuma operação registrada.")]
+            summary.set_text(
+                f"Coletando há {snapshot['uptime_seconds']:.0f}s. "
+                "Latências em ms (últimas amostras de cada operação)."
+            )
+
+        def tick(loop, user_data) -> None:
+            if self.main.original_widget is not screen:
+                return
+            refresh()
+            self.loop.set_alarm_in(1, tick)
+
+        def on_reset(btn) -> None:
+            METRICS.reset()
+            refresh()
+
+        def on_dump(btn) -> None:
+            logging.info(f"Métricas: {METRICS.to_json()}")
+            summary.set_text("Métricas gravadas no log.")
+
+        refresh()
+        header = table_row(
+            ["Operação", "Chamadas", "Erros", "Itens", "MB", "p50", "p95", "p99"],
+            DIAGNOSTICS_WEIGHTS,
+        )
+        buttons = urwid.Columns(
+            [
+                urwid.AttrMap(
+                    urwid.Button("Zerar", on_reset), None, focus_map="reversed"
+                ),
+                urwid.AttrMap(
+                    urwid.Button("Gravar no log", on_dump), None, focus_map="reversed"
+                ),
+                urwid.AttrMap(
+                    urwid.Button("Voltar", self.back), None, focus_map="reversed"
+                ),
+            ],
+            dividechars=2,
+        )
+        screen = urwid.Pile(
+            [
+                ("pack", urwid.Text("Diagnóstico", align="center")),
+                ("pack", summary),
+                ("pack", urwid.Divider()),
+                ("pack", urwid.AttrMap(header, "reversed")),
+                ("weight", 1, urwid.ListBox(walker)),
+                ("pack", buttons),
+            ]
+        )
+        self.main.original_widget = screen
+        self.loop.set_alarm_in(1, tick)
+
     def show_agents_stub(self, button: Optional[urwid.Button] = None) -> None:
         pile = urwid.Pile(
             [
@@ -198,87 +732,267 @@ class App:
         )
         self.main.original_widget = urwid.Filler(pile, valign="middle")
 
-    def show_chat_stub(self, button: Optional[urwid.Button] = None) -> None:
+    def configure_inference(self) -> None:
+        # A deployment name selects the project's Azure OpenAI endpoint;
+        # without one (or with INFERENCE_FAKE) the chat runs on the local
+        # streaming fake.
+        model = os.environ.get("INFERENCE_MODEL", "").strip()
+        if model and not self.state.error_msg and not env_flag("INFERENCE_FAKE"):
+            backend = AzureOpenAIBackend(
+                self.client_factory,
+                api_version=os.environ.get("INFERENCE_API_VERSION")
+                or DEFAULT_API_VERSION,
+            )
+            self.inference_service.configure(
+                model=model, backend=backend, endpoint=self.client_factory.endpoint()
+            )
+        else:
+            self.inference_service.configure(
+                model=model or "fake", backend=FakeStreamingBackend()
+            )
+
+    def show_chat(self, button: Optional[urwid.Button] = None) -> None:
+        if not self.inference_service.is_configured():
+            self.configure_inference()
+        walker = urwid.SimpleFocusListWalker([])
+        transcript = urwid.ListBox(walker)
         status = urwid.Text("")
+        reply_job: Optional[Job] = None
+
+        def follow() -> None:
+            walker.set_focus(len(walker) - 1)
+            transcript.set_focus_valign("bottom")
 
         def on_send(widget: urwid.Edit) -> None:
+            nonlocal reply_job
             msg = widget.edit_text
-            status.set_text("Enviando...")
+            if not msg.strip():
+                return
+            if reply_job is not None and reply_job.is_active():
+                status.set_text("Aguarde a resposta atual ou interrompa.")
+                return
+            widget.set_edit_text("")
+            walker.append(urwid.Text(f"Você: {msg}"))
+            reply = urwid.Text("Assistente: ")
+            walker.append(reply)
+            walker.append(urwid.Divider())
+            follow()
+            status.set_text("Aguardando o primeiro token...")
 
-            def do_send(loop, user_data) -> None:
-                ok, resp = self.inference_service.send_message(msg)
-                status.set_text(resp if ok else f"Erro: {resp}")
+            async def stream() -> None:
+                # Deltas can arrive far faster than the terminal repaints;
+                # the text is rebuilt at most once per frame.
+                stats = StreamStats()
+                parts = []
+                drawn_at = 0.0
+                suffix = ""
+                try:
+                    async for delta in self.inference_service.astream_message(msg):
+                        stats.add(delta)
+                        parts.append(delta)
+                        now = time.monotonic()
+                        if now - drawn_at >= self.redraws.interval:
+                            reply.set_text("Assistente: " + "".join(parts))
+                            status.set_text(f"Recebendo... {stats.deltas} token(s).")
+                            follow()
+                            self.refresh_screen()
+                            drawn_at = now
+                    stats.finish()
+                    status.set_text(stats.summary())
+                except asyncio.CancelledError:
+                    suffix = " [interrompido]"
+                    status.set_text("Resposta interrompida.")
+                    raise
+                except Exception as e:  # noqa: BLE001
+                    logging.warning(f"Falha na inferência: {e}")
+                    suffix = f"\n[Erro: {e}]"
+                    status.set_text("Erro na resposta.")
+                finally:
+                    reply.set_text(("Assistente: " + "".join(parts)).rstrip() + suffix)
+                    follow()
 
-            self.loop.set_alarm_in(0, do_send)
+            reply_job = self.run_task("Chat: resposta", stream)
 
-        edit = EnterEdit("Mensagem: ", on_enter=on_send)
-        send_btn = urwid.Button("Enviar")
-        urwid.connect_signal(send_btn, "click", lambda btn: on_send(edit))
-        cfg_btn = urwid.Button("Configurar Stub")
+        def on_batch(btn) -> None:
+            # The message field holds the path of a prompts file; each
+            # prompt is answered on its own, outside the conversation.
+            nonlocal reply_job
+            path = edit.edit_text.strip()
+            if reply_job is not None and reply_job.is_active():
+                status.set_text("Aguarde a resposta atual ou interrompa.")
+                return
+            if not os.path.isfile(path):
+                status.set_text(
+                    "Informe no campo de mensagem o caminho de um arquivo de "
+                    "prompts (um por linha, ou .jsonl)."
+                )
+                return
+            try:
+                prompts = load_prompts(path)
+            except Exception as e:  # noqa: BLE001
+                status.set_text(f"Erro: {e}")
+                return
+            edit.set_edit_text("")
+            status.set_text(f"Executando {len(prompts)} prompt(s)...")
 
-        def on_cfg(btn) -> None:
-            self.inference_service.configure(model="dummy")
-            status.set_text("Stub configurado.")
+            async def work(job: Job) -> None:
+                job.update(total=len(prompts))
+                done = 0
+                started = time.perf_counter()
 
-        urwid.connect_signal(cfg_btn, "click", on_cfg)
+                def on_result(result) -> None:
+                    nonlocal done
+                    done += 1
+                    job.update(done=done)
+                    status.set_text(f"Lote: {done}/{len(prompts)} prompt(s).")
 
-        pile = urwid.Pile(
+                results = await self.inference_service.arun_batch(
+                    prompts, self.inference_concurrency(), on_result=on_result
+                )
+                for r in results:
+                    walker.append(urwid.Text(f"[{r.index + 1}] Você: {r.prompt}"))
+                    answer = r.response if r.ok else f"[Erro: {r.error}]"
+                    origin = " (cache)" if r.cached else ""
+                    walker.append(urwid.Text(f"Assistente{origin}: {answer}"))
+                    walker.append(urwid.Divider())
+                if walker:
+                    follow()
+                failed = sum(1 for r in results if not r.ok)
+                cached = sum(1 for r in results if r.cached)
+                stats = self.response_cache.stats()
+                status.set_text(
+                    f"Lote: {len(results)} prompt(s), {failed} falha(s), "
+                    f"{cached} reaproveitado(s) em {time.perf_counter() - started:.1f}s. "
+                    f"Cache: {stats['hit_rate']:.0%} de acerto, "
+                    f"{stats['entries']} resposta(s)."
+                )
+
+            reply_job = self.jobs.start(
+                "Chat: lote", work, screen=True, after=self._connect_job
+            )
+
+        def on_stop(btn) -> None:
+            if reply_job is not None and reply_job.is_active():
+                reply_job.cancel()
+
+        def on_clear(btn) -> None:
+            on_stop(btn)
+            self.inference_service.reset()
+            walker[:] = []
+            status.set_text("Conversa reiniciada.")
+
+        edit = EnterEdit("Mensagem: ", on_enter=on_send)
+        buttons = urwid.Columns(
             [
-                urwid.Text("Chat (stub)", align="center"),
-                urwid.Divider(),
-                edit,
-                urwid.AttrMap(send_btn, None, focus_map="reversed"),
-                urwid.AttrMap(cfg_btn, None, focus_map="reversed"),
-                urwid.Divider(),
-                status,
+                urwid.AttrMap(
+                    urwid.Button("Enviar", lambda btn: on_send(edit)),
+                    None,
+                    focus_map="reversed",
+                ),
+                urwid.AttrMap(
+                    urwid.Button("Lote", on_batch), None, focus_map="reversed"
+                ),
+                urwid.AttrMap(
+                    urwid.Button("Interromper", on_stop), None, focus_map="reversed"
+                ),
+                urwid.AttrMap(
+                    urwid.Button("Limpar", on_clear), None, focus_map="reversed"
+                ),
                 urwid.AttrMap(
                     urwid.Button("Voltar", self.back), None, focus_map="reversed"
                 ),
+            ],
+            dividechars=2,
+        )
+        pile = urwid.Pile(
+            [
+                (
+                    "pack",
+                    urwid.Text(
+                        f"Chat ({self.inference_service.model})", align="center"
+                    ),
+                ),
+                ("pack", urwid.Divider()),
+                ("weight", 1, transcript),
+                ("pack", urwid.Divider()),
+                ("pack", status),
+                ("pack", edit),
+                ("pack", buttons),
             ]
         )
-        self.main.original_widget = urwid.Filler(pile, valign="top", top=2, bottom=2)
+        pile.focus_position = 5
+        self.main.original_widget = pile
 
-    def show_vector_stores(self, button: Optional[urwid.Button] = None) -> None:
-        body = [
-            urwid.Text("Selecione um Vector Store:", align="center"),
-            urwid.Divider(),
-        ]
-
-        def fill_body(loop, user_data) -> None:
-            try:
-                stores = list(self.projects_service.list_vector_stores())
-                if not stores:
-                    body.append(urwid.Text("Nenhum Vector Store encontrado."))
-                else:
-                    for vs in stores:
-                        label = f"{vs.name} (ID: {vs.id})"
-                        btn = urwid.Button(label)
-                        urwid.connect_signal(
-                            btn,
-                            "click",
-                            lambda _b, store=vs: on_select_vector_store(store),
-                        )
-                        body.append(urwid.AttrMap(btn, None, focus_map="reversed"))
-            except Exception as e:  # noqa: BLE001
-                body.append(urwid.Text(str(e)))
-            body.append(urwid.Divider())
-            body.append(
-                urwid.AttrMap(
-                    urwid.Button("Voltar", self.back), None, focus_map="reversed"
-                )
-            )
-            pile = urwid.Pile(body)
-            self.main.original_widget = urwid.Filler(pile, valign="middle")
+    def show_vector_stores(
+        self, button: Optional[urwid.Button] = None, refresh: bool = False
+    ) -> None:
+        status = urwid.Text("Carregando...", align="center")
 
         def on_select_vector_store(store) -> None:
             self.projects_service.set_vector_store(store)
             self.state.vector_store_name = getattr(store, "name", None) or store.name
+            self.endpoints.set_vector_store(
+                self.client_factory.endpoint(), VectorStoreInfo(store.id, store.name)
+            )
+            self.prefetch_files()
             self.main.original_widget = message_screen(
                 f"Vector Store selecionado: {self.state.vector_store_name}", self.back
             )
 
-        self.loop.set_alarm_in(0, fill_body)
-        self.main.original_widget = urwid.Filler(urwid.Pile(body), valign="middle")
+        stores_list = VirtualList(
+            [],
+            lambda vs: urwid.Text(f"{vs.name} (ID: {vs.id})", wrap="ellipsis"),
+            on_select=on_select_vector_store,
+        )
+
+        async def fill_body() -> None:
+            try:
+                async for batch in self.projects_service.astream_vector_stores(refresh):
+                    first = not len(stores_list.walker)
+                    stores_list.extend(batch)
+                    if first and len(stores_list.walker):
+                        pile.focus_position = 3
+                    status.set_text(
+                        f"Carregando... {len(stores_list.walker)} Vector Store(s)"
+                    )
+                    self.refresh_screen()
+            except Exception as e:  # noqa: BLE001
+                status.set_text(str(e))
+                return
+            count = len(stores_list.walker)
+            if not count:
+                status.set_text("Nenhum Vector Store encontrado.")
+                return
+            status.set_text(f"{count} Vector Store(s). Enter seleciona.")
+
+        refresh_btn = urwid.Button("Atualizar")
+        urwid.connect_signal(
+            refresh_btn,
+            "click",
+            lambda _b: self.show_vector_stores(refresh=True),
+        )
+        pile = urwid.Pile(
+            [
+                ("pack", urwid.Text("Selecione um Vector Store:", align="center")),
+                ("pack", urwid.Divider()),
+                ("pack", status),
+                ("weight", 1, stores_list),
+                ("pack", urwid.Divider()),
+                ("pack", urwid.AttrMap(refresh_btn, None, focus_map="reversed")),
+                (
+                    "pack",
+                    urwid.AttrMap(
+                        urwid.Button("Voltar", self.back), None, focus_map="reversed"
+                    ),
+                ),
+            ]
+        )
+        self.main.original_widget = urwid.Padding(pile, left=2, right=2)
+        if self._stores_job is not None and self._stores_job.is_active():
+            # "Atualizar" rebuilds this screen; the listing still filling
+            # the previous one must not keep running next to the new one.
+            self._stores_job.cancel()
+        self._stores_job = self.run_task("Listar Vector Stores", fill_body)
 
     def show_files_search(self, button: Optional[urwid.Button] = None) -> None:
         if not self.projects_service.vector_store_id:
@@ -288,51 +1002,206 @@ class App:
             )
             return
         result_text = urwid.Text("")
+        detail_text = urwid.Text("")
+        search_job: Optional[Job] = None
+
+        def on_select_file(f) -> None:
+            if isinstance(f, ContentHit):
+                detail_text.set_text(
+                    f"Selecionado: {f.filename} | ID: {f.file_id} | "
+                    f"relevância {f.score:.2f}"
+                )
+                return
+            size = f"{f.bytes} bytes" if f.bytes is not None else "tamanho desconhecido"
+            detail_text.set_text(f"Selecionado: {f.filename} | ID: {f.id} | {size}")
+
+        def render_row(f) -> urwid.Widget:
+            if isinstance(f, ContentHit):
+                return urwid.Pile(
+                    [
+                        urwid.Text(f"{f.filename} (ID: {f.file_id})", wrap="ellipsis"),
+                        urwid.Padding(urwid.Text(f.snippet or "-"), left=2),
+                    ]
+                )
+            return urwid.Text(f"{f.filename} (ID: {f.id})", wrap="ellipsis")
+
+        results = VirtualList([], render_row, on_select=on_select_file)
 
-        def on_search(widget: urwid.Edit) -> None:
-            search_term = widget.edit_text.strip().lower()
+        def show_summary(capped: bool = False) -> None:
+            count = len(results.walker)
+            if capped:
+                result = f"Resultados (primeiros {count}; refine a busca):"
+            elif count:
+                result = f"Resultados ({count}):"
+            else:
+                result = "Nenhum arquivo encontrado."
+            failed = self.projects_service.failed_files()
+            if failed:
+                result += f"\nFalha ao obter {len(failed)} arquivo(s): " + ", ".join(
+                    f.file_id for f in failed[:10]
+                )
+            result_text.set_text(result)
+
+        def render_results(search_term: str) -> None:
+            # An empty term lists every file; a search stops at
+            # SEARCH_RESULT_LIMIT, which also bounds the linear scan that
+            # one- and two-letter terms need.
+            limit = SEARCH_RESULT_LIMIT if search_term.strip() else None
+            files = self.projects_service.search_files(search_term, limit)
+            results.set_rows(files)
+            detail_text.set_text("")
+            show_summary(capped=limit is not None and len(files) >= limit)
+
+        def render_content(search_term: str) -> None:
+            # Local index only: fast enough to run on every keystroke.
+            started = time.perf_counter()
+            hits = self.projects_service.search_content(search_term)
+            elapsed = (time.perf_counter() - started) * 1000
+            results.set_rows(hits)
+            detail_text.set_text("")
+            index = self.projects_service.content_index()
+            if index is None:
+                result_text.set_text("Índice de conteúdo desativado (CONTENT_INDEX).")
+            elif hits:
+                result_text.set_text(
+                    f"Resultados no conteúdo ({len(hits)}) em {elapsed:.1f} ms:"
+                )
+            elif search_term.strip():
+                result_text.set_text(
+                    "Nenhum documento encontrado. O índice local cobre o texto dos "
+                    f"arquivos enviados por este app ({len(index)} documento(s))."
+                )
+            else:
+                result_text.set_text(
+                    f"Digite termos para buscar em {len(index)} documento(s) "
+                    "indexado(s); prefixo* também funciona."
+                )
+
+        def on_search(widget: urwid.Edit, refresh: bool = False) -> None:
+            nonlocal search_job
+            search_term = widget.edit_text
+            if content_mode.get_state() and not refresh:
+                render_content(search_term)
+                return
+            if not refresh and self.projects_service.file_index_ready():
+                render_results(search_term)
+                return
+            if not refresh and prefetching():
+                # on_prefetch renders the current term once the warm-up ends.
+                return
+            if search_job is not None and search_job.is_active():
+                # One listing at a time fills the results.
+                search_job.cancel()
             result_text.set_text("Executando...")
+            results.set_rows([])
+            detail_text.set_text("")
 
-            def do_search(loop, user_data) -> None:
+            async def do_search() -> None:
+                # Matches are appended as listing batches arrive; the index
+                # is ready for search-as-you-type once the stream ends.
+                read = 0
                 try:
-                    file_map = self.projects_service.list_vector_store_files()
-                    matching = [
-                        d
-                        for d in file_map.values()
-                        if not search_term or search_term in d.filename.lower()
-                    ]
-                    if matching:
-                        result = f"Resultados ({len(matching)}):" + "\n".join(
-                            [f"- {f.filename} (ID: {f.id})" for f in matching]
+                    async for batch in self.projects_service.astream_vector_store_files(
+                        refresh
+                    ):
+                        read += len(batch)
+                        results.extend(filter_files(batch, search_term))
+                        result_text.set_text(
+                            f"Carregando... {read} arquivo(s) lido(s), "
+                            f"{len(results.walker)} resultado(s)"
                         )
-                    else:
-                        result = "Nenhum arquivo encontrado."
+                        self.refresh_screen()
                 except Exception as e:  # noqa: BLE001
-                    result = f"Erro ao buscar arquivos: {e}"
-                result_text.set_text(result)
+                    result_text.set_text(f"Erro ao buscar arquivos: {e}")
+                    return
+                show_summary()
+
+            search_job = self.run_task("Carregar índice de arquivos", do_search)
+
+        def prefetching() -> bool:
+            return self._prefetch_job is not None and self._prefetch_job.is_active()
+
+        def on_prefetch(job: Job) -> None:
+            if content_mode.get_state():
+                # The finished listing narrows hits to the selected store.
+                if not job.is_active():
+                    render_content(edit.edit_text)
+            elif job.is_active():
+                result_text.set_text(f"Pré-carregando... {job.done} arquivo(s) lido(s)")
+            elif self.projects_service.file_index_ready():
+                render_results(edit.edit_text)
+            elif job.status == FAILED:
+                result_text.set_text(f"Falha no pré-carregamento: {job.error}")
+            else:
+                result_text.set_text("")
 
-            self.loop.set_alarm_in(0, do_search)
+        def on_change(widget: urwid.Edit, old_text: str) -> None:
+            # Search-as-you-type only once the index is in memory.
+            if content_mode.get_state():
+                render_content(widget.edit_text)
+            elif self.projects_service.file_index_ready():
+                render_results(widget.edit_text)
+
+        def on_mode(checkbox: urwid.CheckBox, state: bool) -> None:
+            if state:
+                render_content(edit.edit_text)
+            elif self.projects_service.file_index_ready():
+                render_results(edit.edit_text)
+            else:
+                results.set_rows([])
+                detail_text.set_text("")
+                result_text.set_text("")
+
+        def on_jump(widget: urwid.Edit) -> None:
+            try:
+                index = int(widget.edit_text.strip()) - 1
+            except ValueError:
+                return
+            results.jump_to(index)
+            if results.selectable():
+                pile.focus_position = 6
 
         edit = EnterEdit(
-            "Digite parte do nome (Enter para pesquisar/listar): ", on_enter=on_search
+            "Nome, prefixo* ou *.ext (Enter para pesquisar/listar): ",
+            on_enter=on_search,
         )
         search_btn = urwid.Button("Pesquisar/Listar")
         urwid.connect_signal(search_btn, "click", lambda btn: on_search(edit))
+        urwid.connect_signal(edit, "postchange", on_change)
+        content_mode = urwid.CheckBox(
+            "Buscar no conteúdo (índice local, sem rede)", on_state_change=on_mode
+        )
+        refresh_btn = urwid.Button("Atualizar do serviço")
+        urwid.connect_signal(
+            refresh_btn, "click", lambda btn: on_search(edit, refresh=True)
+        )
+        jump_edit = EnterEdit("Ir para nº (Enter): ", on_enter=on_jump)
 
         pile = urwid.Pile(
             [
-                edit,
-                urwid.AttrMap(search_btn, None, focus_map="reversed"),
-                urwid.Divider(),
-                result_text,
-                urwid.AttrMap(
-                    urwid.Button("Voltar", self.back), None, focus_map="reversed"
+                ("pack", edit),
+                ("pack", content_mode),
+                ("pack", urwid.AttrMap(search_btn, None, focus_map="reversed")),
+                ("pack", urwid.AttrMap(refresh_btn, None, focus_map="reversed")),
+                ("pack", urwid.Divider()),
+                ("pack", result_text),
+                ("weight", 1, results),
+                ("pack", detail_text),
+                ("pack", jump_edit),
+                (
+                    "pack",
+                    urwid.AttrMap(
+                        urwid.Button("Voltar", self.back), None, focus_map="reversed"
+                    ),
                 ),
             ]
         )
-        self.main.original_widget = urwid.Padding(
-            urwid.Filler(pile, valign="top", top=2, bottom=2), left=2, right=2
-        )
+        self.main.original_widget = urwid.Padding(pile, left=2, right=2)
+
+        if self.projects_service.file_index_ready():
+            render_results(edit.edit_text)
+        elif prefetching():
+            self.watch_job(self._prefetch_job, on_prefetch)
 
     def show_file_add(self, button: Optional[urwid.Button] = None) -> None:
         if not self.projects_service.vector_store_id:
@@ -347,21 +1216,21 @@ class App:
             file_path = widget.edit_text.strip()
             if not file_path:
                 result_text.set_text("O caminho do arquivo não pode ser vazio.")
-                self.redraw()
+                self.refresh_screen()
                 return
             if not os.path.isfile(file_path):
                 result_text.set_text(f"Arquivo não encontrado em: {file_path}")
-                self.redraw()
+                self.refresh_screen()
                 return
             result_text.set_text("Executando...")
 
-            def do_add(loop, user_data) -> None:
-                ok, msg = self.projects_service.upload_and_attach_file(file_path)
+            async def do_add() -> None:
+                ok, msg = await self.projects_service.aupload_and_attach_file(file_path)
                 result_text.set_text(msg)
                 if ok:
                     widget.set_edit_text("")
 
-            self.loop.set_alarm_in(0, do_add)
+            self.run_task(f"Incluir {os.path.basename(file_path)}", do_add)
 
         edit = EnterEdit(
             "Digite o caminho do arquivo (Enter para incluir): ", on_enter=on_add
@@ -383,3 +1252,335 @@ class App:
         self.main.original_widget = urwid.Padding(
             urwid.Filler(pile, valign="top", top=2, bottom=2), left=2, right=2
         )
+
+    def show_bulk_add(self, button: Optional[urwid.Button] = None) -> None:
+        if not self.projects_service.vector_store_id:
+            self.main.original_widget = message_screen(
+                "Nenhum Vector Store selecionado. Use 'Vector Stores' primeiro.",
+                self.back,
+            )
+            return
+        progress_text = urwid.Text("")
+        results_walker = urwid.SimpleFocusListWalker([])
+        current: Dict[str, Job] = {}
+
+        def show_results(results) -> None:
+            ok = sum(1 for r in results if r.ok)
+            rows = [
+                (
+                    "OK" if r.ok else "ERRO",
+                    UPLOAD_ACTIONS.get(r.action, r.action),
+                    r.path,
+                    (r.file_id or "") if r.ok else (r.error or ""),
+                    f"{r.seconds:.1f}s",
+                )
+                for r in results
+            ]
+            results_walker[:] = [
+                urwid.Text(f"{ok} de {len(results)} arquivo(s) anexados."),
+                *table_rows(
+                    ("Status", "Ação", "Arquivo", "ID / Erro", "Tempo"),
+                    rows,
+                    (1, 2, 5, 4, 1),
+                ),
+            ]
+            results_walker.set_focus(0)
+
+        def on_add(widget: urwid.Edit) -> None:
+            if "job" in current and current["job"].is_active():
+                return
+            source = widget.edit_text.strip()
+            if not source:
+                progress_text.set_text("Informe um diretório ou padrão glob.")
+                return
+            paths = expand_source(source)
+            if not paths:
+                progress_text.set_text(f"Nenhum arquivo encontrado em: {source}")
+                return
+            results_walker[:] = []
+            outcome: Dict[str, list] = {}
+
+            def work(job: Job) -> None:
+                def on_progress(progress) -> None:
+                    job.update(
+                        done=progress.done,
+                        bytes_done=progress.bytes_done,
+                        detail=progress.summary(),
+                    )
+
+                job.update(
+                    total=len(paths), detail=f"Enviando {len(paths)} arquivo(s)..."
+                )
+                outcome["results"] = self.projects_service.upload_many(
+                    paths, self.upload_workers(), on_progress, job.cancelled
+                )
+
+            def on_job(job: Job) -> None:
+                progress_text.set_text(job.error or job.detail)
+                if not job.is_active() and "results" in outcome:
+                    show_results(outcome["results"])
+
+            # Bulk uploads keep running after leaving the screen; follow or
+            # cancel them from "Jobs".
+            current["job"] = self.jobs.start_thread(
+                f"Envio em lote: {source}", work, after=self._connect_job
+            )
+            self.watch_job(current["job"], on_job)
+
+        def on_cancel(btn) -> None:
+            if "job" in current:
+                current["job"].cancel()
+
+        edit = EnterEdit(
+            "Diretório ou glob (Enter para incluir em lote): ", on_enter=on_add
+        )
+        add_btn = urwid.Button("Incluir em lote")
+        urwid.connect_signal(add_btn, "click", lambda btn: on_add(edit))
+        cancel_btn = urwid.Button("Cancelar envio")
+        urwid.connect_signal(cancel_btn, "click", on_cancel)
+
+        pile = urwid.Pile(
+            [
+                ("pack", edit),
+                ("pack", urwid.AttrMap(add_btn, None, focus_map="reversed")),
+                ("pack", urwid.AttrMap(cancel_btn, None, focus_map="reversed")),
+                ("pack", urwid.Divider()),
+                ("pack", progress_text),
+                ("pack", urwid.Divider()),
+                ("weight", 1, urwid.ListBox(results_walker)),
+                (
+                    "pack",
+                    urwid.AttrMap(
+                        urwid.Button("Voltar", self.back), None, focus_map="reversed"
+                    ),
+                ),
+            ]
+        )
+        self.main.original_widget = urwid.Padding(pile, left=2, right=2)
+
+    def show_sync(self, button: Optional[urwid.Button] = None) -> None:
+        if not self.projects_service.vector_store_id:
+            self.main.original_widget = message_screen(
+                "Nenhum Vector Store selecionado. Use 'Vector Stores' primeiro.",
+                self.back,
+            )
+            return
+        progress_text = urwid.Text("")
+        results_walker = urwid.SimpleFocusListWalker([])
+        current: Dict[str, Job] = {}
+        removal_group: list = []
+        removal_buttons = {
+            mode: urwid.RadioButton(removal_group, label, state=mode == DETACH)
+            for mode, label in SYNC_REMOVAL_LABELS.items()
+        }
+
+        def removal_mode() -> str:
+            for mode, btn in removal_buttons.items():
+                if btn.get_state():
+                    return mode
+            return DETACH
+
+        def show_preview(report) -> None:
+            plan = report.plan
+            rows = [("novo", f.rel_path) for f in plan.new[:SYNC_PREVIEW_ROWS]]
+            rows += [("alterado", f.rel_path) for f in plan.changed[:SYNC_PREVIEW_ROWS]]
+            rows += [
+                ("removido", f"{e.rel_path} ({e.file_id})")
+                for e in plan.removed[:SYNC_PREVIEW_ROWS]
+            ]
+            results_walker[:] = [
+                urwid.Text(report.summary()),
+                *table_rows(("Ação", "Arquivo"), rows, (1, 6)),
+            ]
+            results_walker.set_focus(0)
+
+        def show_report(report) -> None:
+            rows = [
+                (
+                    "OK" if r.ok else "ERRO",
+                    UPLOAD_ACTIONS.get(r.action, r.action),
+                    os.path.relpath(r.path, report.plan.root),
+                    (r.file_id or "") if r.ok else (r.error or ""),
+                )
+                for r in report.results
+            ]
+            rows += [("ERRO", "remover", error, "") for error in report.errors]
+            results_walker[:] = [
+                urwid.Text(report.summary()),
+                *table_rows(
+                    ("Status", "Ação", "Arquivo", "ID / Erro"), rows, (1, 2, 5, 4)
+                ),
+            ]
+            results_walker.set_focus(0)
+
+        def start(widget: urwid.Edit, dry_run: bool) -> None:
+            if "job" in current and current["job"].is_active():
+                return
+            root = widget.edit_text.strip()
+            if not root:
+                progress_text.set_text("Informe um diretório.")
+                return
+            removal = removal_mode()
+            results_walker[:] = []
+            outcome: Dict[str, object] = {}
+
+            def work(job: Job) -> None:
+                def on_progress(progress) -> None:
+                    job.update(
+                        done=progress.done,
+                        total=progress.total,
+                        bytes_done=progress.bytes_done,
+                        detail=progress.summary(),
+                    )
+
+                job.update(detail="Comparando diretório e manifesto...")
+                outcome["report"] = self.projects_service.sync_directory(
+                    root,
+                    dry_run=dry_run,
+                    removal=removal,
+                    max_workers=self.upload_workers(),
+                    on_progress=on_progress,
+                    should_cancel=job.cancelled,
+                )
+                job.update(detail=outcome["report"].summary())
+
+            def on_job(job: Job) -> None:
+                progress_text.set_text(job.error or job.detail)
+                report = outcome.get("report")
+                if job.is_active() or report is None:
+                    return
+                if report.dry_run:
+                    show_preview(report)
+                else:
+                    show_report(report)
+
+            name = "Prévia da sincronização" if dry_run else "Sincronizar"
+            current["job"] = self.jobs.start_thread(
+                f"{name}: {root}", work, after=self._connect_job
+            )
+            self.watch_job(current["job"], on_job)
+
+        def on_cancel(btn) -> None:
+            if "job" in current:
+                current["job"].cancel()
+
+        edit = EnterEdit(
+            "Diretório (Enter para pré-visualizar): ",
+            on_enter=lambda w: start(w, dry_run=True),
+        )
+        preview_btn = urwid.Button("Pré-visualizar")
+        urwid.connect_signal(preview_btn, "click", lambda btn: start(edit, True))
+        sync_btn = urwid.Button("Sincronizar")
+        urwid.connect_signal(sync_btn, "click", lambda btn: start(edit, False))
+        cancel_btn = urwid.Button("Cancelar")
+        urwid.connect_signal(cancel_btn, "click", on_cancel)
+        buttons = urwid.Columns(
+            [
+                urwid.AttrMap(b, None, focus_map="reversed")
+                for b in (preview_btn, sync_btn, cancel_btn)
+            ],
+            dividechars=2,
+        )
+
+        pile = urwid.Pile(
+            [
+                ("pack", edit),
+                ("pack", urwid.Text("Arquivos removidos ou substituídos:")),
+                *[("pack", btn) for btn in removal_buttons.values()],
+                ("pack", buttons),
+                ("pack", urwid.Divider()),
+                ("pack", progress_text),
+                ("pack", urwid.Divider()),
+                ("weight", 1, urwid.ListBox(results_walker)),
+                (
+                    "pack",
+                    urwid.AttrMap(
+                        urwid.Button("Voltar", self.back), None, focus_map="reversed"
+                    ),
+                ),
+            ]
+        )
+        self.main.original_widget = urwid.Padding(pile, left=2, right=2)
+
+    def show_jobs(self, button: Optional[urwid.Button] = None) -> None:
+        walker = urwid.SimpleFocusListWalker([])
+
+        def progress_of(job: Job) -> str:
+            if job.total:
+                return f"{job.done}/{job.total}"
+            return str(job.done) if job.done else "-"
+
+        def rate_of(job: Job) -> str:
+            if not job.done:
+                return "-"
+            rate = f"{job.items_per_second():.1f} it/s"
+            if job.bytes_done:
+                rate += f", {job.megabytes_per_second():.2f} MB/s"
+            return rate
+
+        def refresh() -> None:
+            focus = walker.focus
+            rows = []
+            for job in reversed(self.jobs.jobs()):
+                cells = urwid.Columns(
+                    [
+                        ("weight", 4, urwid.Text(job.name, wrap="ellipsis")),
+                        ("weight", 2, urwid.Text(job.status)),
+                        ("weight", 1, urwid.Text(f"{job.elapsed():.1f}s")),
+                        ("weight", 2, urwid.Text(progress_of(job))),
+                        ("weight", 2, urwid.Text(rate_of(job))),
+                    ],
+                    dividechars=1,
+                )
+                if job.is_active():
+                    btn = urwid.Button("Cancelar")
+                    urwid.connect_signal(btn, "click", lambda _b, j=job: j.cancel())
+                    cells.contents.append(
+                        (
+                            urwid.AttrMap(btn, None, focus_map="reversed"),
+                            cells.options("weight", 2),
+                        )
+                    )
+                else:
+                    cells.contents.append(
+                        (urwid.Text(job.error or ""), cells.options("weight", 2))
+                    )
+                rows.append(cells)
+            walker[:] = rows or [urwid.Text("Nenhum job executado.")]
+            if focus is not None and focus < len(walker):
+                walker.set_focus(focus)
+
+        def tick(loop, user_data) -> None:
+            if self.main.original_widget is not screen:
+                return
+            refresh()
+            self.loop.set_alarm_in(1, tick)
+
+        refresh()
+        header = urwid.Columns(
+            [
+                ("weight", 4, urwid.Text("Nome")),
+                ("weight", 2, urwid.Text("Status")),
+                ("weight", 1, urwid.Text("Tempo")),
+                ("weight", 2, urwid.Text("Progresso")),
+                ("weight", 2, urwid.Text("Taxa")),
+                ("weight", 2, urwid.Text("")),
+            ],
+            dividechars=1,
+        )
+        screen = urwid.Pile(
+            [
+                ("pack", urwid.Text("Jobs", align="center")),
+                ("pack", urwid.Divider()),
+                ("pack", urwid.AttrMap(header, "reversed")),
+                ("weight", 1, urwid.ListBox(walker)),
+                (
+                    "pack",
+                    urwid.AttrMap(
+                        urwid.Button("Voltar", self.back), None, focus_map="reversed"
+                    ),
+                ),
+            ]
+        )
+        self.main.original_widget = screen
+        self.loop.set_alarm_in(1, tick)
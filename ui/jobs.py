@@ -0,0 +1,228 @@
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, List, Optional, Set
+
+DEFAULT_MAX_NETWORK_JOBS = 4
+DEFAULT_MAX_THREAD_JOBS = 4
+DEFAULT_JOB_HISTORY = 50
+
+PENDING = "pendente"
+RUNNING = "executando"
+DONE = "concluído"
+FAILED = "falhou"
+CANCELLED = "cancelado"
+
+
+@dataclass
+class Job:
+    id: int
+    name: str
+    screen: bool = False
+    status: str = PENDING
+    created_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    done: int = 0
+    total: Optional[int] = None
+    bytes_done: int = 0
+    detail: str = ""
+    error: Optional[str] = None
+    _cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    _task: Optional[asyncio.Task] = field(default=None, repr=False)
+    _notify: Callable[[], None] = field(default=lambda: None, repr=False)
+
+    def is_active(self) -> bool:
+        return self.status in (PENDING, RUNNING)
+
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def items_per_second(self) -> float:
+        elapsed = self.elapsed()
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def megabytes_per_second(self) -> float:
+        elapsed = self.elapsed()
+        return self.bytes_done / 1_000_000 / elapsed if elapsed > 0 else 0.0
+
+    def cancelled(self) -> bool:
+        # Polled by thread-based work, which cannot be interrupted directly.
+        return self._cancel_event.is_set()
+
+    async def wait(self) -> None:
+        # Waits for the job to finish without propagating its outcome or
+        # cancelling it when the waiter is cancelled.
+        if self._task is not None and not self._task.done():
+            await asyncio.wait({self._task})
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    def update(
+        self,
+        done: Optional[int] = None,
+        total: Optional[int] = None,
+        bytes_done: Optional[int] = None,
+        detail: Optional[str] = None,
+    ) -> None:
+        # Safe to call from worker threads.
+        if done is not None:
+            self.done = done
+        if total is not None:
+            self.total = total
+        if bytes_done is not None:
+            self.bytes_done = bytes_done
+        if detail is not None:
+            self.detail = detail
+        self._notify()
+
+
+class JobManager:
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        max_network_jobs: int = DEFAULT_MAX_NETWORK_JOBS,
+        max_thread_jobs: int = DEFAULT_MAX_THREAD_JOBS,
+        history: int = DEFAULT_JOB_HISTORY,
+    ) -> None:
+        self._loop = loop
+        self._network = asyncio.Semaphore(max(1, max_network_jobs))
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_thread_jobs), thread_name_prefix="job"
+        )
+        self._history = history
+        self._ids = itertools.count(1)
+        self._jobs: List[Job] = []
+        self._listeners: List[Callable[[Job], None]] = []
+        # Jobs with a dispatch already queued from a worker thread.
+        self._queued: Set[int] = set()
+        self._queued_lock = threading.Lock()
+
+    def subscribe(self, listener: Callable[[Job], None]) -> None:
+        self._listeners.append(listener)
+
+    def jobs(self) -> List[Job]:
+        return list(self._jobs)
+
+    def running(self) -> List[Job]:
+        return [j for j in self._jobs if j.is_active()]
+
+    def start(
+        self,
+        name: str,
+        work: Callable[[Job], Awaitable[Any]],
+        network: bool = True,
+        screen: bool = False,
+        after: Optional[Job] = None,
+    ) -> Job:
+        # network=True jobs share a semaphore so only a bounded number of
+        # them talk to the service at once; the rest wait as PENDING, as do
+        # jobs whose `after` job is still active.
+        job = self._new_job(name, screen)
+
+        async def run() -> None:
+            try:
+                if after is not None:
+                    await after.wait()
+                if network:
+                    async with self._network:
+                        await self._run(job, work)
+                else:
+                    await self._run(job, work)
+            except asyncio.CancelledError:
+                # Cancelled while still queued, before _run took over.
+                if job.status == PENDING:
+                    job.status = CANCELLED
+                    self._notify(job)
+
+        job._task = self._loop.create_task(run())
+        return job
+
+    def start_thread(
+        self,
+        name: str,
+        work: Callable[[Job], Any],
+        network: bool = True,
+        screen: bool = False,
+        after: Optional[Job] = None,
+    ) -> Job:
+        async def in_executor(job: Job) -> Any:
+            return await self._loop.run_in_executor(self._executor, work, job)
+
+        return self.start(
+            name, in_executor, network=network, screen=screen, after=after
+        )
+
+    def cancel_screen_jobs(self) -> None:
+        for job in self.running():
+            if job.screen:
+                job.cancel()
+
+    def shutdown(self) -> None:
+        for job in self.running():
+            job.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _new_job(self, name: str, screen: bool) -> Job:
+        job = Job(id=next(self._ids), name=name, screen=screen)
+        job._notify = lambda: self._notify(job)
+        self._jobs.append(job)
+        finished = [j for j in self._jobs if not j.is_active()]
+        for old in finished[: max(0, len(finished) - self._history)]:
+            self._jobs.remove(old)
+        self._notify(job)
+        return job
+
+    async def _run(self, job: Job, work: Callable[[Job], Awaitable[Any]]) -> None:
+        job.status = RUNNING
+        job.started_at = time.monotonic()
+        self._notify(job)
+        try:
+            await work(job)
+            job.status = CANCELLED if job.cancelled() else DONE
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+        except Exception as e:  # noqa: BLE001
+            logging.exception(f"Falha no job '{job.name}'")
+            job.status = FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = time.monotonic()
+            self._notify(job)
+
+    def _notify(self, job: Job) -> None:
+        if not self._listeners:
+            return
+        if threading.current_thread() is threading.main_thread():
+            self._dispatch(job)
+            return
+        # Worker threads may report progress thousands of times a second;
+        # listeners read the job's current state, so one queued dispatch per
+        # job covers every update made before it runs.
+        with self._queued_lock:
+            if job.id in self._queued:
+                return
+            self._queued.add(job.id)
+        try:
+            self._loop.call_soon_threadsafe(self._dispatch_queued, job)
+        except RuntimeError:
+            # Loop closed during shutdown.
+            pass
+
+    def _dispatch_queued(self, job: Job) -> None:
+        with self._queued_lock:
+            self._queued.discard(job.id)
+        self._dispatch(job)
+
+    def _dispatch(self, job: Job) -> None:
+        for listener in self._listeners:
+            listener(job)
@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+from typing import Callable
+
+import urwid
+
+from services.metrics import METRICS
+
+DEFAULT_MAX_FPS = 30
+
+
+class RedrawScheduler:
+    # Coalesces repaint requests into at most one draw_screen() per frame
+    # interval on the app's own loop. request() is cheap and safe from any
+    # thread or task, so progress callbacks can call it on every update:
+    # only the first request of a frame schedules anything, the rest just
+    # find a draw already pending.
+    def __init__(
+        self,
+        loop: urwid.MainLoop,
+        aio_loop: asyncio.AbstractEventLoop,
+        can_draw: Callable[[], bool],
+        max_fps: float = DEFAULT_MAX_FPS,
+    ) -> None:
+        self.interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.requests = 0
+        self.draws = 0
+        self._loop = loop
+        self._aio_loop = aio_loop
+        self._can_draw = can_draw
+        self._lock = threading.Lock()
+        self._pending = False
+        self._last_draw = 0.0
+
+    def request(self) -> None:
+        with self._lock:
+            self.requests += 1
+            if self._pending:
+                return
+            self._pending = True
+        if threading.current_thread() is threading.main_thread():
+            self._schedule()
+            return
+        try:
+            self._aio_loop.call_soon_threadsafe(self._schedule)
+        except RuntimeError:
+            # The loop is already closed; there is no screen left to draw.
+            pass
+
+    def flush(self) -> None:
+        # Draws now if anything is pending, e.g. before blocking the loop.
+        if self._pending:
+            self._draw()
+
+    def _schedule(self) -> None:
+        delay = self._last_draw + self.interval - time.monotonic()
+        if delay > 0:
+            self._aio_loop.call_later(delay, self._draw)
+        else:
+            self._aio_loop.call_soon(self._draw)
+
+    def _draw(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            self._pending = False
+        self._last_draw = time.monotonic()
+        if not self._can_draw():
+            return
+        self.draws += 1
+        with METRICS.timer("ui.draw"):
+            self._loop.draw_screen()
@@ -1,5 +1,10 @@
 import urwid
-from typing import Callable, Dict, Optional
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+# Row widgets kept alive by a VirtualList; everything else is rebuilt on
+# demand, so memory follows the screen height, not the number of rows.
+ROW_CACHE_SIZE = 256
 
 
 class EnterEdit(urwid.Edit):
@@ -44,3 +49,144 @@ def menu_screen(
         body.append(footer)
     pile = urwid.Pile(body)
     return urwid.Filler(pile, valign="middle")
+
+
+def table_row(cells: Sequence[str], weights: Sequence[int]) -> urwid.Widget:
+    return urwid.Columns(
+        [("weight", w, urwid.Text(c, wrap="ellipsis")) for w, c in zip(weights, cells)],
+        dividechars=1,
+    )
+
+
+def table_rows(
+    headers: Sequence[str], rows: List[Sequence[str]], weights: Sequence[int]
+) -> List[urwid.Widget]:
+    return [
+        urwid.AttrMap(table_row(headers, weights), "reversed"),
+        *[table_row(r, weights) for r in rows],
+    ]
+
+
+class _SelectableRow(urwid.WidgetWrap):
+    def selectable(self) -> bool:
+        return True
+
+    def keypress(self, size, key):
+        return key
+
+
+class LazyListWalker(urwid.ListWalker):
+    # Positions are plain indexes into `rows`; widgets are built by
+    # `render_row` only when the ListBox asks for them.
+    def __init__(
+        self,
+        rows: Sequence[Any],
+        render_row: Callable[[Any], urwid.Widget],
+        cache_size: int = ROW_CACHE_SIZE,
+    ) -> None:
+        self._rows = rows
+        self._render_row = render_row
+        self._cache: "OrderedDict[int, urwid.Widget]" = OrderedDict()
+        self._cache_size = cache_size
+        self.focus = 0
+
+    def set_rows(self, rows: Sequence[Any]) -> None:
+        self._rows = rows
+        self._cache.clear()
+        self.focus = 0
+        self._modified()
+
+    def extend(self, rows: Sequence[Any]) -> None:
+        if not isinstance(self._rows, list):
+            self._rows = list(self._rows)
+        self._rows.extend(rows)
+        self._modified()
+
+    def row(self, position: int) -> Any:
+        return self._rows[position]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, position: int) -> urwid.Widget:
+        if not 0 <= position < len(self._rows):
+            raise IndexError(position)
+        widget = self._cache.get(position)
+        if widget is None:
+            widget = urwid.AttrMap(
+                _SelectableRow(self._render_row(self._rows[position])),
+                None,
+                focus_map="reversed",
+            )
+            self._cache[position] = widget
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(position)
+        return widget
+
+    def next_position(self, position: int) -> int:
+        if position + 1 >= len(self._rows):
+            raise IndexError(position)
+        return position + 1
+
+    def prev_position(self, position: int) -> int:
+        if position <= 0:
+            raise IndexError(position)
+        return position - 1
+
+    def set_focus(self, position: int) -> None:
+        if not 0 <= position < max(1, len(self._rows)):
+            raise IndexError(position)
+        self.focus = position
+        self._modified()
+
+    def positions(self, reverse: bool = False) -> Iterator[int]:
+        if reverse:
+            return iter(range(len(self._rows) - 1, -1, -1))
+        return iter(range(len(self._rows)))
+
+
+class VirtualList(urwid.ListBox):
+    # Scrollable, selectable list over any sequence (100k rows is fine):
+    # arrows/page up/page down/home/end move, Enter selects.
+    def __init__(
+        self,
+        rows: Sequence[Any],
+        render_row: Callable[[Any], urwid.Widget],
+        on_select: Optional[Callable[[Any], None]] = None,
+    ) -> None:
+        self.walker = LazyListWalker(rows, render_row)
+        self.on_select = on_select
+        super().__init__(self.walker)
+
+    def set_rows(self, rows: Sequence[Any]) -> None:
+        self.walker.set_rows(rows)
+
+    def extend(self, rows: Sequence[Any]) -> None:
+        self.walker.extend(rows)
+
+    def jump_to(self, index: int) -> None:
+        if not len(self.walker):
+            return
+        index = max(0, min(index, len(self.walker) - 1))
+        self.set_focus(index, coming_from="above" if index else None)
+
+    def selected(self) -> Any:
+        if not len(self.walker):
+            return None
+        return self.walker.row(self.walker.focus)
+
+    def selected_index(self) -> Optional[int]:
+        return self.walker.focus if len(self.walker) else None
+
+    def selectable(self) -> bool:
+        return len(self.walker) > 0
+
+    def keypress(self, size, key):
+        if key == "enter" and self.on_select is not None:
+            row = self.selected()
+            if row is not None:
+                self.on_select(row)
+            return None
+        return super().keypress(size, key)